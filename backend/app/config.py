@@ -1,9 +1,10 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from pydantic import AnyHttpUrl, Field
 from pydantic_settings import BaseSettings
+from rag_core.admission import DEFAULT_CONCURRENCY, DEFAULT_INTERVAL_MS, DEFAULT_MAX_QUEUE, DEFAULT_TARGET_MS
 
 
 class Settings(BaseSettings):
@@ -23,7 +24,47 @@ class Settings(BaseSettings):
     data_dir: Path = Path(__file__).resolve().parent.parent / "data"
     embeddings_model: str = Field(
         default="sentence-transformers/all-MiniLM-L6-v2",
-        description="SentenceTransformer model name.",
+        description=(
+            "SentenceTransformer model name, or 'onnx:<model>' for the ONNX Runtime int8 backend."
+        ),
+    )
+    embedding_cache_size: int = Field(
+        default=4096,
+        description="Query embeddings kept in memory per encoder model; 0 disables the cache.",
+    )
+    warmup_enabled: bool = Field(
+        default=True,
+        description="Precompute answers for the warm question list at startup and after reindex.",
+    )
+    warm_questions_file: Optional[Path] = Field(
+        default=None,
+        description="One question per line; defaults to the seven advertised facts for each fund.",
+    )
+    rerank_model: Optional[str] = Field(
+        default=None,
+        description="Cross-encoder used to rerank retrieved candidates, e.g. 'cross-encoder/ms-marco-MiniLM-L-6-v2'.",
+    )
+    rerank_candidates: int = 20
+    rerank_budget_ms: float = 150.0
+    admission_enabled: bool = Field(
+        default=True,
+        description="Shed /query load with 429/503 + Retry-After once the slot queue is full or standing.",
+    )
+    admission_concurrency: int = DEFAULT_CONCURRENCY
+    admission_max_queue: int = DEFAULT_MAX_QUEUE
+    admission_target_ms: float = DEFAULT_TARGET_MS
+    admission_interval_ms: float = DEFAULT_INTERVAL_MS
+    background_loading: bool = Field(
+        default=True,
+        description="Load the model and index on a background thread after the server binds.",
+    )
+    query_requires_ready: bool = Field(
+        default=False,
+        description="Answer /query with 503 + Retry-After until loading has finished.",
+    )
+    profiler_token: Optional[str] = Field(
+        default=None,
+        description="X-Admin-Token for /admin/profile, X-Profile request profiles and /admin/memory; unset disables them.",
     )
     top_k: int = 4
     max_answer_sentences: int = 3
@@ -4,7 +4,7 @@ import json
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional, Sequence
 
 import requests
 from bs4 import BeautifulSoup
@@ -57,14 +57,16 @@ KEYWORDS = [
     "factsheet",
 ]
 
+CHUNK_CHAR_LIMIT = 600
 
-def fetch_html(source: FundSource) -> str:
-    response = requests.get(source.url, timeout=30)
+
+def fetch_html(source: FundSource, session: Optional[requests.Session] = None) -> str:
+    response = (session or requests).get(source.url, timeout=30)
     response.raise_for_status()
     return response.text
 
 
-def extract_chunks(html: str) -> List[str]:
+def extract_lines(html: str) -> List[str]:
     soup = BeautifulSoup(html, "html.parser")
     for tag in soup(["script", "style", "noscript", "svg"]):
         tag.decompose()
@@ -86,13 +88,15 @@ def extract_chunks(html: str) -> List[str]:
             include_next -= 1
         elif lower_line.startswith(("₹", "rs", "0", "1", "2", "3", "4", "5", "6", "7", "8", "9")):
             filtered.append(line)
-    filtered = [line for line in filtered if len(line.split()) >= 1]
+    return [line for line in filtered if len(line.split()) >= 1]
+
+
+def chunk_lines(filtered: List[str]) -> List[str]:
     chunks: List[str] = []
     current: List[str] = []
-    char_limit = 600
     for line in filtered:
         current.append(line)
-        if sum(len(segment) for segment in current) >= char_limit:
+        if sum(len(segment) for segment in current) >= CHUNK_CHAR_LIMIT:
             chunks.append(" ".join(current))
             current = []
     if current:
@@ -100,24 +104,37 @@ def extract_chunks(html: str) -> List[str]:
     return chunks
 
 
-def build_documents() -> List[dict]:
+def extract_chunks(html: str) -> List[str]:
+    return chunk_lines(extract_lines(html))
+
+
+def chunk_documents(source: FundSource, chunks: List[str], captured_at: str) -> List[dict]:
+    documents: List[dict] = []
+    for idx, chunk in enumerate(chunks):
+        section = chunk.split(".")[0][:80]
+        documents.append(
+            {
+                "id": f"{source.fund_id}_{idx}",
+                "fund_id": source.fund_id,
+                "fund_name": source.fund_name,
+                "section": section,
+                "text": chunk,
+                "source": source.url,
+                "captured_at": captured_at,
+            }
+        )
+    return documents
+
+
+def build_documents(
+    sources: Sequence[FundSource] = FUND_SOURCES,
+    session: Optional[requests.Session] = None,
+) -> List[dict]:
     documents: List[dict] = []
-    captured_at = datetime.utcnow().date()
-    for source in FUND_SOURCES:
-        html = fetch_html(source)
-        for idx, chunk in enumerate(extract_chunks(html)):
-            section = chunk.split(".")[0][:80]
-            documents.append(
-                {
-                    "id": f"{source.fund_id}_{idx}",
-                    "fund_id": source.fund_id,
-                    "fund_name": source.fund_name,
-                    "section": section,
-                    "text": chunk,
-                    "source": source.url,
-                    "captured_at": captured_at.isoformat(),
-                }
-            )
+    captured_at = datetime.utcnow().date().isoformat()
+    for source in sources:
+        html = fetch_html(source, session)
+        documents.extend(chunk_documents(source, extract_chunks(html), captured_at))
     return documents
 
 
@@ -129,11 +146,12 @@ def write_documents(documents: Iterable[dict], output_path: Path) -> None:
 
 def run_ingestion() -> None:
     settings = get_settings()
-    documents_path = settings.data_dir / "documents.json"
+    # Scraped input only; the served documents.json is published with its embeddings
+    documents_path = settings.data_dir / "raw_documents.json"
     documents = build_documents()
     write_documents(documents, documents_path)
     rag = RagService()
-    count = rag.ingest_documents(documents_path)
+    count = rag.ingest_documents(documents_path, chunking={"splitter": "lines", "char_limit": CHUNK_CHAR_LIMIT})
     print(f"Ingested {count} documents into the local vector store.")
 
 
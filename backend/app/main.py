@@ -1,38 +1,68 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from rag_core import admission, memory, profiling, startup, telemetry
+from rag_core.admission import AdmissionController
+from rag_core.index_builder import run_ingestion_process
+from rag_core.serialization import JSON_MEDIA_TYPE
+from rag_core.startup import DEFAULT_RETRY_AFTER_SECONDS, NotReady
 
 from .config import get_settings
 from .rag_service import rag_service
 from .schemas import QueryRequest, QueryResponse, ReindexResponse
 
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
 
 def create_app() -> FastAPI:
     settings = get_settings()
     app = FastAPI(title=settings.app_name)
+    if settings.admission_enabled:
+        # Added first so CORS and timing also wrap rejections
+        admission.install(
+            app,
+            AdmissionController(
+                concurrency=settings.admission_concurrency,
+                max_queue=settings.admission_max_queue,
+                target_ms=settings.admission_target_ms,
+                interval_ms=settings.admission_interval_ms,
+            ),
+        )
+    startup.install(app, rag_service.startup, require_ready=settings.query_requires_ready)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_credentials=False,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing"],
     )
+    telemetry.install(app)
+    profiling.install(app, settings.profiler_token or "")
+    memory.install(app, rag_service.memory_components, settings.profiler_token or "")
 
     @app.on_event("startup")
     async def startup_event() -> None:
-        try:
-            rag_service.load_index()
-        except FileNotFoundError:
-            # Defer ingestion to manual step; surface friendly error later.
-            pass
+        # A missing index fails readiness (see /health/ready) until /admin/reindex publishes one
+        rag_service.startup.start(rag_service.load, background=settings.background_loading)
 
     @app.get("/health")
     async def health_check() -> dict:
-        return {"status": "ok"}
+        return {"status": "ok", "index_generation": rag_service.generation}
 
     @app.post("/query", response_model=QueryResponse)
-    async def query(request: QueryRequest) -> QueryResponse:
+    async def query(request: QueryRequest) -> Response:
         try:
-            return rag_service.answer(request.question)
+            body = await rag_service.shared_answer_body(request.question)
+            return Response(content=body, media_type=JSON_MEDIA_TYPE)
+        except NotReady as e:
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(DEFAULT_RETRY_AFTER_SECONDS)},
+            )
         except FileNotFoundError:
             raise HTTPException(
                 status_code=503,
@@ -41,12 +71,22 @@ def create_app() -> FastAPI:
 
     @app.post("/admin/reindex", response_model=ReindexResponse)
     async def reindex() -> ReindexResponse:
-        from .ingest import run_ingestion
-
-        run_ingestion()
+        if rag_service.startup.state == "loading":
+            raise HTTPException(status_code=503, detail="The service is still loading. Please retry shortly.")
+        # In a child process off the event loop; queries keep being served meanwhile
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, run_ingestion_process, "app.ingest", str(BACKEND_DIR))
+        except RuntimeError as e:
+            raise HTTPException(status_code=500, detail=f"Reindexing failed: {e}")
+        # Loading the index and answering the warm questions block, so they run off the event loop too
+        await asyncio.get_running_loop().run_in_executor(None, rag_service.reload_and_warm_up)
+        if not rag_service.startup.ready:
+            # Startup found no index; this reindex published one
+            rag_service.startup.mark_ready()
         return ReindexResponse(
-            documents_indexed=len(rag_service._documents),
+            documents_indexed=len(rag_service.documents),
             message="Re-index completed.",
+            generation=rag_service.generation,
         )
 
     return app
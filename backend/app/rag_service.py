@@ -1,16 +1,53 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import FrozenSet, List, Optional, Set, Tuple
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from rag_core import artifacts, memory, profiling
+from rag_core.embedding_cache import normalize_question
+from rag_core.encoders import Encoder, load_encoder
+from rag_core.engine import RagEngine
+from rag_core.generators import ExtractiveGenerator
+from rag_core.indexes import Chunk, Hit, NumpyIndex
+from rag_core.rerank import reranker_from_config
+from rag_core.sentences import SENTENCE_EMBEDDINGS_FILE, SENTENCES_FILE, SentenceIndex
+from rag_core.serialization import model_body
+from rag_core.singleflight import SingleFlight
+from rag_core.startup import NotReady, Startup
+from rag_core.telemetry import stage
+from rag_core.text import is_advice_query
+from rag_core.warmup import PreparedResponses, load_warm_questions
 
 from .config import get_settings
 from .schemas import QueryResponse, SourceChunk
-from .text_utils import clean_sentence, curated_sentence_split, is_advice_query
+
+
+def _to_chunk(doc: SourceChunk) -> Chunk:
+    return Chunk(
+        id=doc.id,
+        text=doc.text,
+        source=str(doc.source),
+        metadata={"fund_id": doc.fund_id, "fund_name": doc.fund_name, "captured_at": doc.captured_at.isoformat()},
+    )
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """
+    One loaded version: documents, their vectors, the index over them and
+    the sentence index, all by the same row positions. Replaced in one
+    assignment, and read once per query, so a query never mixes positions
+    from one version with documents from another.
+    """
+
+    documents: List[SourceChunk]
+    embeddings: np.ndarray
+    sentences: Optional[SentenceIndex]
+    index: NumpyIndex
 
 
 class RagService:
@@ -18,108 +55,294 @@ class RagService:
 
     def __init__(self) -> None:
         self.settings = get_settings()
-        self._model: Optional[SentenceTransformer] = None
-        self._documents: List[SourceChunk] = []
-        self._embeddings: Optional[np.ndarray] = None
+        self._encoder: Optional[Encoder] = None
+        self._engine: Optional[RagEngine] = None
+        self._snapshot: Optional[_Snapshot] = None
+        self.prepared = PreparedResponses()
+        self.flights = SingleFlight()
+        self._refusal: Optional[Tuple[date, bytes]] = None
+        self.generation: Optional[str] = None
+        self.manifest: Optional[dict] = None
+        self.changed_sources: Optional[Set[str]] = None  # fund ids the last load changed; None means all
+        self.startup = Startup()
+
+    @property
+    def documents(self) -> List[SourceChunk]:
+        return self._snapshot.documents if self._snapshot is not None else []
+
+    def memory_components(self) -> memory.Components:
+        """Bytes held by the encoder, index, documents, sentence index and caches."""
+        snapshot = self._snapshot
+        components = memory.engine_components(self._engine)
+        components["documents"] = memory.Component(
+            memory.generation_sizeof("app.documents", snapshot.documents if snapshot else [], self.generation)
+        )
+        if snapshot is not None and snapshot.sentences is not None:
+            components["sentence_index"] = memory.Component(snapshot.sentences.nbytes)
+        components["warm_responses"] = memory.Component(self.prepared.nbytes)
+        return components
+
+    def _load_model(self) -> Encoder:
+        if self._encoder is None:
+            self._encoder = load_encoder(self.settings.embeddings_model)
+        return self._encoder
+
+    def _get_engine(self) -> RagEngine:
+        if self._engine is None:
+            extractive = ExtractiveGenerator(self.settings.max_answer_sentences)
+            self._engine = RagEngine(
+                self._load_model(),
+                generator=extractive,
+                fallback=extractive,
+                context_size=1,
+                index_name="numpy",
+                embedding_cache_size=self.settings.embedding_cache_size,
+                reranker=reranker_from_config(
+                    self.settings.rerank_model,
+                    candidates=self.settings.rerank_candidates,
+                    budget_ms=self.settings.rerank_budget_ms,
+                ),
+            )
+        return self._engine
+
+    @staticmethod
+    def _snapshot_of(
+        documents: List[SourceChunk], embeddings: np.ndarray, sentences: Optional[SentenceIndex]
+    ) -> _Snapshot:
+        return _Snapshot(documents, embeddings, sentences, NumpyIndex(embeddings, [_to_chunk(doc) for doc in documents]))
 
-    def _load_model(self) -> SentenceTransformer:
-        if self._model is None:
-            self._model = SentenceTransformer(self.settings.embeddings_model)
-        return self._model
+    def _publish(self, snapshot: _Snapshot) -> None:
+        self._snapshot = snapshot
+        self._get_engine().set_index(snapshot.index)
 
-    def ingest_documents(self, documents_path: Path) -> int:
+    def ingest_documents(self, documents_path: Path, chunking: Optional[dict] = None) -> int:
         with documents_path.open("r", encoding="utf-8") as f:
             data = json.load(f)
-        self._documents = [SourceChunk(**item) for item in data]
-        model = self._load_model()
-        texts = [doc.text for doc in self._documents]
-        self._embeddings = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-        self._persist_embeddings()
-        return len(self._documents)
-
-    def load_index(self) -> None:
-        documents_path = self.settings.data_dir / "documents.json"
-        embeddings_path = self.settings.data_dir / "embeddings.npy"
+        documents = [SourceChunk(**item) for item in data]
+        texts = [doc.text for doc in documents]
+        embeddings = self._load_model().encode(texts)
+        snapshot = self._snapshot_of(documents, embeddings, SentenceIndex.build(texts, self._load_model()))
+        self._persist_embeddings(snapshot, chunking or {})
+        self._publish(snapshot)
+        return len(documents)
+
+    def load(self, startup: Startup) -> None:
+        """Encoder, index and warm-up as timed startup phases; a missing index fails the index phase."""
+        with startup.phase("encoder"):
+            self._get_engine()
+        with startup.phase("index"):
+            self.load_index()
+        with startup.phase("warmup"):
+            self.warm_up()
+
+    def load_index(self) -> bool:
+        """
+        Load the published version of ``data_dir`` (or the flat legacy layout).
+        Files are checked against the manifest before anything replaces the
+        index being served. Returns False when that generation is already loaded.
+        """
+        data_dir = Path(artifacts.resolve(str(self.settings.data_dir)))
+        documents_path = data_dir / "documents.json"
+        embeddings_path = data_dir / "embeddings.npy"
         if not documents_path.exists() or not embeddings_path.exists():
             raise FileNotFoundError(
                 "Vector store not found. Run `python -m app.ingest` from the backend directory."
             )
+        manifest = artifacts.verify(str(data_dir))
+        generation = artifacts.generation(manifest)
+        loaded = self._snapshot is not None
+        if loaded and generation is not None and generation == self.generation:
+            return False
+        artifacts.check_compatible(manifest, self.settings.embeddings_model, self._load_model().dimension)
         with documents_path.open("r", encoding="utf-8") as f:
             data = json.load(f)
-        self._documents = [SourceChunk(**item) for item in data]
-        self._embeddings = np.load(embeddings_path)
-        if len(self._documents) != self._embeddings.shape[0]:
+        documents = [SourceChunk(**item) for item in data]
+        embeddings = np.load(embeddings_path)
+        artifacts.check_count(manifest, "documents", len(documents))
+        if len(documents) != embeddings.shape[0]:
             raise ValueError("Mismatch between embeddings and documents length.")
+        snapshot = self._snapshot_of(documents, embeddings, self._load_sentences(data_dir, manifest, documents))
+        self._publish(snapshot)
+        self._set_manifest(manifest)
+        return True
 
-    def _persist_embeddings(self) -> None:
-        embeddings_path = self.settings.data_dir / "embeddings.npy"
-        embeddings_path.parent.mkdir(parents=True, exist_ok=True)
-        if self._embeddings is None:
-            raise RuntimeError("No embeddings to persist.")
-        np.save(embeddings_path, self._embeddings)
-        documents_path = self.settings.data_dir / "documents.json"
-        serializable = [doc.dict() for doc in self._documents]
-        with documents_path.open("w", encoding="utf-8") as f:
-            json.dump(serializable, f, indent=2, default=str)
+    def reload_and_warm_up(self) -> bool:
+        """Load a newly published version; if there was one, recompute warmed answers for the funds it changed."""
+        loaded = self.load_index()
+        if loaded:
+            self.warm_up()
+        return loaded
 
-    def answer(self, question: str) -> QueryResponse:
-        if is_advice_query(question):
-            return QueryResponse(
-                answer=(
-                    "I can only share factual details from official sources. "
-                    "Please consult a SEBI-registered advisor for personalised guidance. "
-                    "Facts-only. No investment advice."
-                ),
-                citation=self.settings.investor_education_link,
-                last_updated=datetime.utcnow().date(),
-                matched_fund=None,
-                metadata={
-                    "reason": "advice_request",
-                    "note": "Forward user to investor education resources.",
-                },
+    def _set_manifest(self, manifest: Optional[dict]) -> None:
+        self.changed_sources = artifacts.changed_sources(self.manifest, manifest)
+        self.manifest = manifest
+        self.generation = artifacts.generation(manifest)
+
+    def _load_sentences(
+        self, data_dir: Path, manifest: Optional[dict], documents: List[SourceChunk]
+    ) -> SentenceIndex:
+        """
+        The sentence index published with this version. A version ingested
+        before the sentence index existed gets one built in memory on every
+        load: a published version is never written to, only replaced.
+        """
+        published = manifest is None or all(name in manifest["files"] for name in (SENTENCES_FILE, SENTENCE_EMBEDDINGS_FILE))
+        sentences = SentenceIndex.load(data_dir) if published and SentenceIndex.exists(data_dir) else None
+        if sentences is not None:
+            artifacts.check_count(manifest, "sentences", len(sentences.sentences))
+        if sentences is None or sentences.chunk_count != len(documents):
+            print("No sentence index published with this index; building it in memory. Reindex to publish one.")
+            sentences = SentenceIndex.build([doc.text for doc in documents], self._load_model())
+        return sentences
+
+    def _persist_embeddings(self, snapshot: _Snapshot, chunking: dict) -> None:
+        """Write embeddings, documents and sentences as one new version of ``data_dir``."""
+        with artifacts.new_version(str(self.settings.data_dir)) as staging:
+            directory = Path(staging.path)
+            np.save(directory / "embeddings.npy", snapshot.embeddings)
+            serializable = [doc.dict() for doc in snapshot.documents]
+            with (directory / "documents.json").open("w", encoding="utf-8") as f:
+                json.dump(serializable, f, indent=2, default=str)
+            if snapshot.sentences is not None:
+                snapshot.sentences.save(directory)
+                staging.counts["sentences"] = len(snapshot.sentences.sentences)
+            staging.counts["documents"] = len(snapshot.documents)
+            staging.extra = artifacts.index_metadata(
+                self.settings.embeddings_model, snapshot.embeddings.shape[1], "ip", chunking
             )
+            staging.extra["sources"] = artifacts.source_digests((doc.fund_id, doc.text) for doc in snapshot.documents)
+        self._set_manifest(staging.manifest)
+
+    def _refusal_response(self, today: date) -> QueryResponse:
+        return QueryResponse.model_construct(
+            answer=(
+                "I can only share factual details from official sources. "
+                "Please consult a SEBI-registered advisor for personalised guidance. "
+                "Facts-only. No investment advice."
+            ),
+            citation=self.settings.investor_education_link,
+            last_updated=today,
+            matched_fund=None,
+            metadata={
+                "reason": "advice_request",
+                "note": "Forward user to investor education resources.",
+            },
+        )
+
+    def refusal_body(self) -> bytes:
+        """Serialized refusal; only its date changes, so rebuild it once per day."""
+        today = datetime.utcnow().date()
+        if self._refusal is None or self._refusal[0] != today:
+            self._refusal = (today, model_body(self._refusal_response(today)))
+        return self._refusal[1]
+
+    def warm_up(self) -> None:
+        if not self.settings.warmup_enabled:
+            return
+        path = self.settings.warm_questions_file
+        self.prepared.warm(
+            load_warm_questions(str(path) if path else None), self._warm_answer, changed=self.changed_sources
+        )
+
+    def _warm_answer(self, question: str) -> Optional[Tuple[bytes, FrozenSet[str]]]:
+        if is_advice_query(question):
+            return None
+        response, fund_ids = self._facts(question)
+        if response.metadata and "reason" in response.metadata:
+            return None
+        return model_body(response), fund_ids
 
-        documents, scores = self._retrieve(question)
+    def answer_body(self, question: str) -> bytes:
+        """JSON body for ``/query``: warmed answers and refusals skip serialization."""
+        body = self.prepared.get(question)
+        if body is not None:
+            return body
+        return self._compute_body(question)
+
+    async def shared_answer_body(self, question: str) -> bytes:
+        """``answer_body`` off the event loop, shared by identical in-flight questions."""
+        body = self.prepared.get(question)
+        if body is not None:
+            return body
+        return await self.flights.run(
+            profiling.flight_key(normalize_question(question)), lambda: profiling.call(self._compute_body, question)
+        )
+
+    def _compute_body(self, question: str) -> bytes:
+        with stage("validation"):
+            is_advice = is_advice_query(question)
+        if is_advice:
+            return self.refusal_body()
+        return model_body(self._answer_facts(question))
+
+    def answer(self, question: str) -> QueryResponse:
+        with stage("validation"):
+            is_advice = is_advice_query(question)
+        if is_advice:
+            return self._refusal_response(datetime.utcnow().date())
+        return self._answer_facts(question)
+
+    def _answer_facts(self, question: str) -> QueryResponse:
+        return self._facts(question)[0]
+
+    def _facts(self, question: str) -> Tuple[QueryResponse, FrozenSet[str]]:
+        """The answer plus the fund ids of every chunk it was chosen from."""
+        snapshot, hits, vector = self._retrieve(question)
+        documents = [snapshot.documents[hit.position] for hit in hits]
         if not documents:
-            return QueryResponse(
+            response = QueryResponse.model_construct(
                 answer="I could not find an official answer for that scheme. Facts-only. No investment advice.",
                 citation=self.settings.allowed_sources[0],
                 last_updated=datetime.utcnow().date(),
                 matched_fund=None,
                 metadata={"reason": "no_match"},
             )
+            return response, frozenset()
 
-        top_doc = documents[0]
-        sentences = curated_sentence_split(top_doc.text)
-        trimmed = " ".join(sentences[: self.settings.max_answer_sentences])
-        answer_text = f"{trimmed} Facts-only. No investment advice. Last updated from sources: {top_doc.captured_at}."
+        top_doc, extracted, score = self._extract(snapshot, question, vector, hits)
+        answer_text = f"{extracted} Facts-only. No investment advice. Last updated from sources: {top_doc.captured_at}."
 
-        return QueryResponse(
+        response = QueryResponse.model_construct(
             answer=answer_text,
             citation=top_doc.source,
             last_updated=top_doc.captured_at,
             matched_fund=top_doc.fund_name,
-            metadata={"score": scores[0]},
+            metadata={"score": score, "tier": "extractive"},
         )
+        return response, frozenset(doc.fund_id for doc in documents)
+
+    def _extract(
+        self, snapshot: _Snapshot, question: str, vector: np.ndarray, hits: List[Hit]
+    ) -> Tuple[SourceChunk, str, float]:
+        """
+        The best-matching sentences among the retrieved chunks, scored against
+        the precomputed sentence vectors. The chunk holding the best sentence
+        becomes the cited document.
+        """
+        if snapshot.sentences is not None:
+            with stage("context"):
+                match = snapshot.sentences.best(
+                    vector, [hit.position for hit in hits], self.settings.max_answer_sentences
+                )
+            if match.sentences:
+                score = next(hit.score for hit in hits if hit.position == match.position)
+                return snapshot.documents[match.position], " ".join(match.sentences), score
+        extracted = self._get_engine().generate(question, hits[:1]).text
+        return snapshot.documents[hits[0].position], extracted, hits[0].score
 
-    def _retrieve(self, question: str) -> Tuple[List[SourceChunk], List[float]]:
-        if self._embeddings is None or not len(self._documents):
+    def _retrieve(self, question: str) -> Tuple[_Snapshot, List[Hit], np.ndarray]:
+        """Hits from the snapshot being served, which the caller must resolve positions against."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            if self.startup.state == "loading":
+                raise NotReady("The index is still loading. Please retry shortly.")
             self.load_index()
-        assert self._embeddings is not None
-        model = self._load_model()
-        query_vec = model.encode([question], convert_to_numpy=True, normalize_embeddings=True)[0]
-        scores = np.dot(self._embeddings, query_vec)
-        top_indices = np.argsort(scores)[::-1][: self.settings.top_k]
-        documents: List[SourceChunk] = []
-        selected_scores: List[float] = []
-        for idx in top_indices:
-            if scores[idx] <= 0:
-                continue
-            documents.append(self._documents[idx])
-            selected_scores.append(float(scores[idx]))
-        return documents, selected_scores
+            snapshot = self._snapshot
+        engine = self._get_engine()
+        vector = engine.embed(question)
+        k = self.settings.top_k
+        hits = engine.rerank(question, engine.search(vector, engine.candidate_count(k), snapshot.index), k)
+        return snapshot, [hit for hit in hits if hit.score > 0], vector
 
 
 rag_service = RagService()
-
-
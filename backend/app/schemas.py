@@ -30,6 +30,7 @@ class QueryResponse(BaseModel):
 class ReindexResponse(BaseModel):
     documents_indexed: int
     message: str
+    generation: Optional[str] = None
 
 
 class ChunkList(BaseModel):
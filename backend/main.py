@@ -3,95 +3,19 @@ FastAPI backend for Facts-Only MF Assistant
 Provides RAG-based query service for mutual fund facts
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi import HTTPException
+import asyncio
 import os
 from dotenv import load_dotenv
-from datetime import datetime
 
-from services.rag_service import RAGService
-from services.query_validator import QueryValidator
+from rag_core.api import create_app
+from rag_core.index_builder import run_ingestion_process
 
 load_dotenv()
 
-app = FastAPI(
-    title="Facts-Only MF Assistant API",
-    description="RAG-based chatbot for mutual fund factual queries",
-    version="1.0.0"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:3001"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Initialize services
-rag_service = RAGService()
-query_validator = QueryValidator()
-
-# Request/Response models
-class QueryRequest(BaseModel):
-    question: str
-    context: Optional[str] = None
-
-class QueryResponse(BaseModel):
-    answer: str
-    source: str
-    lastUpdated: str
-    isRefusal: bool = False
-    educationalLink: Optional[str] = None
-
-class HealthResponse(BaseModel):
-    status: str
-    timestamp: str
-    vectorStoreLoaded: bool
-
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "vectorStoreLoaded": rag_service.is_ready()
-    }
-
-@app.post("/query", response_model=QueryResponse)
-async def query(request: QueryRequest):
-    """
-    Main query endpoint for factual MF questions
-    Returns answer with citation or refusal message
-    """
-    try:
-        # Validate query
-        validation_result = query_validator.validate(request.question)
-        
-        if not validation_result["is_valid"]:
-            return QueryResponse(
-                answer=validation_result["message"],
-                source="",
-                lastUpdated="N/A",
-                isRefusal=True,
-                educationalLink=validation_result.get("educational_link")
-            )
-        
-        # Process query through RAG
-        result = rag_service.query(request.question)
-        
-        return QueryResponse(
-            answer=result["answer"],
-            source=result["source"],
-            lastUpdated="N/A",
-            isRefusal=False
-        )
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+# /health, /query, warm-up and the middleware are shared with the Vercel function
+app, api = create_app()
+rag_service = api.rag_service
 
 @app.post("/admin/reindex")
 async def reindex():
@@ -100,9 +24,17 @@ async def reindex():
     Protected endpoint - should add authentication in production
     """
     try:
-        from scripts.ingest_data import run_ingestion
-        run_ingestion()
-        return {"status": "success", "message": "Vector store reindexed successfully"}
+        # In a child process off the event loop; queries keep being served meanwhile
+        await asyncio.get_running_loop().run_in_executor(
+            None, run_ingestion_process, "scripts.ingest_data", os.path.dirname(os.path.abspath(__file__))
+        )
+        # Loading the index and answering the warm questions block, so they run off the event loop too
+        await asyncio.get_running_loop().run_in_executor(None, api.reload_and_warm_up)
+        return {
+            "status": "success",
+            "message": "Vector store reindexed successfully",
+            "generation": rag_service.generation
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Reindexing failed: {str(e)}")
 
@@ -111,4 +43,3 @@ if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
 
-
@@ -0,0 +1,3 @@
+"""
+Shared building blocks used by every Facts-Only MF Assistant API entry point.
+"""
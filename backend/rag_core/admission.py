@@ -0,0 +1,195 @@
+"""
+Admission control and load shedding for ``/query``.
+
+Without a limit, an overloaded app accepts every request, queues the work
+and lets all of it time out together. ``AdmissionMiddleware`` runs at most
+``concurrency`` limited requests at once and queues the rest in FIFO order.
+It sheds load in two ways:
+
+- **Queue full** (``429``): a request that finds ``max_queue`` requests
+  already waiting is rejected on arrival.
+- **Standing queue** (``503``): CoDel's rule applied to the time each request
+  waited for a slot. Once every request has waited longer than ``target_ms``
+  for a full ``interval_ms``, the queue is standing rather than absorbing a
+  burst. Requests are then rejected, both on arrival and when they reach the
+  head of the queue, until one gets through under the target again.
+
+Both responses carry ``Retry-After``. Only ``paths`` (default ``/query``)
+are limited; ``/health``, ``/metrics`` and everything else always pass.
+Outcomes are counted in ``mf_admission_total``, and queue waits are timed in
+``mf_admission_queue_seconds``.
+
+Configured with ``ADMISSION_*`` environment variables (``admission_*``
+settings for ``app/main.py``); ``ADMISSION_ENABLED=0`` turns it off.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Iterable, Optional
+
+from .telemetry import ADMISSION_QUEUE, record_admission
+
+DEFAULT_CONCURRENCY = min(32, (os.cpu_count() or 1) + 4)  # the default executor's thread count
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_TARGET_MS = 100.0
+DEFAULT_INTERVAL_MS = 500.0
+
+
+class AdmissionController:
+    """FIFO slots plus the CoDel standing-queue check; event-loop confined."""
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        target_ms: float = DEFAULT_TARGET_MS,
+        interval_ms: float = DEFAULT_INTERVAL_MS,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        self.target = target_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._first_above: Optional[float] = None
+        self.dropping = False
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _observe(self, waited: float, now: float) -> bool:
+        """CoDel: True once waits have stayed above target for a whole interval."""
+        if waited < self.target:
+            self._first_above = None
+            self.dropping = False
+            return False
+        if self._first_above is None:
+            self._first_above = now + self.interval
+            return False
+        self.dropping = now >= self._first_above
+        return self.dropping
+
+    def reject_reason(self) -> Optional[str]:
+        """Why a new arrival must be turned away, or None to let it queue."""
+        if self.running < self.concurrency and not self._waiters:
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+        if self.dropping:
+            return "standing_queue"
+        return None
+
+    async def acquire(self) -> Optional[str]:
+        """Wait for a slot; returns None when admitted, or the rejection reason."""
+        reason = self.reject_reason()
+        if reason is not None:
+            return reason
+        arrived = time.monotonic()
+        if self.running < self.concurrency and not self._waiters:
+            self.running += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    self.release()  # the slot was handed over just as we were cancelled
+                raise
+        now = time.monotonic()
+        ADMISSION_QUEUE.observe(now - arrived)
+        if self._observe(now - arrived, now):
+            self.release()
+            return "standing_queue"
+        return None
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # hand the slot over; running is unchanged
+                return
+        self.running -= 1
+
+
+def controller_from_env() -> Optional[AdmissionController]:
+    if os.getenv("ADMISSION_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    return AdmissionController(
+        concurrency=int(os.getenv("ADMISSION_CONCURRENCY", str(DEFAULT_CONCURRENCY))),
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", str(DEFAULT_MAX_QUEUE))),
+        target_ms=float(os.getenv("ADMISSION_TARGET_MS", str(DEFAULT_TARGET_MS))),
+        interval_ms=float(os.getenv("ADMISSION_INTERVAL_MS", str(DEFAULT_INTERVAL_MS))),
+    )
+
+
+_REJECTIONS = {
+    "queue_full": (429, "Too many queries are waiting. Please retry shortly."),
+    "standing_queue": (503, "The service is overloaded. Please retry shortly."),
+}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an ``AdmissionController`` to ``paths``."""
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        paths: Iterable[str] = ("/query",),
+        retry_after_seconds: Optional[int] = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+        self.retry_after = str(retry_after_seconds or max(1, math.ceil(controller.interval)))
+
+    async def _reject(self, reason: str, send) -> None:
+        status, message = _REJECTIONS[reason]
+        body = json.dumps({"detail": message}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", self.retry_after.encode("ascii")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        reason = await self.controller.acquire()
+        record_admission(reason or "admitted")
+        if reason is not None:
+            await self._reject(reason, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+def install(app, controller: Optional[AdmissionController] = None, paths: Iterable[str] = ("/query",)) -> None:
+    """
+    Add admission control to ``app``; ``controller`` defaults to the
+    ``ADMISSION_*`` environment. Call this before other middleware is
+    added, so CORS headers and request timing also cover rejections.
+    """
+    controller = controller if controller is not None else controller_from_env()
+    if controller is not None:
+        app.add_middleware(AdmissionMiddleware, controller=controller, paths=tuple(paths))
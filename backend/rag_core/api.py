@@ -0,0 +1,216 @@
+"""
+The FastAPI app shared by ``backend/main.py`` and the Vercel function.
+
+Both entry points serve the same ``/health`` and ``/query`` over the same
+``RAGService``, with the same middleware in the same order: admission
+control, the readiness gate, CORS, stage timing and ``/metrics``, the
+admin profiler and memory accounting. ``create_app`` builds that app and
+returns it with its ``QueryAPI``, which holds what the handlers share:
+
+- refusals and answers serialized straight from the response model
+  (``refusal_body``, ``answer_body``);
+- the warmed answers (``rag_core.warmup``), computed after the index loads
+  and again after every reload that changed it;
+- one run per identical in-flight question (``rag_core.singleflight``).
+
+Each entry point adds only its own ``/admin/reindex``.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from . import admission, memory, profiling, startup, telemetry
+from .embedding_cache import normalize_question
+from .serialization import JSON_MEDIA_TYPE, model_body
+from .service import RAGService
+from .singleflight import SingleFlight
+from .validator import QueryValidator
+from .warmup import PreparedResponses, load_warm_questions, warmup_enabled
+
+DEFAULT_ALLOW_ORIGINS = ("http://localhost:3000", "http://localhost:3001")
+
+
+class QueryRequest(BaseModel):
+    question: str
+    context: Optional[str] = None
+    catalogue: Optional[str] = None  # AMC index to search; routed from the question when omitted
+
+
+class QueryResponse(BaseModel):
+    answer: str
+    source: str
+    lastUpdated: str
+    isRefusal: bool = False
+    educationalLink: Optional[str] = None
+    tier: Optional[str] = None
+    catalogue: Optional[str] = None
+
+
+class HealthResponse(BaseModel):
+    status: str
+    timestamp: str
+    vectorStoreLoaded: bool
+    indexGeneration: Optional[str] = None
+
+
+@lru_cache(maxsize=8)
+def refusal_body(message: str, educational_link: Optional[str]) -> bytes:
+    """Refusals only depend on the validator message, so serialize each one once"""
+    return model_body(QueryResponse.model_construct(
+        answer=message,
+        source="",
+        lastUpdated="N/A",
+        isRefusal=True,
+        educationalLink=educational_link
+    ))
+
+
+def answer_body(result: dict) -> bytes:
+    """Serialize a RAG result; its fields are already plain strings, so skip validation"""
+    return model_body(QueryResponse.model_construct(
+        answer=result["answer"],
+        source=result["source"],
+        lastUpdated="N/A",
+        isRefusal=False,
+        tier=result.get("tier"),
+        catalogue=result.get("catalogue")
+    ))
+
+
+class QueryAPI:
+    """The service, validator, warmed answers and in-flight queries behind one app."""
+
+    def __init__(self, rag_service: RAGService, validator: Optional[QueryValidator] = None) -> None:
+        self.rag_service = rag_service
+        self.validator = validator or QueryValidator()
+        self.prepared = PreparedResponses()
+        self.flights = SingleFlight()
+
+    def memory_components(self) -> memory.Components:
+        components = self.rag_service.memory_components()
+        components["warm_responses"] = memory.Component(self.prepared.nbytes)
+        return components
+
+    def warm_answer(self, question: str) -> Optional[Tuple[bytes, List[str]]]:
+        """Serialized answer and the sources it was built from, or None when it should not be cached"""
+        if not self.validator.validate(question)["is_valid"] or not self.rag_service.is_ready():
+            return None
+        result = self.rag_service.query(question)
+        if not result["source"]:
+            return None
+        return answer_body(result), result["sources"]
+
+    def warm_up(self) -> None:
+        """Precompute answers for the most frequent questions"""
+        if warmup_enabled():
+            # After a partial re-ingestion only answers built from changed funds are recomputed
+            self.prepared.warm(load_warm_questions(), self.warm_answer, changed=self.rag_service.changed_sources)
+
+    def reload_and_warm_up(self) -> None:
+        """Reload the published index; if it changed, recompute warmed answers that depend on funds it changed"""
+        if self.rag_service.reload():
+            self.warm_up()
+
+    def load(self, progress: startup.Startup) -> None:
+        """Model, index and warm-up, run after the server is accepting connections"""
+        self.rag_service.load(progress)
+        with progress.phase("warmup"):
+            self.warm_up()
+
+    def on_startup(self) -> None:
+        if self.rag_service.startup.state == "pending":
+            # Bind first and load in the background; /health/ready reports progress
+            self.rag_service.startup.start(self.load, background=True)
+        else:
+            self.warm_up()
+
+    def health(self) -> dict:
+        return {
+            "status": "healthy",
+            "timestamp": datetime.now().isoformat(),
+            "vectorStoreLoaded": self.rag_service.is_ready(),
+            "indexGeneration": self.rag_service.generation
+        }
+
+    async def query_body(self, request: QueryRequest) -> bytes:
+        """The JSON body for one ``/query``: warmed, refused or answered through the RAG service"""
+        # Warmed answers are served as pre-serialized JSON
+        body = self.prepared.get(request.question) if request.catalogue is None else None
+        if body is not None:
+            return body
+
+        with telemetry.stage("validation"), profiling.profiled():
+            validation_result = self.validator.validate(request.question)
+        if not validation_result["is_valid"]:
+            return refusal_body(validation_result["message"], validation_result.get("educational_link"))
+
+        # Identical in-flight questions share one run
+        result = await self.flights.run(
+            profiling.flight_key(f"{request.catalogue or ''}\0{normalize_question(request.question)}"),
+            lambda: profiling.call(self.rag_service.query, request.question, catalogue=request.catalogue)
+        )
+        return answer_body(result)
+
+
+def create_app(allow_origins=DEFAULT_ALLOW_ORIGINS):
+    """The app with ``/health``, ``/query`` and the shared middleware, and the ``QueryAPI`` behind it."""
+    from fastapi import FastAPI, HTTPException, Response
+    from fastapi.middleware.cors import CORSMiddleware
+
+    app = FastAPI(
+        title="Facts-Only MF Assistant API",
+        description="RAG-based chatbot for mutual fund factual queries",
+        version="1.0.0"
+    )
+
+    # Admission control for /query; added first so CORS and timing also wrap rejections
+    admission.install(app)
+
+    # /health/live, /health/ready and, with QUERY_REQUIRES_READY=1, 503 from /query until loaded
+    api = QueryAPI(RAGService(background=startup.background_loading_enabled()))
+    startup.install(app, api.rag_service.startup)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(allow_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["Server-Timing"],
+    )
+
+    # Stage timing (Server-Timing header) and Prometheus /metrics
+    telemetry.install(app)
+
+    # Admin-only sampling profiler and X-Profile per-request cProfile; off unless PROFILER_TOKEN is set
+    profiling.install(app)
+
+    # Per-component bytes on /metrics; /admin/memory and tracemalloc diffs with PROFILER_TOKEN
+    memory.install(app, api.memory_components)
+
+    @app.on_event("startup")
+    async def startup_event():
+        api.on_startup()
+
+    @app.get("/health", response_model=HealthResponse)
+    async def health_check():
+        """Health check endpoint"""
+        return api.health()
+
+    @app.post("/query", response_model=QueryResponse)
+    async def query(request: QueryRequest):
+        """
+        Main query endpoint for factual MF questions
+        Returns answer with citation or refusal message
+        """
+        try:
+            return Response(content=await api.query_body(request), media_type=JSON_MEDIA_TYPE)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+    return app, api
@@ -0,0 +1,362 @@
+"""
+Versioned, crash-safe index directories.
+
+Ingestion writes every artifact of one index (vectors, chunks, sentence
+index, ...) into a fresh staging directory. Each file is fsynced, then
+``manifest.json`` records the size and BLAKE2b checksum of each file and
+the counts the loaders check. The directory is renamed to
+``versions/<version>`` and the ``current`` symlink is flipped to it with
+an atomic ``os.replace``::
+
+    <root>/current -> versions/20250118T101500.123456-3f2a9c1b
+    <root>/versions/20250118T101500.123456-3f2a9c1b/{manifest.json, index.faiss, ...}
+
+Symlinks need a privilege on Windows, so there ``current`` is a one-line
+``CURRENT`` pointer file naming the version, replaced the same way.
+Directories cannot be fsynced on Windows and are skipped there.
+
+A reader therefore sees either the old version or the new one, never a
+mix. A crash mid-ingest leaves only an orphaned staging directory, which
+the next publish removes once its process is gone. The writer holds an
+exclusive lock on ``<staging>.lock`` until it publishes; the lock is
+released by the OS when the process dies, so a lock that can be taken
+marks an orphan (a pid check would also misfire on pid reuse). ``verify`` is cheap
+enough for every load: it only compares file sizes with the manifest.
+``verify_checksums`` rereads every byte and is meant for the CLI.
+
+The manifest also records how the index was built (``index_metadata``:
+embedding model, dimension, metric, chunking, ingestion time) and a
+``content_hash`` over all artifacts. That hash is the index *generation*:
+services compare it to skip reloads and to decide when caches built on the
+old index must go. ``source_digests`` adds a digest per source (fund page
+URL or fund id), so ``changed_sources`` can tell which funds a new
+generation actually touched and caches can keep the rest.
+
+Roots without ``current`` (the layout used before versioning, and the
+bundled sample data) resolve to the root itself and load unverified.
+
+Usage (from the backend directory):
+    python -m rag_core.artifacts verify ./data/faiss_index
+"""
+
+from __future__ import annotations
+
+import argparse
+import errno
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+CURRENT_LINK = "current"
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+STAGING_PREFIX = ".staging-"
+LOCK_SUFFIX = ".lock"
+KEEP_VERSIONS = 2
+
+
+class ArtifactError(ValueError):
+    """A published index directory does not match its manifest."""
+
+
+def _fsync_path(path: str) -> None:
+    """fsync a file or directory; a directory is skipped where that is unsupported."""
+    if os.name == "nt" and os.path.isdir(path):
+        return  # directories cannot be opened on Windows, and NTFS needs no directory fsync
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        # Some filesystems (and platforms) reject fsync on a directory
+        if not (os.path.isdir(path) and e.errno in (errno.EINVAL, errno.EBADF, errno.EACCES, errno.EPERM)):
+            raise
+    finally:
+        os.close(fd)
+
+
+def _checksum(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _artifact_files(directory: str) -> Iterator[str]:
+    """Paths relative to ``directory``, excluding the manifest."""
+    for parent, _, names in os.walk(directory):
+        for name in names:
+            relative = os.path.relpath(os.path.join(parent, name), directory)
+            if relative != MANIFEST_FILE:
+                yield relative
+
+
+def resolve(root: str) -> str:
+    """The directory to load from: the target of ``<root>/current`` (or ``CURRENT``), or ``root`` itself."""
+    link = os.path.join(root, CURRENT_LINK)
+    if os.path.isdir(link):
+        return os.path.realpath(link)
+    pointer = os.path.join(root, CURRENT_FILE)
+    if os.path.isfile(pointer):
+        with open(pointer, "r", encoding="utf-8") as f:
+            return os.path.join(root, VERSIONS_DIR, f.read().strip())
+    return root
+
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify(directory: str) -> Optional[Dict]:
+    """
+    Check that every file in the manifest exists with the recorded size.
+    Returns the manifest, or None for an unversioned directory.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    for name, entry in manifest["files"].items():
+        path = os.path.join(directory, name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            raise ArtifactError(f"{path} is listed in the manifest but missing.")
+        if size != entry["size"]:
+            raise ArtifactError(f"{path} is {size} bytes; the manifest recorded {entry['size']}.")
+    return manifest
+
+
+def verify_checksums(directory: str) -> Dict:
+    manifest = verify(directory)
+    if manifest is None:
+        raise ArtifactError(f"No {MANIFEST_FILE} in {directory}.")
+    for name, entry in manifest["files"].items():
+        if _checksum(os.path.join(directory, name)) != entry["blake2b"]:
+            raise ArtifactError(f"{os.path.join(directory, name)} does not match its manifest checksum.")
+    return manifest
+
+
+def generation(manifest: Optional[Dict]) -> Optional[str]:
+    """The manifest's content hash; it changes exactly when any artifact's bytes change."""
+    return manifest.get("content_hash") if manifest else None
+
+
+def current_generation(root: str) -> Optional[str]:
+    """Generation of the version ``root`` currently publishes, from one small JSON read."""
+    return generation(read_manifest(resolve(root)))
+
+
+def source_digests(chunks: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+    """Digest of the chunk texts under each source, from ``(source, text)`` pairs; store as ``extra["sources"]``."""
+    digests: Dict[str, "hashlib.blake2b"] = {}
+    for source, text in chunks:
+        digest = digests.setdefault(source, hashlib.blake2b(digest_size=16))
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return {source: digest.hexdigest() for source, digest in sorted(digests.items())}
+
+
+def changed_sources(old: Optional[Dict], new: Optional[Dict]) -> Optional[Set[str]]:
+    """
+    Sources added, removed or rewritten between two manifests. None when
+    either lacks per-source digests, meaning everything must be treated as
+    changed.
+    """
+    if not old or not new or "sources" not in old or "sources" not in new:
+        return None
+    before, after = old["sources"], new["sources"]
+    return {source for source in set(before) | set(after) if before.get(source) != after.get(source)}
+
+
+def index_metadata(embedding_model: str, dimension: int, metric: str, chunking: Dict) -> Dict:
+    """Manifest fields describing how an index was built; pass as ``Staging.extra``."""
+    return {
+        "embedding_model": embedding_model,
+        "dimension": int(dimension),
+        "metric": metric,
+        "chunking": chunking,
+        "ingested_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+    }
+
+
+def check_compatible(manifest: Optional[Dict], embedding_model: str, dimension: Optional[int]) -> None:
+    """
+    Raise ``ArtifactError`` if the index was embedded with a different
+    dimension than the serving encoder produces. An unrelated model name with
+    the same dimension only warns.
+    """
+    if manifest is None or "dimension" not in manifest:
+        return
+    if dimension is not None and manifest["dimension"] != dimension:
+        raise ArtifactError(
+            f"Index vectors are {manifest['dimension']}-d ({manifest['embedding_model']}); "
+            f"the encoder '{embedding_model}' produces {dimension}-d vectors."
+        )
+    # "onnx:<model>:fp32" and friends embed like "<model>"
+    if manifest["embedding_model"] not in embedding_model and embedding_model not in manifest["embedding_model"]:
+        print(f"Index was embedded with '{manifest['embedding_model']}'; serving with '{embedding_model}'.")
+
+
+def check_count(manifest: Optional[Dict], name: str, actual: int) -> None:
+    """Raise ``ArtifactError`` if ``manifest`` recorded a different ``name`` count."""
+    if manifest is None or name not in manifest.get("counts", {}):
+        return
+    if manifest["counts"][name] != actual:
+        raise ArtifactError(f"Loaded {actual} {name}; the manifest recorded {manifest['counts'][name]}.")
+
+
+def _write_manifest(directory: str, counts: Dict[str, int], extra: Dict) -> Dict:
+    files: Dict[str, Dict] = {}
+    content = hashlib.blake2b(digest_size=16)
+    for name in sorted(_artifact_files(directory)):
+        path = os.path.join(directory, name)
+        _fsync_path(path)
+        files[name] = {"size": os.path.getsize(path), "blake2b": _checksum(path)}
+        content.update(f"{name}\0{files[name]['blake2b']}\n".encode("utf-8"))
+    manifest = {
+        **extra,
+        "format": MANIFEST_FORMAT,
+        "content_hash": content.hexdigest(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "counts": counts,
+        "files": files,
+    }
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    for parent, _, _ in os.walk(directory):
+        _fsync_path(parent)
+    return manifest
+
+
+def _flip_current(root: str, version: str) -> None:
+    tmp_path = os.path.join(root, f".{CURRENT_LINK}-{uuid.uuid4().hex}")
+    if os.name == "nt":
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+    else:
+        os.symlink(os.path.join(VERSIONS_DIR, version), tmp_path)
+        os.replace(tmp_path, os.path.join(root, CURRENT_LINK))
+    _fsync_path(root)
+
+
+def _prune(root: str, keep: int) -> None:
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    current = os.path.basename(resolve(root))
+    names = sorted(os.listdir(versions_dir))
+    published = [name for name in names if not name.startswith(".")]
+    # Processes that still have an older version open keep reading it:
+    # unlinked files stay readable until closed.
+    for name in published[:-keep]:
+        if name != current:
+            shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+    stagings = {name[: -len(LOCK_SUFFIX)] if name.endswith(LOCK_SUFFIX) else name for name in names}
+    for name in sorted(stagings):
+        if name.startswith(STAGING_PREFIX) and not _owner_alive(os.path.join(versions_dir, name)):
+            shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+            try:
+                os.remove(os.path.join(versions_dir, name) + LOCK_SUFFIX)
+            except OSError:
+                pass
+
+
+def _try_lock(f) -> bool:
+    """Take an exclusive lock on open file ``f`` without waiting; False if another handle holds it."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _owner_alive(staging_path: str) -> bool:
+    """Is the process writing ``staging_path`` still running, i.e. still holding its lock file?"""
+    try:
+        f = open(staging_path + LOCK_SUFFIX, "rb+")
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return True  # e.g. Windows refusing to share the file with its writer
+    with f:
+        return not _try_lock(f)
+
+
+class Staging:
+    """A staging directory; set ``counts`` (and optional ``extra`` manifest fields) before it is published."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.counts: Dict[str, int] = {}
+        self.extra: Dict = {}
+        self.manifest: Optional[Dict] = None
+
+
+@contextmanager
+def new_version(root: str, keep: int = KEEP_VERSIONS) -> Iterator[Staging]:
+    """
+    Yield a ``Staging`` to write artifacts into. Publish it as ``current``
+    when the block exits cleanly, and discard it if the block raises.
+    """
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+    staging = Staging(os.path.join(versions_dir, f"{STAGING_PREFIX}{os.getpid()}-{uuid.uuid4().hex}"))
+    # Held until publish; the OS drops it if this process dies, which marks the staging orphaned
+    lock = open(staging.path + LOCK_SUFFIX, "wb+")
+    try:
+        lock.write(b"\0")
+        lock.flush()
+        if not _try_lock(lock):
+            raise RuntimeError(f"Could not lock {lock.name}.")
+        os.makedirs(staging.path)
+        try:
+            yield staging
+            staging.manifest = _write_manifest(staging.path, staging.counts, staging.extra)
+            version = datetime.utcnow().strftime("%Y%m%dT%H%M%S.%f") + "-" + uuid.uuid4().hex[:8]
+            os.rename(staging.path, os.path.join(versions_dir, version))
+            _fsync_path(versions_dir)
+            _flip_current(root, version)
+        except BaseException:
+            shutil.rmtree(staging.path, ignore_errors=True)
+            raise
+    finally:
+        lock.close()
+        os.remove(lock.name)
+    _prune(root, keep)
+    print(f"Published index version {version} in {root}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("verify",))
+    parser.add_argument("root", nargs="?", default=os.getenv("VECTOR_STORE_PATH", "./data/faiss_index"))
+    args = parser.parse_args()
+    directory = resolve(args.root)
+    manifest = verify_checksums(directory)
+    print(f"{directory}: {len(manifest['files'])} files match the manifest; counts {manifest['counts']}")
+
+
+if __name__ == "__main__":
+    main()
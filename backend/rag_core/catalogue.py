@@ -0,0 +1,215 @@
+"""
+Registry of per-AMC (or per-fund-family) indexes, opened on demand.
+
+Loading every AMC's index into every worker does not fit in memory, so each
+catalogue keeps its own index under ``<root>/<catalogue id>/``. That
+directory is a published artifacts root (see ``rag_core.artifacts``)
+holding ``docstore.json`` plus either ``index.faiss`` (as written by
+``python -m rag_core.index_builder``) or ``embeddings.npy``. An optional
+``<root>/<catalogue id>/catalogue.json`` gives a display ``name`` and the
+``aliases`` used to route questions that do not name a catalogue::
+
+    {"name": "Nippon India Mutual Fund", "aliases": ["nippon", "reliance mutual fund"]}
+
+``CatalogueRegistry.get`` opens an index on first use and keeps it in an
+LRU of open indexes. Vectors are memory-mapped (``np.load(mmap_mode="r")``,
+or FAISS's mmap read flag), so opening costs little more than parsing the
+docstore, and evicting just drops the mapping. Each open index is charged
+the size of its vector and docstore files. When the total exceeds
+``budget_bytes``, the least recently used indexes are closed; the one just
+opened always stays. Searches already running keep their index alive
+until they finish. Each lookup resolves the catalogue's ``current``
+pointer and stats its docstore. A publish always creates a new version
+directory, so a changed path or mtime means a re-ingested catalogue, which
+is reopened on its next use; the manifest is only read then.
+
+``route`` matches the id, name and aliases as whole words (``uti`` does not
+match "distrib*uti*on") and prefers the longest match.
+
+Load latency is recorded in ``mf_catalogue_load_seconds``. Residency is
+exported as ``mf_catalogue_resident_indexes`` and
+``mf_catalogue_resident_bytes``, evictions as ``mf_catalogue_evictions_total``,
+and lookups as ``mf_cache_lookups_total{cache="catalogue"}``.
+
+Configured with ``CATALOGUE_ROOT`` and ``CATALOGUE_MEMORY_MB``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import numpy as np
+
+from . import artifacts
+from .embedding_cache import normalize_question
+from .indexes import DOCSTORE_FILE, FAISS_FILE, FaissIndex, NumpyIndex, VectorIndex, read_docstore
+from .telemetry import CATALOGUE_LOAD_SECONDS, record_cache_lookup, record_catalogue_eviction, set_catalogue_residency
+
+EMBEDDINGS_FILE = "embeddings.npy"
+CATALOGUE_FILE = "catalogue.json"
+DEFAULT_BUDGET_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class Catalogue:
+    id: str
+    root: str
+    name: str
+    aliases: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Resident:
+    index: VectorIndex
+    nbytes: int
+    generation: Optional[str]
+    published: Tuple[str, int]  # see CatalogueRegistry._published
+
+
+def _alias_pattern(alias: str) -> Pattern:
+    return re.compile(r"(?<!\w)" + re.escape(alias) + r"(?!\w)")
+
+
+def open_index(path: str) -> Tuple[VectorIndex, int]:
+    """Memory-map the index in ``path``; returns it with the bytes it is charged."""
+    chunks = read_docstore(path)
+    charged = os.path.getsize(os.path.join(path, DOCSTORE_FILE))
+    faiss_path = os.path.join(path, FAISS_FILE)
+    if os.path.exists(faiss_path):
+        import faiss
+
+        # Flat indexes need the IFC flag to map their codes rather than read them
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        try:
+            index = faiss.read_index(faiss_path, flags)
+        except RuntimeError:
+            index = faiss.read_index(faiss_path)
+        return FaissIndex(index, chunks), charged + os.path.getsize(faiss_path)
+    embeddings_path = os.path.join(path, EMBEDDINGS_FILE)
+    embeddings = np.load(embeddings_path, mmap_mode="r")
+    return NumpyIndex(embeddings, chunks), charged + os.path.getsize(embeddings_path)
+
+
+class CatalogueRegistry:
+    def __init__(self, root: str, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> None:
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.catalogues: Dict[str, Catalogue] = {}
+        self._routes: List[Tuple[Pattern, str]] = []  # longest alias first
+        self._resident: "OrderedDict[str, _Resident]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.scan()
+
+    def scan(self) -> None:
+        """(Re)discover catalogue directories under ``root``; open indexes stay open."""
+        catalogues: Dict[str, Catalogue] = {}
+        for entry in sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []:
+            path = os.path.join(self.root, entry)
+            if entry.startswith(".") or not os.path.isdir(path):
+                continue
+            info: Dict = {}
+            if os.path.exists(os.path.join(path, CATALOGUE_FILE)):
+                with open(os.path.join(path, CATALOGUE_FILE), "r", encoding="utf-8") as f:
+                    info = json.load(f)
+            aliases = [normalize_question(alias) for alias in info.get("aliases", [])]
+            catalogues[entry] = Catalogue(entry, path, info.get("name", entry), aliases)
+        routes = set()
+        for catalogue in catalogues.values():
+            for alias in (catalogue.id.replace("_", " "), catalogue.name, *catalogue.aliases):
+                if normalize_question(alias):
+                    routes.add((normalize_question(alias), catalogue.id))
+        ordered = sorted(routes, key=lambda route: (-len(route[0]), route[1]))
+        self._routes = [(_alias_pattern(alias), catalogue_id) for alias, catalogue_id in ordered]
+        self.catalogues = catalogues
+        print(f"Catalogue registry: {len(catalogues)} catalogues under {self.root}")
+
+    def __contains__(self, catalogue_id: str) -> bool:
+        return catalogue_id in self.catalogues
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(resident.nbytes for resident in self._resident.values())
+
+    def resident(self) -> List[str]:
+        """Open catalogues, least recently used first."""
+        with self._lock:
+            return list(self._resident)
+
+    def route(self, question: str) -> Optional[str]:
+        """The catalogue whose id, name or alias appears in ``question`` as whole words, longest first."""
+        text = normalize_question(question)
+        for pattern, catalogue_id in self._routes:
+            if pattern.search(text):
+                return catalogue_id
+        return None
+
+    @staticmethod
+    def _published(root: str) -> Tuple[str, int]:
+        """The directory ``root`` publishes and its docstore's mtime: a change means new contents."""
+        path = artifacts.resolve(root)
+        try:
+            return path, os.stat(os.path.join(path, DOCSTORE_FILE)).st_mtime_ns
+        except OSError:
+            return path, 0
+
+    def get(self, catalogue_id: str) -> VectorIndex:
+        """The open index for ``catalogue_id``, loading it (and evicting others) if needed."""
+        catalogue = self.catalogues.get(catalogue_id)
+        if catalogue is None:
+            raise KeyError(f"Unknown catalogue '{catalogue_id}'.")
+        published = self._published(catalogue.root)
+        path = published[0]
+        with self._lock:
+            resident = self._resident.get(catalogue_id)
+            if resident is not None and resident.published == published:
+                self._resident.move_to_end(catalogue_id)
+                record_cache_lookup("catalogue", True)
+                return resident.index
+            loading = self._loading.setdefault(catalogue_id, threading.Lock())
+        record_cache_lookup("catalogue", False)
+        with loading:
+            # Another request may have opened it while this one waited
+            with self._lock:
+                resident = self._resident.get(catalogue_id)
+                if resident is not None and resident.published == published:
+                    self._resident.move_to_end(catalogue_id)
+                    return resident.index
+            started = time.perf_counter()
+            manifest = artifacts.verify(path)
+            index, nbytes = open_index(path)
+            CATALOGUE_LOAD_SECONDS.observe(time.perf_counter() - started)
+            with self._lock:
+                self._resident[catalogue_id] = _Resident(index, nbytes, artifacts.generation(manifest), published)
+                self._resident.move_to_end(catalogue_id)
+                self._evict()
+            return index
+
+    def _evict(self) -> None:
+        total = sum(resident.nbytes for resident in self._resident.values())
+        while total > self.budget_bytes and len(self._resident) > 1:
+            catalogue_id, resident = self._resident.popitem(last=False)
+            total -= resident.nbytes
+            record_catalogue_eviction()
+            print(f"Catalogue '{catalogue_id}' evicted ({resident.nbytes / 1e6:.1f} MB)")
+        set_catalogue_residency(len(self._resident), total)
+
+    def close(self, catalogue_id: str) -> None:
+        with self._lock:
+            self._resident.pop(catalogue_id, None)
+            self._evict()
+
+
+def registry_from_env() -> Optional[CatalogueRegistry]:
+    root = os.getenv("CATALOGUE_ROOT")
+    if not root:
+        return None
+    return CatalogueRegistry(root, int(float(os.getenv("CATALOGUE_MEMORY_MB", "512")) * 1024 * 1024))
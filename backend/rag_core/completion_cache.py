@@ -0,0 +1,252 @@
+"""
+Disk-persistent cache of LLM completions.
+
+The prompt is fully determined by the question and the retrieved context, so
+an answer paid for once stays valid until the index changes. Without a
+persistent cache, every deploy or worker restart pays the LLM again for
+answers it already had. ``CompletionCache`` keeps them in a SQLite file:
+
+- Keys are a hash of the generator's model name and the full prompt
+  (``completion_key``).
+- Entries are tagged with the index generation they were generated against,
+  and with the sources (fund page URLs) of the context chunks and their
+  per-source digests from the manifest (``artifacts.source_digests``).
+  ``refresh`` (called after every index load) deletes only the entries that
+  depend on a source whose digest changed, and moves the rest to the new
+  generation. Without per-source digests, every entry from another
+  generation is deleted. Lookups only match the current generation.
+- When the stored answers exceed ``max_bytes``, the least recently used
+  entries are deleted until they fit again. The total is summed on every
+  write anyway, so ``nbytes`` reports the size as of this process's last
+  write or refresh instead of querying SQLite on each metrics scrape. Recency is updated at most once a
+  minute per entry, so hits rarely write.
+- The file is opened in WAL mode with a busy timeout, so several worker
+  processes can share it. Each process (and each fork) opens its own
+  connection.
+
+A cache error is logged and treated as a miss; it never fails a query.
+Lookups are counted in ``mf_cache_lookups_total{cache="completion"}`` and
+refreshes in ``mf_cache_refresh_entries_total{cache="completion"}``.
+
+Configured with ``COMPLETION_CACHE_ENABLED``, ``COMPLETION_CACHE_PATH`` and
+``COMPLETION_CACHE_MAX_MB``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .telemetry import record_cache_refresh
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+TOUCH_INTERVAL_SECONDS = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    generation TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_used_at ON completions (used_at);
+CREATE TABLE IF NOT EXISTS completion_sources (
+    key TEXT NOT NULL,
+    source TEXT NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completion_sources_key ON completion_sources (key);
+"""
+
+
+def completion_key(model_name: str, prompt: str) -> str:
+    return hashlib.blake2b(f"{model_name}\0{prompt}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+@contextmanager
+def _transaction(db: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Write transaction taking the database lock up front, so workers queue on the busy timeout."""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+
+class CompletionCache:
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.generation = ""
+        self.sources: Dict[str, str] = {}  # source -> digest in the loaded index
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._nbytes: Optional[int] = None  # as of this process's last write
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def __len__(self) -> int:
+        with self._lock:
+            try:
+                return self._db().execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"Completion cache unavailable: {e}")
+                return 0
+
+    @property
+    def nbytes(self) -> int:
+        """Stored answer bytes; only the first call (before any write) queries the file."""
+        with self._lock:
+            if self._nbytes is not None:
+                return self._nbytes
+            try:
+                self._nbytes = self._total(self._db())
+            except sqlite3.Error as e:
+                print(f"Completion cache unavailable: {e}")
+                return 0
+            return self._nbytes
+
+    @staticmethod
+    def _total(db: sqlite3.Connection) -> int:
+        return db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    def refresh(self, generation: Optional[str], sources: Optional[Dict[str, str]] = None) -> Tuple[int, int]:
+        """
+        Switch to ``generation``. Entries from other generations survive when
+        every source they were built from still has the same digest in
+        ``sources``; the rest are deleted. Returns (preserved, invalidated).
+        """
+        self.generation = generation or ""
+        self.sources = dict(sources or {})
+        with self._lock:
+            try:
+                with _transaction(self._db()) as db:
+                    stale = db.execute(
+                        "SELECT COUNT(*) FROM completions WHERE generation != ?", (self.generation,)
+                    ).fetchone()[0]
+                    if sources is None:
+                        db.execute("DELETE FROM completions WHERE generation != ?", (self.generation,))
+                    else:
+                        db.execute("CREATE TEMP TABLE IF NOT EXISTS current_sources (source TEXT PRIMARY KEY, digest TEXT)")
+                        db.execute("DELETE FROM current_sources")
+                        db.executemany("INSERT INTO current_sources VALUES (?, ?)", self.sources.items())
+                        db.execute(
+                            """
+                            DELETE FROM completions WHERE generation != ? AND (
+                                key NOT IN (SELECT key FROM completion_sources)
+                                OR key IN (
+                                    SELECT tag.key FROM completion_sources AS tag
+                                    LEFT JOIN current_sources AS loaded ON loaded.source = tag.source
+                                    WHERE loaded.digest IS NULL OR loaded.digest != tag.digest
+                                )
+                            )
+                            """,
+                            (self.generation,),
+                        )
+                    preserved = db.execute(
+                        "UPDATE completions SET generation = ? WHERE generation != ?", (self.generation, self.generation)
+                    ).rowcount
+                    db.execute("DELETE FROM completion_sources WHERE key NOT IN (SELECT key FROM completions)")
+                    self._nbytes = self._total(db)
+            except sqlite3.Error as e:
+                self._nbytes = None  # the transaction rolled back; sum again when asked
+                print(f"Completion cache refresh failed: {e}")
+                return 0, 0
+        record_cache_refresh("completion", preserved, stale - preserved)
+        return preserved, stale - preserved
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                row = db.execute(
+                    "SELECT answer, used_at FROM completions WHERE key = ? AND generation = ?",
+                    (key, self.generation),
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > TOUCH_INTERVAL_SECONDS:
+                    db.execute("UPDATE completions SET used_at = ? WHERE key = ?", (now, key))
+                return row[0]
+            except sqlite3.Error as e:
+                print(f"Completion cache lookup failed: {e}")
+                return None
+
+    def put(self, key: str, answer: str, sources: Iterable[str] = ()) -> None:
+        """Store ``answer``, tagged with the sources of the context it was generated from."""
+        size = len(key) + len(answer.encode("utf-8"))
+        tags = [(key, source, self.sources.get(source, "")) for source in set(sources)]
+        with self._lock:
+            try:
+                with _transaction(self._db()) as db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO completions (key, generation, answer, size, used_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, self.generation, answer, size, time.time()),
+                    )
+                    db.execute("DELETE FROM completion_sources WHERE key = ?", (key,))
+                    db.executemany("INSERT INTO completion_sources (key, source, digest) VALUES (?, ?, ?)", tags)
+                    self._nbytes = self._evict(db)
+            except sqlite3.Error as e:
+                self._nbytes = None  # the transaction rolled back; sum again when asked
+                print(f"Completion cache write failed: {e}")
+
+    def _evict(self, db: sqlite3.Connection) -> int:
+        """Delete least recently used entries if over budget; returns the bytes left."""
+        total = self._total(db)
+        if total <= self.max_bytes:
+            return total
+        # Keep the most recently used entries that fit in 90% of the budget
+        db.execute(
+            """
+            DELETE FROM completions WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY used_at DESC, key) AS kept FROM completions
+                ) WHERE kept > ?
+            )
+            """,
+            (int(self.max_bytes * 0.9),),
+        )
+        db.execute("DELETE FROM completion_sources WHERE key NOT IN (SELECT key FROM completions)")
+        return self._total(db)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+def default_cache_path() -> str:
+    if os.getenv("VERCEL"):
+        return os.path.join(tempfile.gettempdir(), "completion_cache.sqlite")
+    return "./data/completion_cache.sqlite"
+
+
+def completion_cache_from_env() -> Optional[CompletionCache]:
+    if os.getenv("COMPLETION_CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    return CompletionCache(
+        os.getenv("COMPLETION_CACHE_PATH") or default_cache_path(),
+        max_bytes=int(float(os.getenv("COMPLETION_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    )
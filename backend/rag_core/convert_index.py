@@ -0,0 +1,42 @@
+"""
+Convert a LangChain FAISS store to the native serving format.
+
+LangChain's ``save_local`` writes ``index.faiss`` plus a pickled docstore
+(``index.pkl``) that can only be read with LangChain installed. This writes the
+same chunks to ``docstore.json`` so the API can serve with ``faiss`` alone.
+
+Usage (from the backend directory):
+    python -m rag_core.convert_index ./data/faiss_index
+"""
+
+import argparse
+import os
+import pickle
+
+from .indexes import FAISS_FILE, chunks_from_langchain, write_docstore
+
+
+def convert(path: str) -> int:
+    """Write ``docstore.json`` for the LangChain store at ``path``; returns the chunk count."""
+    import faiss
+
+    with open(os.path.join(path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    chunks = chunks_from_langchain(docstore, index_to_docstore_id)
+    ntotal = faiss.read_index(os.path.join(path, FAISS_FILE)).ntotal
+    if ntotal != len(chunks):
+        raise ValueError(f"index.faiss has {ntotal} vectors but the docstore has {len(chunks)} entries.")
+    write_docstore(path, chunks)
+    return len(chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default=os.getenv("VECTOR_STORE_PATH", "./data/faiss_index"))
+    args = parser.parse_args()
+    count = convert(args.path)
+    print(f"Wrote {count} chunks to {os.path.join(args.path, 'docstore.json')}")
+
+
+if __name__ == "__main__":
+    main()
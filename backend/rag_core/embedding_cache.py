@@ -0,0 +1,121 @@
+"""
+Bounded cache of normalized question -> query embedding.
+
+Vectors live in one preallocated ``float32`` matrix used as a ring buffer; a
+dict maps each key to its row. Eviction is CLOCK (second chance): a hand
+sweeps the ring, clearing reference bits, and reuses the first row that was
+not read since the last sweep. This is an O(1) approximation of LRU that
+needs no per-entry numpy objects and no reordering on hits.
+
+Caches are registered per encoder model name, so every engine and index
+backend using the same model shares one cache. A caller asking for more
+capacity than the shared cache has grows it in place, keeping its entries,
+so the cache holds as many entries as its largest user asked for. Because
+entries depend only on the encoder, they survive index reloads.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_CAPACITY = 4096
+
+
+def normalize_question(question: str) -> str:
+    """Cache key and encoder input: lowercased with whitespace collapsed."""
+    return " ".join(question.lower().split())
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, dimension: int, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.model_name = model_name
+        self.dimension = dimension
+        self.capacity = capacity
+        self._vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self._keys: List[Optional[str]] = [None] * capacity
+        self._referenced = np.zeros(capacity, dtype=bool)
+        self._index: Dict[str, int] = {}
+        self._hand = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def nbytes(self) -> int:
+        return self._vectors.nbytes + self._referenced.nbytes
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                return None
+            self._referenced[slot] = True
+            return self._vectors[slot].copy()
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                slot = self._next_slot()
+                self._index[key] = slot
+                self._keys[slot] = key
+            self._vectors[slot] = vector
+            self._referenced[slot] = False
+
+    def grow(self, capacity: int) -> None:
+        """Make room for ``capacity`` entries; cached vectors keep their rows."""
+        with self._lock:
+            extra = capacity - self.capacity
+            if extra <= 0:
+                return
+            self._vectors = np.concatenate([self._vectors, np.zeros((extra, self.dimension), dtype=np.float32)])
+            self._referenced = np.concatenate([self._referenced, np.zeros(extra, dtype=bool)])
+            self._keys.extend([None] * extra)
+            self._hand = self.capacity  # fill the new rows before evicting anything
+            self.capacity = capacity
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index.clear()
+            self._keys = [None] * self.capacity
+            self._referenced[:] = False
+            self._hand = 0
+
+    def _next_slot(self) -> int:
+        while True:
+            slot = self._hand
+            self._hand = (self._hand + 1) % self.capacity
+            if self._keys[slot] is None:
+                return slot
+            if self._referenced[slot]:
+                self._referenced[slot] = False
+                continue
+            del self._index[self._keys[slot]]
+            self._keys[slot] = None
+            return slot
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str, dimension: int, capacity: int = DEFAULT_CAPACITY) -> EmbeddingCache:
+    """The process-wide cache for ``model_name``, created on first use and grown to at least ``capacity``."""
+    with _registry_lock:
+        cache = _caches.get(model_name)
+        if cache is None or cache.dimension != dimension:
+            cache = EmbeddingCache(model_name, dimension, capacity)
+            _caches[model_name] = cache
+        elif cache.capacity < capacity:
+            cache.grow(capacity)
+        return cache
+
+
+def registered_caches() -> Dict[str, EmbeddingCache]:
+    return dict(_caches)
@@ -0,0 +1,270 @@
+"""
+Dedicated encoder processes pinned to CPU cores.
+
+With several uvicorn workers each torch encoder defaults to using every core,
+so the workers oversubscribe the CPU and tail latency explodes. Instead, run a
+fixed pool of encoder processes, each pinned to its own core subset with a
+matching ``torch.set_num_threads``:
+
+    python -m rag_core.encoder_pool serve --workers 4 --cores-per-worker 2
+
+and point every API worker at it:
+
+    EMBEDDING_MODEL=pool:/tmp/mf-encoder.sock
+
+All pool processes block in ``accept()`` on one listening Unix socket, so the
+kernel's accept queue is the shared work queue: each request goes to whichever
+encoder process is idle. Requests are length-prefixed JSON; replies carry a
+JSON header followed by the raw ``float32`` matrix.
+
+``serve`` checks the processes every second and replaces any that died
+(an out-of-memory kill, a crash in the model), pinned to the same cores.
+The pool needs Unix sockets and ``fork``, so it runs on Linux and macOS
+only. Where the process affinity API is missing (macOS), every CPU counts
+as available and workers are not pinned, only thread-capped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .encoders import LangChainCompatMixin, load_encoder
+
+DEFAULT_SOCKET = "/tmp/mf-encoder.sock"
+_LENGTH = struct.Struct("!I")
+
+
+def _recv_exactly(conn: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = conn.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Encoder pool connection closed mid-message.")
+        received += count
+    return buffer
+
+
+def _send_message(conn: socket.socket, header: Dict, payload: bytes = b"") -> None:
+    encoded = json.dumps(header).encode("utf-8")
+    conn.sendall(_LENGTH.pack(len(encoded)) + encoded + payload)
+
+
+def _recv_header(conn: socket.socket) -> Dict:
+    (length,) = _LENGTH.unpack(_recv_exactly(conn, _LENGTH.size))
+    return json.loads(bytes(_recv_exactly(conn, length)))
+
+
+def core_layout(workers: int, cores_per_worker: int, available: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """Split the CPUs this process may use into ``workers`` disjoint subsets."""
+    cpus = sorted(available if available is not None else _available_cpus())
+    if workers * cores_per_worker > len(cpus):
+        raise ValueError(
+            f"{workers} workers x {cores_per_worker} cores needs {workers * cores_per_worker} CPUs, "
+            f"only {len(cpus)} available."
+        )
+    return [cpus[i * cores_per_worker : (i + 1) * cores_per_worker] for i in range(workers)]
+
+
+def _available_cpus() -> Sequence[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return os.sched_getaffinity(0)
+    return range(os.cpu_count() or 1)
+
+
+def _pin(cores: Sequence[int]) -> None:
+    """Pin this process (where the OS allows it) and cap math-library threads to the assigned cores."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(cores))
+    threads = str(len(cores))
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "ONNX_INTRA_OP_THREADS"):
+        os.environ[variable] = threads
+    try:
+        import torch
+
+        torch.set_num_threads(len(cores))
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+
+def _serve_worker(listener: socket.socket, model_name: str, cores: Sequence[int]) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)  # replacements fork from a parent that handles it
+    _pin(cores)
+    encoder = load_encoder(model_name)
+    encoder.encode(["warm up"])
+    info = {"ok": True, "model_name": encoder.model_name, "dim": encoder.dimension, "pid": os.getpid()}
+
+    while True:
+        conn, _ = listener.accept()
+        with conn:
+            try:
+                request = _recv_header(conn)
+                if request.get("op") == "info":
+                    _send_message(conn, info)
+                    continue
+                vectors = np.ascontiguousarray(encoder.encode(request["texts"]), dtype=np.float32)
+                _send_message(conn, {"ok": True, "rows": vectors.shape[0], "dim": vectors.shape[1]}, vectors.tobytes())
+            except Exception as exc:
+                try:
+                    _send_message(conn, {"ok": False, "error": str(exc)})
+                except OSError:
+                    pass
+
+
+class EncoderPool:
+    """Owns the listening socket and the pinned encoder processes."""
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        cores_per_worker: int = 1,
+        socket_path: str = DEFAULT_SOCKET,
+    ) -> None:
+        self.model_name = model_name
+        self.socket_path = socket_path
+        self.layout = core_layout(workers, cores_per_worker)
+        self._listener: Optional[socket.socket] = None
+        self._processes: List[multiprocessing.Process] = []
+
+    def start(self) -> "EncoderPool":
+        if not hasattr(socket, "AF_UNIX") or "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("The encoder pool needs Unix sockets and fork (Linux or macOS).")
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._listener.listen(1024)
+        self._processes = [self._spawn(cores) for cores in self.layout]
+        return self
+
+    def _spawn(self, cores: Sequence[int]) -> multiprocessing.Process:
+        # fork keeps the listening socket shared; the parent never imports torch.
+        process = multiprocessing.get_context("fork").Process(
+            target=_serve_worker, args=(self._listener, self.model_name, cores), daemon=True
+        )
+        process.start()
+        return process
+
+    def replace_dead(self) -> int:
+        """Start a new process, on the same cores, for every one that exited. Returns how many."""
+        replaced = 0
+        for number, (process, cores) in enumerate(zip(self._processes, self.layout)):
+            if process.is_alive():
+                continue
+            print(f"Encoder process {process.pid} on cores {list(cores)} exited ({process.exitcode}); restarting it")
+            process.join()
+            self._processes[number] = self._spawn(cores)
+            replaced += 1
+        return replaced
+
+    def wait_ready(self, timeout: float = 300.0) -> Dict:
+        return RemoteEncoder(self.socket_path, connect_timeout=timeout).info
+
+    def stop(self) -> None:
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join(timeout=10)
+        self._processes = []
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "EncoderPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class RemoteEncoder(LangChainCompatMixin):
+    """Encoder backend that forwards ``encode`` calls to an ``EncoderPool``."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, connect_timeout: float = 30.0, timeout: float = 30.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.info = self._request_info(connect_timeout)
+        self.model_name = self.info["model_name"]
+        self._dimension = int(self.info["dim"])
+
+    @classmethod
+    def from_name(cls, name: str) -> "RemoteEncoder":
+        return cls(name or DEFAULT_SOCKET)
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _connect(self) -> socket.socket:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(self.timeout)
+        conn.connect(self.socket_path)
+        return conn
+
+    def _request_info(self, connect_timeout: float) -> Dict:
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            try:
+                with self._connect() as conn:
+                    _send_message(conn, {"op": "info"})
+                    return _recv_header(conn)
+            except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        with self._connect() as conn:
+            _send_message(conn, {"op": "encode", "texts": list(texts)})
+            header = _recv_header(conn)
+            if not header.get("ok"):
+                raise RuntimeError(f"Encoder pool error: {header.get('error')}")
+            rows, dim = header["rows"], header["dim"]
+            body = _recv_exactly(conn, rows * dim * 4)
+        return np.frombuffer(body, dtype=np.float32).reshape(rows, dim)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Run the encoder pool until interrupted")
+    serve.add_argument("--model", default=os.getenv("ENCODER_POOL_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    serve.add_argument("--workers", type=int, default=int(os.getenv("ENCODER_POOL_WORKERS", "2")))
+    serve.add_argument("--cores-per-worker", type=int, default=int(os.getenv("ENCODER_POOL_CORES_PER_WORKER", "1")))
+    serve.add_argument("--socket", default=os.getenv("ENCODER_POOL_SOCKET", DEFAULT_SOCKET))
+    args = parser.parse_args()
+
+    pool = EncoderPool(args.model, args.workers, args.cores_per_worker, args.socket).start()
+    # Installed after forking; workers reset SIGTERM, so they still die on terminate().
+    stopping = threading.Event()
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(stop_signal, lambda *_: stopping.set())
+    try:
+        info = pool.wait_ready()
+        print(f"Encoder pool ready on {args.socket}: {args.workers} x {args.cores_per_worker} cores, model {info['model_name']}")
+        while not stopping.wait(1.0):
+            pool.replace_dead()
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Query/document encoder backends.
+
+Every encoder returns L2-normalized ``float32`` matrices of shape
+``(len(texts), dimension)``. They also expose ``embed_query`` /
+``embed_documents`` so they can stand in for a LangChain ``Embeddings`` object.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Protocol, Sequence
+
+import numpy as np
+
+
+class Encoder(Protocol):
+    model_name: str
+
+    @property
+    def dimension(self) -> int: ...
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray: ...
+
+
+class LangChainCompatMixin:
+    """LangChain ``Embeddings`` duck-typing on top of ``encode``."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+class SentenceTransformerEncoder(LangChainCompatMixin):
+    """PyTorch sentence-transformers model on CPU (the default backend)."""
+
+    def __init__(self, model_name: str, device: str = "cpu", batch_size: int = 32) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = SentenceTransformer(model_name, device=device)
+
+    @property
+    def dimension(self) -> int:
+        return self._model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+EncoderFactory = Callable[[str], Encoder]
+
+
+def _onnx_encoder(name: str) -> Encoder:
+    from .onnx_encoder import OnnxEncoder
+
+    return OnnxEncoder.from_name(name)
+
+
+def _pool_encoder(socket_path: str) -> Encoder:
+    from .encoder_pool import RemoteEncoder
+
+    return RemoteEncoder.from_name(socket_path)
+
+
+# Model-name prefix -> factory. The empty prefix is the fallback.
+_ENCODER_FACTORIES: Dict[str, EncoderFactory] = {
+    "": SentenceTransformerEncoder,
+    "onnx:": _onnx_encoder,
+    "pool:": _pool_encoder,
+}
+
+
+def register_encoder(prefix: str, factory: EncoderFactory) -> None:
+    """
+    Route model names starting with ``prefix`` (e.g. ``"onnx:"``) to ``factory``.
+    The factory receives the model name with the prefix stripped.
+    """
+    _ENCODER_FACTORIES[prefix] = factory
+
+
+def registered_encoders() -> Dict[str, EncoderFactory]:
+    """A copy of the prefix -> factory table, e.g. to register the same factories in a spawned worker."""
+    return dict(_ENCODER_FACTORIES)
+
+
+def load_encoder(model_name: str) -> Encoder:
+    """Build the encoder backend selected by ``model_name``."""
+    for prefix in sorted(_ENCODER_FACTORIES, key=len, reverse=True):
+        if prefix and model_name.startswith(prefix):
+            return _ENCODER_FACTORIES[prefix](model_name[len(prefix):])
+    return _ENCODER_FACTORIES[""](model_name)
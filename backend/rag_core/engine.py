@@ -0,0 +1,165 @@
+"""
+Retrieval/answer engine shared by every API entry point.
+
+``RagEngine`` wires an encoder, a vector index and a generator together:
+encode the question, search the index, assemble context from the top hits and
+generate an answer, falling back to a local generator when the primary one is
+missing or fails. With a ``QualityGovernor``, requests are moved to the
+cheaper ``degraded`` generators while the primary one is under load. Each step
+is timed through ``rag_core.telemetry``. Query embeddings are cached per
+encoder model (see ``rag_core.embedding_cache``), and LLM completions per
+prompt (see ``rag_core.completion_cache``).
+"""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from .embedding_cache import DEFAULT_CAPACITY, EmbeddingCache, get_embedding_cache, normalize_question
+from .completion_cache import CompletionCache, completion_key
+from .encoders import Encoder
+from .generators import Generator, RuleBasedGenerator, build_prompt
+from .indexes import Hit, VectorIndex
+from .quality import QualityGovernor
+from .rerank import Reranker
+from .telemetry import record_answer_tier, record_cache_lookup, record_fallback, set_index_size, stage
+
+
+@dataclass
+class Answer:
+    text: str
+    hits: List[Hit] = field(default_factory=list)
+    generator: str = ""
+
+
+class RagEngine:
+    def __init__(
+        self,
+        encoder: Encoder,
+        index: Optional[VectorIndex] = None,
+        generator: Optional[Generator] = None,
+        fallback: Optional[Generator] = None,
+        context_size: int = 3,
+        index_name: str = "default",
+        embedding_cache_size: int = DEFAULT_CAPACITY,
+        reranker: Optional[Reranker] = None,
+        degraded: Sequence[Generator] = (),
+        governor: Optional[QualityGovernor] = None,
+        completion_cache: Optional[CompletionCache] = None,
+    ) -> None:
+        self.encoder = encoder
+        self.reranker = reranker
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if embedding_cache_size > 0:
+            self.embedding_cache = get_embedding_cache(encoder.model_name, encoder.dimension, embedding_cache_size)
+        self.generator = generator
+        self.fallback = fallback or RuleBasedGenerator()
+        self.degraded = list(degraded)
+        self.governor = governor
+        self.completion_cache = completion_cache
+        self.context_size = context_size
+        self.index_name = index_name
+        self.index: Optional[VectorIndex] = None
+        if index is not None:
+            self.set_index(index)
+
+    def set_index(self, index: VectorIndex) -> None:
+        """Swap in a (re)loaded index; in-flight searches keep the old one."""
+        self.index = index
+        set_index_size(self.index_name, len(index))
+
+    @property
+    def is_ready(self) -> bool:
+        return self.index is not None
+
+    def embed(self, question: str):
+        if self.embedding_cache is None:
+            with stage("embed"):
+                return self.encoder.encode([question])[0]
+
+        key = normalize_question(question)
+        vector = self.embedding_cache.get(key)
+        record_cache_lookup("embedding", vector is not None)
+        if vector is None:
+            with stage("embed"):
+                vector = self.encoder.encode([key])[0]
+            self.embedding_cache.put(key, vector)
+        return vector
+
+    def search(self, vector, k: int, index: Optional[VectorIndex] = None) -> List[Hit]:
+        """Search ``index``, by default the engine's own (catalogue indexes are passed in)."""
+        index = index if index is not None else self.index
+        if index is None:
+            raise RuntimeError("Vector index is not loaded.")
+        with stage("search"):
+            return index.search(vector, k)
+
+    def candidate_count(self, k: int) -> int:
+        """How many hits to fetch so the reranker (if any) can pick the best ``k``."""
+        return max(k, self.reranker.candidates) if self.reranker is not None else k
+
+    def rerank(self, question: str, hits: List[Hit], k: int) -> List[Hit]:
+        if self.reranker is None:
+            return hits[:k]
+        with stage("rerank"):
+            return self.reranker.rerank(question, hits, k)
+
+    def retrieve(self, question: str, k: int, index: Optional[VectorIndex] = None) -> List[Hit]:
+        return self.rerank(question, self.search(self.embed(question), self.candidate_count(k), index), k)
+
+    def build_context(self, hits: List[Hit]) -> str:
+        with stage("context"):
+            return "\n\n".join(hit.chunk.text.strip() for hit in hits[: self.context_size])
+
+    def context_sources(self, hits: List[Hit]) -> List[str]:
+        """Sources of the chunks ``build_context`` uses; answers depend on these only."""
+        return sorted({hit.chunk.source for hit in hits[: self.context_size]})
+
+    def _local(self, generator: Generator, question: str, context: str, hits: List[Hit]) -> Answer:
+        with stage(generator.stage):
+            text = generator.generate(question, context)
+        record_answer_tier(generator.name)
+        return Answer(text, hits, generator.name)
+
+    def _completion_key(self, question: str, context: str) -> Optional[str]:
+        if self.completion_cache is None or self.generator is None:
+            return None
+        model_name = getattr(self.generator, "model_name", self.generator.name)
+        return completion_key(model_name, build_prompt(question, context))
+
+    def generate(self, question: str, hits: List[Hit]) -> Answer:
+        context = self.build_context(hits)
+        if self.generator is not None:
+            key = self._completion_key(question, context)
+            if key is not None:
+                text = self.completion_cache.get(key)
+                record_cache_lookup("completion", text is not None)
+                if text is not None:
+                    record_answer_tier(self.generator.name)
+                    return Answer(text, hits, self.generator.name)
+            tier = self.governor.choose() if self.governor is not None and self.degraded else 0
+            if tier:
+                # Deliberate degradation under LLM load; see rag_core.quality
+                return self._local(self.degraded[min(tier, len(self.degraded)) - 1], question, context, hits)
+            try:
+                with stage(self.generator.stage), (self.governor.track() if self.governor else nullcontext()):
+                    text = self.generator.generate(question, context)
+                if key is not None:
+                    self.completion_cache.put(key, text, self.context_sources(hits))
+                record_answer_tier(self.generator.name)
+                return Answer(text, hits, self.generator.name)
+            except Exception as e:
+                print(f"Error calling {self.generator.name} generator: {e}")
+                record_fallback("llm_error")
+        else:
+            record_fallback("llm_unavailable")
+
+        return self._local(self.fallback, question, context, hits)
+
+    def answer(self, question: str, k: int) -> Answer:
+        hits = self.retrieve(question, k)
+        if not hits:
+            return Answer("", [], "")
+        return self.generate(question, hits)
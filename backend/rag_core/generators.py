@@ -0,0 +1,149 @@
+"""
+Answer generator backends.
+
+A generator turns a question and the assembled context into answer text.
+``GeminiGenerator`` calls the LLM; ``RuleBasedGenerator`` and
+``ExtractiveGenerator`` are cheap local fallbacks.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional, Protocol
+
+from .text import curated_sentence_split
+
+DISCLAIMER = "Facts-only. No investment advice."
+
+PROMPT_TEMPLATE = """You are a facts-only assistant for mutual fund information. Answer the user's question based ONLY on the provided context from official Nippon India Mutual Fund sources.
+
+Rules:
+- Answer in maximum 3 sentences
+- Be concise and factual
+- Only use information from the context provided
+- If the answer is not in the context, say so
+- Always end your answer with: "Facts-only. No investment advice."
+- Do not provide investment recommendations or opinions
+
+Context from official sources:
+{context}
+
+Question: {question}
+
+Answer:"""
+
+
+class Generator(Protocol):
+    name: str
+    stage: str  # telemetry stage the generation time is attributed to
+
+    def generate(self, question: str, context: str) -> str: ...
+
+
+def build_prompt(question: str, context: str) -> str:
+    return PROMPT_TEMPLATE.format(context=context, question=question)
+
+
+def ensure_disclaimer(answer: str) -> str:
+    if DISCLAIMER not in answer:
+        answer += f" {DISCLAIMER}"
+    return answer
+
+
+class GeminiGenerator:
+    """Google Gemini (free tier ``gemini-1.5-flash`` by default)."""
+
+    name = "llm"
+    stage = "llm"
+
+    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash") -> None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate(self, question: str, context: str) -> str:
+        response = self._model.generate_content(build_prompt(question, context))
+        return ensure_disclaimer(response.text.strip())
+
+
+def gemini_from_env(api_key: Optional[str]) -> Optional[GeminiGenerator]:
+    """Build the Gemini generator, or return ``None`` when no key is configured."""
+    if not api_key:
+        print("Warning: GEMINI_API_KEY not set. Will use fallback answer generation.")
+        return None
+    generator = GeminiGenerator(api_key)
+    print("Gemini LLM initialized successfully")
+    return generator
+
+
+class RuleBasedGenerator:
+    """Regex extraction of the handful of facts the assistant is asked about most."""
+
+    name = "rules"
+    stage = "fallback"
+
+    def generate(self, question: str, content: str) -> str:
+        question_lower = question.lower()
+
+        # Try to extract specific facts
+        if "expense ratio" in question_lower:
+            ratio_match = re.search(r"expense.*?ratio.*?(\d+\.?\d*)\s*%", content, re.IGNORECASE)
+            if ratio_match:
+                return f"The expense ratio is {ratio_match.group(1)}%. This information is sourced from the official Nippon India Mutual Fund website. Facts-only. No investment advice."
+
+        if "exit load" in question_lower:
+            if "exit load" in content.lower() or "redemption" in content.lower():
+                load_match = re.search(r"exit load.*?(\d+\.?\d*)\s*%", content, re.IGNORECASE)
+                if load_match:
+                    return f"The exit load is {load_match.group(1)}% if redeemed within the specified period. Details are available on the official fund page. Facts-only. No investment advice."
+                return "Exit load details are available on the official fund page. Please refer to the load structure section. Facts-only. No investment advice."
+
+        if "minimum" in question_lower and ("sip" in question_lower or "investment" in question_lower):
+            min_match = re.search(r"minimum.*?(\d+[,\d]*\.?\d*)", content, re.IGNORECASE)
+            if min_match:
+                amount = min_match.group(1).replace(",", "")
+                return f"The minimum investment amount is ₹{amount} and in multiples of Re. 1 thereafter. This information is from the official fund documentation. Facts-only. No investment advice."
+
+        if "lock" in question_lower and "in" in question_lower:
+            lock_match = re.search(r"lock.?in.*?(\d+)\s*(year|month)", content, re.IGNORECASE)
+            if lock_match:
+                return f"The lock-in period is {lock_match.group(1)} {lock_match.group(2)}s for ELSS schemes. This is a regulatory requirement. Facts-only. No investment advice."
+
+        if "riskometer" in question_lower or "risk" in question_lower:
+            return "The riskometer indicates the risk level of the fund. Please refer to the official fund page for the current riskometer rating. Facts-only. No investment advice."
+
+        if "benchmark" in question_lower:
+            bench_match = re.search(r"benchmark.*?([A-Z][A-Z\s]+(?:TRI|Index))", content, re.IGNORECASE)
+            if bench_match:
+                return f"The benchmark is {bench_match.group(1)}. This information is available on the official fund factsheet. Facts-only. No investment advice."
+
+        if "download" in question_lower or "statement" in question_lower:
+            return "You can download statements and factsheets from the 'Downloads' section on the official Nippon India Mutual Fund website. Log in to your account or visit the fund page for access. Facts-only. No investment advice."
+
+        # Generic answer from content
+        sentences = content.split(".")[:3]
+        answer = ". ".join(s.strip() for s in sentences if s.strip())
+        if answer:
+            answer += ". Facts-only. No investment advice."
+        else:
+            answer = "I found relevant information, but please refer to the official fund page for complete details. Facts-only. No investment advice."
+
+        return answer
+
+
+class ExtractiveGenerator:
+    """The first few cleaned sentences of the context."""
+
+    name = "extractive"
+    stage = "extractive"  # its own stage, so a degraded tier shows up in Server-Timing
+
+    def __init__(self, max_sentences: int = 3, disclaimer: bool = False) -> None:
+        self.max_sentences = max_sentences
+        self.disclaimer = disclaimer
+
+    def generate(self, question: str, context: str) -> str:
+        sentences = curated_sentence_split(context)
+        answer = " ".join(sentences[: self.max_sentences])
+        return ensure_disclaimer(answer) if self.disclaimer else answer
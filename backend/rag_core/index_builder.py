@@ -0,0 +1,402 @@
+"""
+Parallel, resumable FAISS index build for large corpora.
+
+Chunks are read from a JSONL file (one ``Chunk`` per line, see
+``write_chunks_jsonl``) in fixed-size batches. Each batch is embedded in a
+process pool, and every worker loads the encoder once with its math-library
+threads capped. The batch is written to ``<out>/.build/batches`` as a
+``.npy`` file. Batches are then added to ``IndexFlatIP`` shards in parallel,
+one process per shard. Finally the shards are either merged into a single
+``index.faiss`` (``merge_from``) or kept as ``shards/*.faiss`` plus
+``shards.json``; ``FaissIndex.load`` serves the latter through
+``faiss.IndexShards``.
+
+At most ``2 * workers`` batches are in flight and vectors only exist on disk
+between stages, so memory stays bounded by the final index. Progress (rate
+and ETA) is printed per stage. Every batch and shard file is written to a
+temporary name and renamed into place. A rerun after a crash therefore skips
+finished work, as long as the input content, model and batch/shard sizes are
+unchanged. The CLI publishes the result as a new ``rag_core.artifacts``
+version of ``out``.
+
+Worker processes are started with ``fork`` only from a single-threaded
+parent that has not imported torch; forking a server (event loop,
+executor threads, torch's thread pools) can hand a child a lock that no
+thread will ever release. Otherwise ``forkserver`` is used where it exists
+and ``spawn`` elsewhere (Windows), and encoders registered with
+``register_encoder`` are re-registered in each worker.
+``INGEST_START_METHOD`` overrides the choice. Servers run a reindex with
+``run_ingestion_process``, in a fresh process, so that its build can fork.
+
+Usage (from the backend directory):
+    python -m rag_core.index_builder chunks.jsonl ./data/faiss_index --workers 8 --shard-size 250000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .artifacts import index_metadata, new_version, source_digests
+from .encoders import EncoderFactory, load_encoder, register_encoder, registered_encoders
+from .indexes import FAISS_FILE, SHARD_DIR, SHARDS_FILE, Chunk, write_docstore
+
+BUILD_DIR = ".build"
+PLAN_FILE = "plan.json"
+
+
+def write_chunks_jsonl(chunks: Iterable[Chunk], path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps(asdict(chunk), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def iter_chunks_jsonl(path: str) -> Iterator[Chunk]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield Chunk(**json.loads(line))
+
+
+def _iter_batches(path: str, batch_size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for chunk in iter_chunks_jsonl(path):
+        batch.append(chunk.text)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _scan(path: str) -> Tuple[int, str]:
+    """Chunk count and content digest of a JSONL file, in one pass."""
+    digest = hashlib.blake2b(digest_size=16)
+    total = 0
+    with open(path, "rb") as f:
+        for line in f:
+            digest.update(line)
+            total += bool(line.strip())
+    return total, digest.hexdigest()
+
+
+def _replace_atomically(tmp_path: str, path: str) -> None:
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _save_npy(path: str, array: np.ndarray) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    _replace_atomically(tmp_path, path)
+
+
+class Progress:
+    """Prints ``done/total``, rate and ETA for one stage at most every ``interval`` seconds."""
+
+    def __init__(self, stage: str, total: int, done: int = 0, interval: float = 5.0) -> None:
+        self.stage = stage
+        self.total = total
+        self.done = done
+        self.interval = interval
+        self._resumed = done
+        self._started = self._last = time.monotonic()
+
+    def update(self, count: int) -> None:
+        self.done += count
+        now = time.monotonic()
+        if now - self._last >= self.interval or self.done >= self.total:
+            self._last = now
+            rate = (self.done - self._resumed) / max(now - self._started, 1e-9)
+            eta = (self.total - self.done) / rate if rate else 0.0
+            print(
+                f"[{self.stage}] {self.done}/{self.total} ({self.done / max(self.total, 1):.1%}) "
+                f"{rate:.0f}/s ETA {eta:.0f}s",
+                flush=True,
+            )
+
+
+# ---------------------------------------------------------------------------
+# Worker processes
+# ---------------------------------------------------------------------------
+
+_worker_encoder = None
+
+
+def _init_embed_worker(model_name: str, threads: int, factories: Dict[str, EncoderFactory]) -> None:
+    global _worker_encoder
+    for prefix, factory in factories.items():
+        register_encoder(prefix, factory)
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "ONNX_INTRA_OP_THREADS"):
+        os.environ[variable] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_encoder = load_encoder(model_name)
+
+
+def _embed_batch(path: str, texts: List[str], encoder=None) -> int:
+    encoder = encoder or _worker_encoder
+    _save_npy(path, np.asarray(encoder.encode(texts), dtype=np.float32))
+    return len(texts)
+
+
+def _build_shard(path: str, batch_paths: List[str], dimension: int) -> int:
+    import faiss
+
+    index = faiss.IndexFlatIP(dimension)
+    for batch_path in batch_paths:
+        index.add(np.ascontiguousarray(np.load(batch_path), dtype=np.float32))
+    tmp_path = path + ".tmp"
+    faiss.write_index(index, tmp_path)
+    _replace_atomically(tmp_path, path)
+    return index.ntotal
+
+
+def _portable_factories() -> Dict[str, EncoderFactory]:
+    """Registered encoder factories that pickle (by reference), so a spawned worker can register them too."""
+    portable = {}
+    for prefix, factory in registered_encoders().items():
+        try:
+            pickle.dumps(factory)
+        except Exception:
+            continue  # a lambda or closure; only a forked worker has it
+        portable[prefix] = factory
+    return portable
+
+
+def pool_context(start_method: Optional[str] = None) -> multiprocessing.context.BaseContext:
+    """
+    The context worker pools start with: ``start_method``, else
+    ``INGEST_START_METHOD``, else ``fork`` when it exists and this process is
+    safe to fork (one thread, torch not imported), else ``forkserver`` or
+    ``spawn``.
+    """
+    method = start_method or os.getenv("INGEST_START_METHOD")
+    if not method:
+        available = multiprocessing.get_all_start_methods()
+        if "fork" in available and threading.active_count() == 1 and "torch" not in sys.modules:
+            method = "fork"
+        else:
+            method = "forkserver" if "forkserver" in available else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def run_ingestion_process(module: str, import_root: str) -> None:
+    """
+    Run ``python -m <module>`` with ``import_root`` on its path and wait for
+    it. Servers reindex this way (from a worker thread, not the event loop):
+    the build's parent is then single-threaded, and the memory it used is
+    returned when it exits. The child shares the server's working directory
+    and environment, so relative data paths resolve the same way.
+    """
+    path = os.pathsep.join(filter(None, (import_root, os.environ.get("PYTHONPATH"))))
+    completed = subprocess.run([sys.executable, "-m", module], env=dict(os.environ, PYTHONPATH=path))
+    if completed.returncode:
+        raise RuntimeError(f"python -m {module} exited with status {completed.returncode}")
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+
+class IndexBuilder:
+    def __init__(
+        self,
+        model_name: str,
+        workers: int = 1,
+        batch_size: int = 2000,
+        shard_size: int = 250_000,
+        merge: bool = True,
+        start_method: Optional[str] = None,
+    ) -> None:
+        if shard_size % batch_size:
+            raise ValueError("shard_size must be a multiple of batch_size.")
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.shard_size = shard_size
+        self.merge = merge
+        self.dimension: Optional[int] = None
+        self.start_method = start_method
+        self._context: Optional[multiprocessing.context.BaseContext] = None
+
+    def _pool_context(self) -> multiprocessing.context.BaseContext:
+        # Chosen on first use, so a single-process build never touches multiprocessing
+        if self._context is None:
+            self._context = pool_context(self.start_method)
+        return self._context
+
+    def _plan(self, total: int, digest: str) -> Dict:
+        return {
+            "source_digest": digest,
+            "total": total,
+            "model_name": self.model_name,
+            "batch_size": self.batch_size,
+            "shard_size": self.shard_size,
+        }
+
+    def _prepare_work_dir(self, work_dir: str, plan: Dict) -> None:
+        plan_path = os.path.join(work_dir, PLAN_FILE)
+        if os.path.exists(plan_path):
+            with open(plan_path, "r", encoding="utf-8") as f:
+                if json.load(f) == plan:
+                    print(f"Resuming build in {work_dir}")
+                    return
+            print(f"Input or settings changed; discarding previous build in {work_dir}")
+            shutil.rmtree(work_dir)
+        os.makedirs(os.path.join(work_dir, "batches"), exist_ok=True)
+        os.makedirs(os.path.join(work_dir, "shards"), exist_ok=True)
+        with open(plan_path, "w", encoding="utf-8") as f:
+            json.dump(plan, f)
+
+    def _embed(self, chunks_path: str, batch_paths: List[str], total: int) -> None:
+        done: Set[int] = {i for i, path in enumerate(batch_paths) if os.path.exists(path)}
+        progress = Progress("embed", total, done=min(len(done) * self.batch_size, total))
+        if len(done) == len(batch_paths):
+            return
+
+        if self.workers == 1:
+            encoder = load_encoder(self.model_name)
+            for i, texts in enumerate(_iter_batches(chunks_path, self.batch_size)):
+                if i not in done:
+                    progress.update(_embed_batch(batch_paths[i], texts, encoder))
+            return
+
+        threads = max(1, (os.cpu_count() or self.workers) // self.workers)
+        with ProcessPoolExecutor(
+            self.workers, mp_context=self._pool_context(), initializer=_init_embed_worker,
+            initargs=(self.model_name, threads, _portable_factories()),
+        ) as pool:
+            pending: Set[Future] = set()
+            for i, texts in enumerate(_iter_batches(chunks_path, self.batch_size)):
+                if i in done:
+                    continue
+                if len(pending) >= 2 * self.workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        progress.update(future.result())
+                pending.add(pool.submit(_embed_batch, batch_paths[i], texts))
+            for future in pending:
+                progress.update(future.result())
+
+    def _build_shards(self, batch_paths: List[str], shard_paths: List[str], dimension: int) -> None:
+        per_shard = self.shard_size // self.batch_size
+        jobs = [
+            (path, batch_paths[s * per_shard : (s + 1) * per_shard])
+            for s, path in enumerate(shard_paths)
+            if not os.path.exists(path)
+        ]
+        progress = Progress("shards", len(shard_paths), done=len(shard_paths) - len(jobs))
+        if not jobs:
+            return
+        if self.workers == 1:
+            for path, batches in jobs:
+                _build_shard(path, batches, dimension)
+                progress.update(1)
+            return
+        with ProcessPoolExecutor(min(self.workers, len(jobs)), mp_context=self._pool_context()) as pool:
+            futures = [pool.submit(_build_shard, path, batches, dimension) for path, batches in jobs]
+            for future in futures:
+                future.result()
+                progress.update(1)
+
+    def _publish(self, chunks_path: str, out_dir: str, shard_paths: List[str], dimension: int, total: int) -> None:
+        import faiss
+
+        if self.merge:
+            index = faiss.IndexFlatIP(dimension)
+            for path in shard_paths:
+                index.merge_from(faiss.read_index(path))
+            tmp_path = os.path.join(out_dir, FAISS_FILE + ".tmp")
+            faiss.write_index(index, tmp_path)
+            _replace_atomically(tmp_path, os.path.join(out_dir, FAISS_FILE))
+            stale = [os.path.join(out_dir, SHARDS_FILE)]
+        else:
+            shard_dir = os.path.join(out_dir, SHARD_DIR)
+            os.makedirs(shard_dir, exist_ok=True)
+            names = []
+            for path in shard_paths:
+                name = os.path.basename(path)
+                os.replace(path, os.path.join(shard_dir, name))
+                names.append(name)
+            with open(os.path.join(out_dir, SHARDS_FILE), "w", encoding="utf-8") as f:
+                json.dump({"shards": names, "ntotal": total, "dimension": dimension}, f)
+            # FaissIndex.load prefers index.faiss, so drop one left by a merged build.
+            stale = [os.path.join(out_dir, FAISS_FILE)]
+        for path in stale:
+            if os.path.exists(path):
+                os.remove(path)
+        write_docstore(out_dir, iter_chunks_jsonl(chunks_path))
+
+    def build(self, chunks_path: str, out_dir: str, work_dir: Optional[str] = None) -> int:
+        """
+        Build the serving index for ``chunks_path`` in ``out_dir``; returns the
+        vector count. Intermediate files go to ``work_dir`` (default
+        ``<out_dir>/.build``), which must stay the same for a rerun to resume.
+        """
+        started = time.monotonic()
+        total, digest = _scan(chunks_path)
+        if not total:
+            raise ValueError(f"No chunks in {chunks_path}.")
+
+        work_dir = work_dir or os.path.join(out_dir, BUILD_DIR)
+        self._prepare_work_dir(work_dir, self._plan(total, digest))
+        batch_count = -(-total // self.batch_size)
+        batch_paths = [os.path.join(work_dir, "batches", f"batch-{i:06d}.npy") for i in range(batch_count)]
+        shard_count = -(-total // self.shard_size)
+        shard_paths = [os.path.join(work_dir, "shards", f"shard-{s:04d}.faiss") for s in range(shard_count)]
+
+        self._embed(chunks_path, batch_paths, total)
+        dimension = self.dimension = int(np.load(batch_paths[0], mmap_mode="r").shape[1])
+        self._build_shards(batch_paths, shard_paths, dimension)
+        self._publish(chunks_path, out_dir, shard_paths, dimension, total)
+        shutil.rmtree(work_dir)
+        print(f"Indexed {total} chunks ({dimension}d) into {out_dir} in {time.monotonic() - started:.1f}s")
+        return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("chunks", help="JSONL file with one chunk per line")
+    parser.add_argument("out", nargs="?", default=os.getenv("VECTOR_STORE_PATH", "./data/faiss_index"))
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("INGEST_WORKERS", "1")))
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--shard-size", type=int, default=250_000)
+    parser.add_argument("--no-merge", action="store_true", help="Keep shards and serve them with IndexShards")
+    args = parser.parse_args()
+
+    builder = IndexBuilder(args.model, args.workers, args.batch_size, args.shard_size, merge=not args.no_merge)
+    with new_version(args.out) as staging:
+        staging.counts["chunks"] = builder.build(args.chunks, staging.path, os.path.join(args.out, BUILD_DIR))
+        staging.extra = index_metadata(args.model, builder.dimension, "ip", {"source": os.path.basename(args.chunks)})
+        staging.extra["sources"] = source_digests((chunk.source, chunk.text) for chunk in iter_chunks_jsonl(args.chunks))
+
+
+if __name__ == "__main__":
+    main()
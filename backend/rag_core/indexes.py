@@ -0,0 +1,211 @@
+"""
+Vector index backends.
+
+An index maps a query vector to the best ``Hit`` objects. ``metric`` tells
+callers how to read ``Hit.score``: ``"ip"`` (inner product, higher is better)
+or ``"l2"`` (squared distance, lower is better).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Protocol, Sequence
+
+import numpy as np
+
+FAISS_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.json"
+SHARD_DIR = "shards"
+SHARDS_FILE = "shards.json"
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A retrievable piece of text with its citation metadata."""
+
+    id: str
+    text: str
+    source: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Hit:
+    """A search result; ``position`` is the row in the index (rank when the backend hides it)."""
+
+    position: int
+    score: float
+    chunk: Chunk
+
+
+class VectorIndex(Protocol):
+    metric: str
+
+    def __len__(self) -> int: ...
+
+    def search(self, query: np.ndarray, k: int) -> List[Hit]: ...
+
+
+def confidence(score: float, metric: str) -> float:
+    """Map a raw index score to a 0..1 confidence the API can report."""
+    if metric == "l2":
+        return float(1.0 - min(score, 1.0))
+    return float(score)
+
+
+class NumpyIndex:
+    """Brute-force inner product over a dense ``(n, d)`` matrix of normalized vectors."""
+
+    metric = "ip"
+
+    def __init__(self, embeddings: np.ndarray, chunks: Sequence[Chunk]) -> None:
+        if len(chunks) != embeddings.shape[0]:
+            raise ValueError("Mismatch between embeddings and documents length.")
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.chunks = list(chunks)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: np.ndarray, k: int) -> List[Hit]:
+        if not len(self.chunks):
+            return []
+        scores = self.embeddings @ np.asarray(query, dtype=np.float32)
+        k = min(k, len(scores))
+        # argpartition keeps this O(n) instead of sorting the whole corpus.
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [Hit(int(idx), float(scores[idx]), self.chunks[idx]) for idx in top]
+
+
+class FaissIndex:
+    """
+    A native FAISS index plus its chunks in row order.
+
+    Returns exactly what LangChain's ``similarity_search_with_score_by_vector``
+    returns for the same artifacts, without the LangChain import graph or the
+    per-hit ``Document``/docstore lookups.
+    """
+
+    def __init__(self, index, chunks: Sequence[Chunk]) -> None:
+        import faiss
+
+        if index.ntotal != len(chunks):
+            raise ValueError("Mismatch between FAISS index size and docstore length.")
+        self.index = index
+        self.chunks = list(chunks)
+        self.metric = "ip" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2"
+
+    @classmethod
+    def load(cls, path: str) -> "FaissIndex":
+        """Load ``index.faiss``, or the shards listed in ``shards.json`` behind one ``IndexShards``."""
+        import faiss
+
+        if os.path.exists(os.path.join(path, FAISS_FILE)) or not os.path.exists(os.path.join(path, SHARDS_FILE)):
+            return cls(faiss.read_index(os.path.join(path, FAISS_FILE)), read_docstore(path))
+
+        with open(os.path.join(path, SHARDS_FILE), "r", encoding="utf-8") as f:
+            layout = json.load(f)
+        shards = [faiss.read_index(os.path.join(path, SHARD_DIR, name)) for name in layout["shards"]]
+        index = faiss.IndexShards(layout["dimension"], True, True)
+        for shard in shards:
+            index.add_shard(shard)
+        instance = cls(index, read_docstore(path))
+        instance._shards = shards  # IndexShards does not own its shards
+        return instance
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: np.ndarray, k: int) -> List[Hit]:
+        vector = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        distances, ids = self.index.search(vector, k)
+        return [
+            Hit(int(idx), float(distance), self.chunks[idx])
+            for distance, idx in zip(distances[0], ids[0])
+            if idx != -1
+        ]
+
+
+def write_docstore(path: str, chunks: Iterable[Chunk]) -> None:
+    """Persist chunks in index row order next to ``index.faiss``, streaming one chunk at a time."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, DOCSTORE_FILE), "w", encoding="utf-8") as f:
+        f.write("[")
+        for row, chunk in enumerate(chunks):
+            if row:
+                f.write(", ")
+            json.dump(asdict(chunk), f, ensure_ascii=False)
+        f.write("]")
+
+
+def read_docstore(path: str) -> List[Chunk]:
+    with open(os.path.join(path, DOCSTORE_FILE), "r", encoding="utf-8") as f:
+        return [Chunk(**record) for record in json.load(f)]
+
+
+def chunks_from_langchain(docstore, index_to_docstore_id: Dict[int, str]) -> List[Chunk]:
+    """Flatten a LangChain docstore into chunks ordered by FAISS row."""
+    chunks: List[Chunk] = []
+    for row in range(len(index_to_docstore_id)):
+        doc_id = index_to_docstore_id[row]
+        doc = docstore.search(doc_id)
+        metadata = dict(doc.metadata or {})
+        chunks.append(Chunk(id=str(doc_id), text=doc.page_content, source=metadata.get("source", ""), metadata=metadata))
+    return chunks
+
+
+def load_faiss_store(path: str, embeddings=None) -> VectorIndex:
+    """
+    Load the serving index from ``path``: the native reader when a
+    ``docstore.json`` is present, otherwise the legacy LangChain store.
+    """
+    if os.path.exists(os.path.join(path, DOCSTORE_FILE)):
+        return FaissIndex.load(path)
+    print(
+        f"No {DOCSTORE_FILE} in {path}; loading through LangChain. "
+        "Run `python -m rag_core.convert_index` to use the native loader."
+    )
+    return LangChainFaissIndex.load(path, embeddings)
+
+
+class LangChainFaissIndex:
+    """A LangChain ``FAISS`` vector store searched by precomputed query vectors."""
+
+    metric = "l2"
+
+    def __init__(self, vector_store) -> None:
+        self.vector_store = vector_store
+
+    @classmethod
+    def load(cls, path: str, embeddings) -> "LangChainFaissIndex":
+        from langchain_community.vectorstores import FAISS
+
+        return cls(FAISS.load_local(path, embeddings))
+
+    def __len__(self) -> int:
+        return self.vector_store.index.ntotal
+
+    def search(self, query: np.ndarray, k: int) -> List[Hit]:
+        results = self.vector_store.similarity_search_with_score_by_vector(
+            np.asarray(query, dtype=np.float32).tolist(), k=k
+        )
+        hits: List[Hit] = []
+        for position, (doc, score) in enumerate(results):
+            metadata = dict(getattr(doc, "metadata", {}) or {})
+            chunk = Chunk(
+                id=str(metadata.get("id", position)),
+                text=doc.page_content,
+                source=metadata.get("source", ""),
+                metadata=metadata,
+            )
+            hits.append(Hit(position, float(score), chunk))
+        return hits
+
+
+def chunk_from_record(record: Dict[str, Any]) -> Chunk:
+    """Build a ``Chunk`` from a ``documents.json`` style record."""
+    metadata = {key: value for key, value in record.items() if key not in ("id", "text", "source")}
+    return Chunk(id=str(record["id"]), text=record["text"], source=str(record["source"]), metadata=metadata)
@@ -0,0 +1,343 @@
+"""
+Memory accounting and leak hunting for long-running workers.
+
+RSS that creeps over days is hard to pin on a component from the outside.
+Each entry point lists its components (the encoder's parameters, index
+vectors, document store, caches, ...) with their sizes. ``report``
+combines them with the process RSS:
+
+- ``heap`` components are in this process's memory and sum to
+  ``accounted_heap_bytes``. The rest of RSS is the interpreter, libraries
+  and anything not listed;
+- ``mapped`` components are memory-mapped files, which count toward RSS
+  only for the pages touched;
+- ``disk`` components (the completion cache) are listed for completeness.
+
+Sizes are estimates. Arrays and model parameters are exact. Strings, dicts
+and dataclasses are summed with ``sys.getsizeof``. Document stores,
+documents and manifests are sized once per loaded index
+(``docstore_bytes``, ``generation_sizeof``), and the completion cache
+reports the size its last write summed, so a scrape walks no chunk lists and
+queries no database. Strings shared between components (chunk text
+in both a docstore and ``app``'s documents) are counted in each.
+
+Every ``/metrics`` scrape exports ``mf_process_rss_bytes`` and
+``mf_memory_component_bytes{component,kind}``, so growth shows up on a
+dashboard. With the admin token (``PROFILER_TOKEN``, sent as
+``X-Admin-Token``), ``install`` also adds:
+
+- ``GET /admin/memory``: the report as JSON;
+- ``POST /admin/memory/snapshot?frames=10``: start ``tracemalloc`` if it is
+  not running and keep a baseline snapshot;
+- ``GET /admin/memory/diff?limit=25&group=lineno``: what was allocated or
+  freed since the baseline, largest growth first (``group`` is ``lineno``,
+  ``filename`` or ``traceback``);
+- ``DELETE /admin/memory/snapshot``: stop ``tracemalloc`` and drop the
+  baseline.
+
+``tracemalloc`` slows allocation noticeably, so it only runs between a
+snapshot and its deletion.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from dataclasses import asdict, dataclass, fields, is_dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .telemetry import MEMORY_COMPONENT_BYTES, PROCESS_RSS_BYTES, REGISTRY
+
+DEFAULT_TRACE_FRAMES = 10
+
+
+@dataclass
+class Component:
+    nbytes: int
+    kind: str = "heap"  # heap, mapped, disk
+
+
+Components = Dict[str, Component]
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Current resident set size from /proc (Linux), else psutil when available."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def deep_sizeof(obj, limit: int = 1_000_000) -> int:
+    """``sys.getsizeof`` over containers, dataclasses and arrays, each object counted once."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < limit:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            total += item.nbytes if item.base is None else 0
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif is_dataclass(item) and not isinstance(item, type):
+            stack.extend(getattr(item, field.name) for field in fields(item))
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.append(vars(item))
+    return total
+
+
+def array_component(array: np.ndarray) -> Component:
+    """Heap bytes, or mapped when the array is backed by a memory-mapped file."""
+    base = array
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return Component(array.nbytes, "mapped")
+        base = base.base
+    return Component(array.nbytes, "mapped" if isinstance(base, mmap.mmap) else "heap")
+
+
+def torch_bytes(obj) -> Optional[int]:
+    """Parameter and buffer bytes of the torch module in ``obj`` (or its ``_model`` / ``model``)."""
+    for candidate in (obj, getattr(obj, "_model", None), getattr(getattr(obj, "_model", None), "model", None)):
+        if candidate is not None and hasattr(candidate, "parameters") and hasattr(candidate, "buffers"):
+            tensors = [*candidate.parameters(), *candidate.buffers()]
+            return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    return None
+
+
+def faiss_bytes(index) -> int:
+    """Code bytes of a FAISS index; ``IndexShards`` report the sum over their shards."""
+    import faiss
+
+    if isinstance(index, faiss.IndexShards):
+        return sum(faiss_bytes(faiss.downcast_index(index.at(shard))) for shard in range(index.count()))
+    code_size = getattr(index, "code_size", None) or index.d * 4
+    return int(index.ntotal) * int(code_size)
+
+
+_docstores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_docstores_lock = threading.Lock()
+
+
+def docstore_bytes(index, chunks: Iterable) -> int:
+    """Size of an index's chunks, computed once per index object (indexes are not mutated)."""
+    with _docstores_lock:
+        cached = _docstores.get(index)
+    if cached is None:
+        cached = deep_sizeof(list(chunks))
+        try:
+            with _docstores_lock:
+                _docstores[index] = cached
+        except TypeError:
+            pass  # not weak-referenceable; size it on every call
+    return cached
+
+
+_generation_sizes: Dict[str, Tuple[Optional[str], int, int]] = {}  # name -> (generation, id, bytes)
+_generation_sizes_lock = threading.Lock()
+
+
+def generation_sizeof(name: str, obj, generation: Optional[str]) -> int:
+    """``deep_sizeof(obj)``, recomputed only when ``obj`` is replaced or the index ``generation`` changes."""
+    with _generation_sizes_lock:
+        cached = _generation_sizes.get(name)
+    if cached is not None and cached[:2] == (generation, id(obj)):
+        return cached[2]
+    nbytes = deep_sizeof(obj)
+    with _generation_sizes_lock:
+        _generation_sizes[name] = (generation, id(obj), nbytes)
+    return nbytes
+
+
+def index_components(index, name: str = "index") -> Components:
+    """Vectors and docstore of a ``rag_core.indexes`` index; shard servers hold their own."""
+    if index is None:
+        return {}
+    embeddings = getattr(index, "embeddings", None)
+    if isinstance(embeddings, np.ndarray):
+        vectors = array_component(embeddings)
+    elif hasattr(index, "index"):
+        vectors = Component(faiss_bytes(index.index))
+    elif hasattr(index, "vector_store"):
+        store = index.vector_store
+        return {
+            f"{name}.vectors": Component(faiss_bytes(store.index)),
+            f"{name}.docstore": Component(docstore_bytes(index, getattr(store.docstore, "_dict", {}).values())),
+        }
+    else:
+        return {}
+    return {f"{name}.vectors": vectors, f"{name}.docstore": Component(docstore_bytes(index, index.chunks))}
+
+
+def engine_components(engine) -> Components:
+    """Encoder, index and caches of a ``RagEngine``."""
+    if engine is None:
+        return {}
+    components: Components = {}
+    encoder_bytes = torch_bytes(engine.encoder)
+    if encoder_bytes is not None:
+        components["encoder"] = Component(encoder_bytes)
+    components.update(index_components(engine.index))
+    if engine.embedding_cache is not None:
+        components["embedding_cache"] = Component(engine.embedding_cache.nbytes)
+    if engine.reranker is not None:
+        scorer_bytes = torch_bytes(engine.reranker.scorer)
+        if scorer_bytes is not None:
+            components["reranker"] = Component(scorer_bytes)
+        components["rerank_cache"] = Component(engine.reranker.cache_nbytes)
+    if engine.completion_cache is not None:
+        components["completion_cache"] = Component(engine.completion_cache.nbytes, "disk")
+    return components
+
+
+def report(components: Components) -> Dict:
+    heap = sum(component.nbytes for component in components.values() if component.kind == "heap")
+    return {
+        "rss_bytes": process_rss_bytes(),
+        "accounted_heap_bytes": heap,
+        "components": {name: asdict(component) for name, component in sorted(components.items())},
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
+
+
+class SnapshotDiff:
+    """A ``tracemalloc`` baseline and diffs against it."""
+
+    def __init__(self) -> None:
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.taken_at: Optional[float] = None
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+
+    def start(self, frames: int = DEFAULT_TRACE_FRAMES) -> Dict:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._started_tracing = True
+            self.baseline, self.taken_at = self._snapshot(), time.time()
+            traced, peak = tracemalloc.get_traced_memory()
+        print(f"tracemalloc baseline taken ({traced / 1e6:.1f} MB traced)")
+        return {"taken_at": self.taken_at, "traced_bytes": traced, "peak_bytes": peak, "frames": tracemalloc.get_traceback_limit()}
+
+    def diff(self, limit: int = 25, group: str = "lineno") -> Dict:
+        with self._lock:
+            if self.baseline is None:
+                raise LookupError("No baseline; POST /admin/memory/snapshot first.")
+            stats = self._snapshot().compare_to(self.baseline, group)
+            taken_at = self.taken_at
+        growth = sum(stat.size_diff for stat in stats)
+        return {
+            "baseline_age_seconds": time.time() - taken_at,
+            "size_diff_bytes": growth,
+            "top": [
+                {
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                    "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+            self.baseline = self.taken_at = None
+
+
+def install(app, components: Callable[[], Components], token: Optional[str] = None) -> None:
+    """
+    Export ``components()`` on every ``/metrics`` scrape and, with ``token``
+    (default ``PROFILER_TOKEN``), add the ``/admin/memory`` endpoints.
+    """
+
+    def collect() -> None:
+        rss = process_rss_bytes()
+        if rss is not None:
+            PROCESS_RSS_BYTES.set(rss)
+        try:
+            current = components()
+        except Exception as e:  # a component changing under us must not break /metrics
+            print(f"Memory accounting failed: {e}")
+            return
+        for name, component in current.items():
+            MEMORY_COMPONENT_BYTES.set(component.nbytes, component=name, kind=component.kind)
+
+    REGISTRY.add_collector(collect)
+
+    token = token if token is not None else os.getenv("PROFILER_TOKEN")
+    if not token:
+        return
+    import hmac
+
+    from fastapi import HTTPException, Request
+
+    snapshots = SnapshotDiff()
+
+    def check(request: Request) -> None:
+        if not hmac.compare_digest(request.headers.get("x-admin-token", "").encode("utf-8"), token.encode("utf-8")):
+            raise HTTPException(status_code=403, detail="Memory introspection needs a valid X-Admin-Token.")
+
+    @app.get("/admin/memory", include_in_schema=False)
+    async def memory_report(request: Request) -> Dict:
+        check(request)
+        return report(components())
+
+    @app.post("/admin/memory/snapshot", include_in_schema=False)
+    async def memory_snapshot(request: Request, frames: int = DEFAULT_TRACE_FRAMES) -> Dict:
+        check(request)
+        return snapshots.start(frames)
+
+    @app.get("/admin/memory/diff", include_in_schema=False)
+    async def memory_diff(request: Request, limit: int = 25, group: str = "lineno") -> Dict:
+        check(request)
+        if group not in ("lineno", "filename", "traceback"):
+            raise HTTPException(status_code=400, detail="group must be lineno, filename or traceback.")
+        try:
+            return snapshots.diff(limit, group)
+        except LookupError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    @app.delete("/admin/memory/snapshot", include_in_schema=False)
+    async def memory_stop(request: Request) -> Dict:
+        check(request)
+        snapshots.stop()
+        return {"tracemalloc": False}
+
@@ -0,0 +1,172 @@
+"""
+ONNX Runtime encoder backend with dynamic int8 quantization.
+
+Serving only needs ``onnxruntime`` and ``tokenizers``: no torch import, a
+smaller resident set and faster single-query encoding on CPU. Models are
+exported once (this step does need torch and transformers):
+
+    python -m rag_core.onnx_encoder export sentence-transformers/all-MiniLM-L6-v2
+
+and selected with ``EMBEDDING_MODEL`` / ``Settings.embeddings_model``:
+
+    EMBEDDING_MODEL=onnx:sentence-transformers/all-MiniLM-L6-v2
+
+The part after ``onnx:`` is either an export directory or a model name that was
+exported under ``ONNX_MODEL_DIR`` (default ``./data/onnx``).
+``ONNX_INTRA_OP_THREADS`` sets the intra-op thread count (0 lets ONNX Runtime
+decide). Pooling and normalization match sentence-transformers' mean pooling
+for MiniLM-style models.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .encoders import LangChainCompatMixin
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+DEFAULT_EXPORT_ROOT = "./data/onnx"
+MAX_SEQ_LENGTH = 256
+
+
+def export_dir_for(model_name: str, root: Optional[str] = None) -> Path:
+    root = root or os.getenv("ONNX_MODEL_DIR", DEFAULT_EXPORT_ROOT)
+    return Path(root) / model_name.rstrip("/").split("/")[-1]
+
+
+def resolve_model_dir(name: str) -> Path:
+    path = Path(name)
+    if (path / TOKENIZER_FILE).exists():
+        return path
+    return export_dir_for(name)
+
+
+class OnnxEncoder(LangChainCompatMixin):
+    """Mean-pooled, L2-normalized sentence embeddings from an exported ONNX model."""
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = True,
+        intra_op_threads: int = 0,
+        batch_size: int = 32,
+    ) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        directory = resolve_model_dir(model_dir)
+        model_file = directory / (QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found at {model_file}. "
+                f"Run `python -m rag_core.onnx_encoder export {model_dir}` first."
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+        self._input_names = {node.name for node in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(str(directory / TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()
+
+        self.model_name = f"onnx:{model_dir}" + ("" if quantized else ":fp32")
+        self.batch_size = batch_size
+        self._dimension = self._session.get_outputs()[0].shape[-1]
+
+    @classmethod
+    def from_name(cls, name: str) -> "OnnxEncoder":
+        """Factory for ``load_encoder``; ``name`` may end in ``:fp32`` to skip quantization."""
+        quantized = not name.endswith(":fp32")
+        if not quantized:
+            name = name[: -len(":fp32")]
+        threads = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+        return cls(name, quantized=quantized, intra_op_threads=threads)
+
+    @property
+    def dimension(self) -> int:
+        return int(self._dimension)
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self._session.run(None, feeds)[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        batches = [
+            self._encode_batch(texts[start : start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.vstack(batches)
+
+
+def export(model_name: str, out_dir: Optional[str] = None, opset: int = 14) -> Path:
+    """Export ``model_name`` to ONNX and write an int8 dynamically quantized copy."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    directory = Path(out_dir) if out_dir else export_dir_for(model_name)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(directory / MODEL_FILE),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    quantize_dynamic(
+        str(directory / MODEL_FILE),
+        str(directory / QUANTIZED_MODEL_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    tokenizer.backend_tokenizer.save(str(directory / TOKENIZER_FILE))
+    return directory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="Export and quantize a sentence-transformers model")
+    export_parser.add_argument("model", nargs="?", default="sentence-transformers/all-MiniLM-L6-v2")
+    export_parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    directory = export(args.model, args.out)
+    print(f"Exported ONNX model to {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+On-demand profiling of a live worker, for admins.
+
+Two captures, both off until asked for, so an idle worker pays nothing but
+one header lookup per request:
+
+- ``GET /admin/profile?seconds=10&interval_ms=5&format=speedscope``
+  samples the Python stack of every thread each ``interval_ms`` for
+  ``seconds`` (at most ``MAX_SAMPLE_SECONDS``) from a short-lived
+  background thread. The result is returned as speedscope JSON (open it at
+  https://www.speedscope.app) or, with ``format=collapsed``, as collapsed
+  stacks (``thread;outer;...;inner count`` per line) for flamegraph tools.
+  Samples are wall-clock. Threads parked in a wait (idle executor workers,
+  the event loop's ``select``) are dropped unless ``idle=1``, which leaves
+  roughly the CPU-bound stacks. One capture runs at a time; a second gets 409.
+- A ``/query`` request sent with ``X-Profile: 1`` runs under ``cProfile``
+  through validation, retrieval and generation, on whichever thread does the
+  work. It bypasses request coalescing so that its own computation is
+  measured. The response carries ``X-Profile-Id``. The profile is then
+  served as ``pstats`` text (sorted by cumulative time), or with
+  ``format=prof`` as a marshalled stats file for snakeviz or ``pstats``, at
+  ``GET /admin/profile/requests/<id>``. The last ``KEPT_REQUEST_PROFILES`` are
+  kept.
+
+Every endpoint and the ``X-Profile`` opt-in need ``X-Admin-Token`` to match
+``PROFILER_TOKEN`` (``profiler_token`` for ``app/main.py``). Without a token
+nothing is installed. Captures are counted in ``mf_profiles_total{kind}``.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .telemetry import record_profile
+
+T = TypeVar("T")
+
+MAX_SAMPLE_SECONDS = 60.0
+DEFAULT_INTERVAL_MS = 5.0
+KEPT_REQUEST_PROFILES = 32
+TOKEN_HEADER = b"x-admin-token"
+PROFILE_HEADER = b"x-profile"
+
+# (file name, function) of the innermost Python frame of a thread that is waiting, not running
+IDLE_LEAVES = frozenset(
+    {
+        ("threading.py", "wait"),
+        ("threading.py", "_wait_for_tstate_lock"),
+        ("queue.py", "get"),
+        ("thread.py", "_worker"),
+        ("selectors.py", "select"),
+        ("base_events.py", "_run_once"),
+        ("socketserver.py", "serve_forever"),
+    }
+)
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+class StackSampler:
+    """Statistical sampler over ``sys._current_frames``; one capture at a time."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def capture(self, seconds: float, interval: float, include_idle: bool = False) -> "Counter[Tuple[Frame, ...]]":
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already being captured.")
+        try:
+            record_profile("sample")
+            return self._sample(min(seconds, MAX_SAMPLE_SECONDS), max(interval, 0.001), include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> "Counter[Tuple[Frame, ...]]":
+        me = threading.get_ident()
+        stacks: "Counter[Tuple[Frame, ...]]" = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    continue
+                stack: List[Frame] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.append((names.get(ident, f"thread-{ident}"), "", 0))
+                stacks[tuple(reversed(stack))] += 1
+            time.sleep(interval)
+        return stacks
+
+
+def _frame_name(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})" if filename else name
+
+
+def collapsed(stacks: "Counter[Tuple[Frame, ...]]") -> str:
+    """One ``outer;...;inner count`` line per distinct stack."""
+    lines = [";".join(_frame_name(frame) for frame in stack) + f" {count}" for stack, count in stacks.most_common()]
+    return "\n".join(lines) + "\n"
+
+
+def speedscope(stacks: "Counter[Tuple[Frame, ...]]", interval: float, name: str = "mf-assistant") -> Dict:
+    """Speedscope's sampled-profile JSON; each sample is weighted by the sampling interval."""
+    frames: List[Dict] = []
+    positions: Dict[Frame, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+    for stack, count in stacks.most_common():
+        indexes = []
+        for frame in stack:
+            if frame not in positions:
+                positions[frame] = len(frames)
+                function, filename, line = frame
+                frames.append({"name": function, "file": filename, "line": line} if filename else {"name": function})
+            indexes.append(positions[frame])
+        samples.append(indexes)
+        weights.append(count * interval)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "rag_core.profiling",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+class RequestProfiles:
+    """The most recent per-request cProfile captures, by id."""
+
+    def __init__(self, keep: int = KEPT_REQUEST_PROFILES) -> None:
+        self.keep = keep
+        self._profiles: "OrderedDict[str, cProfile.Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new(self) -> Tuple[str, cProfile.Profile]:
+        profile_id, profile = uuid.uuid4().hex[:16], cProfile.Profile()
+        with self._lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        record_profile("request")
+        return profile_id, profile
+
+    def get(self, profile_id: str) -> Optional[cProfile.Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+def stats_text(profile: cProfile.Profile, limit: int = 60) -> str:
+    profile.create_stats()
+    if not profile.stats:
+        return "No Python calls were profiled; the answer came from the warm table.\n"
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def stats_file(profile: cProfile.Profile) -> bytes:
+    """What ``pstats.Stats.dump_stats`` would write, without a temporary file."""
+    profile.create_stats()
+    return marshal.dumps(profile.stats)
+
+
+_current_profile: contextvars.ContextVar[Optional[Tuple[str, cProfile.Profile]]] = contextvars.ContextVar(
+    "mf_request_profile", default=None
+)
+
+
+@contextmanager
+def profiled() -> Iterator[None]:
+    """Run the block under this request's profile, if it asked for one; otherwise do nothing."""
+    current = _current_profile.get()
+    if current is None:
+        yield
+        return
+    profile = current[1]
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+
+
+def call(fn: Callable[..., T], *args, **kwargs) -> T:
+    with profiled():
+        return fn(*args, **kwargs)
+
+
+def flight_key(key: str) -> str:
+    """A profiled request gets a key of its own, so it is never a single-flight follower."""
+    current = _current_profile.get()
+    return key if current is None else f"{key}\0profile:{current[0]}"
+
+
+def _authorized(headers: Dict[bytes, bytes], token: str) -> bool:
+    return hmac.compare_digest(headers.get(TOKEN_HEADER, b""), token.encode("utf-8"))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware starting a per-request profile for authorized ``X-Profile`` requests."""
+
+    def __init__(self, app, token: str, profiles: RequestProfiles, paths=("/query",)) -> None:
+        self.app = app
+        self.token = token
+        self.profiles = profiles
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if headers.get(PROFILE_HEADER, b"0") in (b"0", b"") or not _authorized(headers, self.token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id, profile = self.profiles.new()
+
+        async def send_with_id(message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode("ascii"))]}
+            await send(message)
+
+        token = _current_profile.set((profile_id, profile))
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current_profile.reset(token)
+
+
+def install(app, token: Optional[str] = None, paths=("/query",)) -> None:
+    """
+    Add the admin profiling endpoints and the ``X-Profile`` opt-in to ``app``.
+    ``token`` defaults to ``PROFILER_TOKEN``; without one nothing is added.
+    """
+    token = token if token is not None else os.getenv("PROFILER_TOKEN")
+    if not token:
+        return
+    import asyncio
+
+    from fastapi import HTTPException, Request, Response
+    from fastapi.responses import JSONResponse
+
+    sampler = StackSampler()
+    profiles = RequestProfiles()
+    app.add_middleware(ProfilingMiddleware, token=token, profiles=profiles, paths=tuple(paths))
+
+    def check(request: Request) -> None:
+        if not _authorized({TOKEN_HEADER: request.headers.get("x-admin-token", "").encode("utf-8")}, token):
+            raise HTTPException(status_code=403, detail="Profiling needs a valid X-Admin-Token.")
+
+    @app.get("/admin/profile", include_in_schema=False)
+    async def sample_profile(
+        request: Request,
+        seconds: float = 10.0,
+        interval_ms: float = DEFAULT_INTERVAL_MS,
+        format: str = "speedscope",
+        idle: bool = False,
+    ) -> Response:
+        check(request)
+        interval = interval_ms / 1000.0
+        try:
+            # On a worker thread, so the event loop keeps serving (and is sampled)
+            stacks = await asyncio.get_running_loop().run_in_executor(None, sampler.capture, seconds, interval, idle)
+        except ProfilerBusy as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if format == "collapsed":
+            return Response(content=collapsed(stacks), media_type="text/plain; charset=utf-8")
+        return JSONResponse(speedscope(stacks, interval, getattr(app, "title", "mf-assistant")))
+
+    @app.get("/admin/profile/requests/{profile_id}", include_in_schema=False)
+    async def request_profile(request: Request, profile_id: str, format: str = "pstats") -> Response:
+        check(request)
+        profile = profiles.get(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"No request profile '{profile_id}' (only the last {profiles.keep} are kept).")
+        if format == "prof":
+            return Response(
+                content=stats_file(profile),
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'},
+            )
+        return Response(content=stats_text(profile), media_type="text/plain; charset=utf-8")
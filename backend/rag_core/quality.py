@@ -0,0 +1,139 @@
+"""
+Load-adaptive answer quality tiers.
+
+The LLM is the slowest and most fragile stage of the query path. Instead of
+letting every request queue behind it under load, ``QualityGovernor``
+watches two signals:
+
+- LLM calls in flight, against ``max_in_flight``;
+- the p95 latency of LLM calls over the last ``window_seconds``, against
+  ``p95_target_ms``.
+
+It turns them into a *pressure* (the larger of the two ratios). It then
+assigns each request a tier: ``0`` is the LLM, and each higher tier is one
+step further down ``RagEngine.degraded`` (extractive sentences, then the
+rule-based fact table):
+
+- pressure <= 1: every request gets the LLM;
+- 1 < pressure < 2: a ``pressure - 1`` share of requests moves down one
+  tier, spread evenly rather than at random;
+- pressure >= 2: every request moves down one tier, and from 3 on, two.
+
+Samples age out of the window. Once traffic has been moved off the LLM,
+few new samples arrive, so the p95 cannot be measured (fewer than
+``min_samples`` in the window). The latency pressure last measured (on a
+request or a finished call) then decays, halving every
+``half_life_seconds``, instead of dropping to zero.
+Traffic returns to the LLM a share at a time, and the calls it makes refill
+the window. A slow LLM shows up again before everything is sent back. The tier each answer
+came from is reported as ``Answer.generator``. Choices are counted in
+``mf_answer_tier_total`` and pressure is exported as ``mf_quality_pressure``.
+
+Configured with ``QUALITY_TIERS_ENABLED``, ``QUALITY_LLM_MAX_IN_FLIGHT`` and
+``QUALITY_LLM_P95_MS``.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Iterator, Optional, Tuple
+
+from .telemetry import QUALITY_PRESSURE
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_P95_TARGET_MS = 3000.0
+DEFAULT_WINDOW_SECONDS = 30.0
+
+
+class QualityGovernor:
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        p95_target_ms: float = DEFAULT_P95_TARGET_MS,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        min_samples: int = 10,
+        half_life_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self.p95_target = p95_target_ms / 1000.0
+        self.window = window_seconds
+        self.min_samples = min_samples
+        self.half_life = half_life_seconds if half_life_seconds is not None else window_seconds / 2
+        self.in_flight = 0
+        self._samples: Deque[Tuple[float, float]] = deque()  # (finished_at, seconds)
+        self._carry = 0.0
+        self._measured: Optional[Tuple[float, float]] = None  # (at, latency pressure)
+        self._lock = threading.Lock()
+
+    def _p95(self, now: float) -> Optional[float]:
+        while self._samples and self._samples[0][0] < now - self.window:
+            self._samples.popleft()
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(seconds for _, seconds in self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _latency_pressure(self, now: float) -> float:
+        p95 = self._p95(now)
+        if p95 is not None:
+            self._measured = (now, p95 / self.p95_target)
+            return self._measured[1]
+        if self._measured is None:
+            return 0.0
+        at, pressure = self._measured
+        return pressure * 0.5 ** ((now - at) / self.half_life) if self.half_life > 0 else 0.0
+
+    def pressure(self) -> float:
+        with self._lock:
+            return self._pressure(time.monotonic())
+
+    def _pressure(self, now: float) -> float:
+        pressure = max(self.in_flight / self.max_in_flight, self._latency_pressure(now))
+        QUALITY_PRESSURE.set(pressure)
+        return pressure
+
+    def choose(self) -> int:
+        """Tier for the next request: 0 for the LLM, 1 or 2 for degraded answers."""
+        with self._lock:
+            pressure = self._pressure(time.monotonic())
+            if pressure <= 1.0:
+                self._carry = 0.0
+                return 0
+            if pressure >= 3.0:
+                return 2
+            if pressure >= 2.0:
+                return 1
+            # Move a (pressure - 1) share down, evenly spaced across requests
+            self._carry += pressure - 1.0
+            if self._carry >= 1.0:
+                self._carry -= 1.0
+                return 1
+            return 0
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count an LLM call in flight and record its latency."""
+        with self._lock:
+            self.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            now = time.monotonic()
+            with self._lock:
+                self.in_flight -= 1
+                self._samples.append((now, now - started))
+                self._latency_pressure(now)
+
+
+def governor_from_env() -> Optional[QualityGovernor]:
+    if os.getenv("QUALITY_TIERS_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    return QualityGovernor(
+        max_in_flight=int(os.getenv("QUALITY_LLM_MAX_IN_FLIGHT", str(DEFAULT_MAX_IN_FLIGHT))),
+        p95_target_ms=float(os.getenv("QUALITY_LLM_P95_MS", str(DEFAULT_P95_TARGET_MS))),
+    )
@@ -0,0 +1,173 @@
+"""
+Optional cross-encoder rerank stage with a per-request latency budget.
+
+The engine retrieves a wider candidate set (``candidates``, default 20) and
+rescores it against the question with a small CPU cross-encoder in a single
+batched call. Retrieval scores are kept on the returned hits (``confidence``
+still reads them); only the order changes.
+
+Scores are cached per (normalized question, chunk text), so repeated
+questions only pay for chunks they have not been scored against. Uncached
+pairs are scored on one background thread, one request at a time; concurrent
+requests queue for it. Each request waits at most ``budget_ms`` in total,
+queueing included. When the budget runs out, the request keeps the retrieval
+order, and scores that arrive late still land in the cache. Outcomes are
+counted in ``mf_rerank_total`` (``skipped_busy`` when the budget ran out in
+the queue).
+
+Enabled with ``RERANK_MODEL`` (e.g. ``cross-encoder/ms-marco-MiniLM-L-6-v2``)
+or ``Settings.rerank_model``.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_cache import normalize_question
+from .indexes import Hit
+from .telemetry import record_cache_lookup, record_rerank
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+DEFAULT_CANDIDATES = 20
+DEFAULT_BUDGET_MS = 150.0
+ENTRY_BYTES = sys.getsizeof(("", "")) + sys.getsizeof(0.0)  # key tuple and score
+
+
+class Scorer(Protocol):
+    def score(self, question: str, texts: Sequence[str]) -> np.ndarray: ...
+
+
+class CrossEncoderScorer:
+    """sentence-transformers ``CrossEncoder`` on CPU."""
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, batch_size: int = 32, max_length: int = 256) -> None:
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = CrossEncoder(model_name, device="cpu", max_length=max_length)
+
+    def score(self, question: str, texts: Sequence[str]) -> np.ndarray:
+        pairs = [(question, text) for text in texts]
+        return np.asarray(self._model.predict(pairs, batch_size=self.batch_size), dtype=np.float32)
+
+
+class _ScoreCache:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Entries and question strings; passage texts are shared with the docstore."""
+        with self._lock:
+            questions = {question for question, _ in self._scores}
+            return sys.getsizeof(self._scores) + len(self._scores) * ENTRY_BYTES + sum(map(sys.getsizeof, questions))
+
+    def get_many(self, question: str, texts: Sequence[str]) -> Dict[str, float]:
+        found: Dict[str, float] = {}
+        with self._lock:
+            for text in texts:
+                score = self._scores.get((question, text))
+                if score is not None:
+                    self._scores.move_to_end((question, text))
+                    found[text] = score
+        return found
+
+    def put_many(self, question: str, texts: Sequence[str], scores: Sequence[float]) -> None:
+        with self._lock:
+            for text, score in zip(texts, scores):
+                self._scores[(question, text)] = float(score)
+                self._scores.move_to_end((question, text))
+            while len(self._scores) > self.capacity:
+                self._scores.popitem(last=False)
+
+
+class Reranker:
+    def __init__(
+        self,
+        scorer: Scorer,
+        candidates: int = DEFAULT_CANDIDATES,
+        budget_ms: float = DEFAULT_BUDGET_MS,
+        cache_size: int = 8192,
+    ) -> None:
+        self.scorer = scorer
+        self.candidates = candidates
+        self.budget_seconds = budget_ms / 1000.0
+        self._cache = _ScoreCache(cache_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._busy = threading.Lock()
+
+    @property
+    def cache_nbytes(self) -> int:
+        return self._cache.nbytes
+
+    def _score_and_cache(self, question: str, texts: List[str]) -> Dict[str, float]:
+        try:
+            scores = self.scorer.score(question, texts)
+            self._cache.put_many(question, texts, scores)
+            return dict(zip(texts, (float(score) for score in scores)))
+        finally:
+            self._busy.release()
+
+    def rerank(self, question: str, hits: List[Hit], k: int) -> List[Hit]:
+        """The top ``k`` of ``hits`` by cross-encoder score, or by retrieval order if over budget."""
+        if len(hits) <= 1:
+            return hits[:k]
+        key = normalize_question(question)
+        texts = list(dict.fromkeys(hit.chunk.text for hit in hits))
+        scores = self._cache.get_many(key, texts)
+        missing = [text for text in texts if text not in scores]
+        record_cache_lookup("rerank", not missing)
+
+        if missing:
+            deadline = time.monotonic() + self.budget_seconds
+            if not self._busy.acquire(timeout=self.budget_seconds):
+                record_rerank("skipped_busy")
+                return hits[:k]
+            # The rerank queued ahead may have scored the same pairs
+            scores.update(self._cache.get_many(key, missing))
+            missing = [text for text in missing if text not in scores]
+            if not missing:
+                self._busy.release()
+                record_rerank("cached")
+                return self._order(hits, scores, k)
+            future = self._executor.submit(self._score_and_cache, key, missing)
+            try:
+                scores.update(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeout:
+                record_rerank("timeout")
+                return hits[:k]
+            except Exception as e:
+                print(f"Rerank failed: {e}")
+                record_rerank("error")
+                return hits[:k]
+            record_rerank("scored")
+        else:
+            record_rerank("cached")
+        return self._order(hits, scores, k)
+
+    @staticmethod
+    def _order(hits: List[Hit], scores: Dict[str, float], k: int) -> List[Hit]:
+        order = sorted(range(len(hits)), key=lambda i: -scores[hits[i].chunk.text])
+        return [hits[i] for i in order[:k]]
+
+
+def reranker_from_config(
+    model_name: Optional[str],
+    candidates: int = DEFAULT_CANDIDATES,
+    budget_ms: float = DEFAULT_BUDGET_MS,
+) -> Optional[Reranker]:
+    """A ``Reranker`` for ``model_name``, or None when reranking is disabled."""
+    if not model_name:
+        return None
+    return Reranker(CrossEncoderScorer(model_name), candidates=candidates, budget_ms=budget_ms)
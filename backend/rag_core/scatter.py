@@ -0,0 +1,243 @@
+"""
+Scatter-gather search over index shards served by local processes.
+
+A single process holding the whole index caps both corpus size and search
+throughput. In the sharded mode the corpus is split into N shards
+(``split``). Each shard is served by its own ``rag_core.shard_server``
+process, and ``ShardedIndex`` stands in for the index in the API process:
+
+- every search is sent to all shards in parallel, over one persistent HTTP
+  connection per shard and client thread;
+- the per-shard top-k lists are merged by score (higher first for ``ip``,
+  lower first for ``l2``);
+- shards that have not answered by ``deadline_ms``, or that fail, are left
+  out of that search's result. The answer is built from the rest, so a slow
+  or dead shard degrades recall instead of latency or availability. Only
+  when no shard answers does the search fail.
+
+``refresh`` (on startup and on every reload) asks each shard for its size,
+metric and generation under the same deadline. Shards that do not answer
+are listed in ``ShardedIndex.unavailable`` and left out of the count. The
+combined generation keeps their last known generation, so a shard that is
+briefly down or slow does not look like a new index (which would invalidate
+every cached completion). Only when no shard answers does ``refresh`` fail.
+On a reload each shard is first sent ``POST /reload``, which opens and
+verifies the new version before answering; that request gets its own
+timeout (``reload_timeout_s``), and the generation it returns is the one
+used.
+
+Outcomes per shard, for searches and refreshes alike, are counted in
+``mf_shard_requests_total{shard,outcome}`` (ok, timeout, error).
+``Hit.position`` is the row within its shard.
+
+Configured with ``INDEX_SHARDS`` (comma-separated ``host:port`` list),
+``INDEX_SHARD_DEADLINE_MS`` and ``INDEX_SHARD_RELOAD_TIMEOUT_S``.
+
+Usage (from the backend directory):
+    python -m rag_core.scatter split chunks.jsonl ./data/shards --shards 4
+    python -m rag_core.shard_server ./data/shards/shard-000 --port 8101   # one per shard
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .artifacts import index_metadata, new_version, source_digests
+from .index_builder import BUILD_DIR, IndexBuilder, iter_chunks_jsonl, write_chunks_jsonl
+from .indexes import Chunk, Hit
+from .telemetry import record_shard_request
+
+DEFAULT_DEADLINE_MS = 250.0
+DEFAULT_RELOAD_TIMEOUT_S = 120.0
+SHARD_PREFIX = "shard-"
+
+
+class ShardUnavailable(RuntimeError):
+    pass
+
+
+class ShardedIndex:
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        deadline_ms: float = DEFAULT_DEADLINE_MS,
+        reload_timeout_s: float = DEFAULT_RELOAD_TIMEOUT_S,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("At least one shard endpoint is required.")
+        self.endpoints = list(endpoints)
+        self.deadline = deadline_ms / 1000.0
+        self.reload_timeout = reload_timeout_s
+        self.metric = "ip"
+        self.generation: Optional[str] = None
+        self.generations: Dict[str, Optional[str]] = {}  # last known, by endpoint
+        self.unavailable: List[str] = []
+        self._count = 0
+        self._local = threading.local()
+        # Slow shards can hold a thread until their socket times out
+        self._pool = ThreadPoolExecutor(max_workers=4 * len(self.endpoints), thread_name_prefix="shard")
+        self.refresh()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _connection(self, endpoint: str) -> http.client.HTTPConnection:
+        connections: Dict[str, http.client.HTTPConnection] = self._local.__dict__.setdefault("connections", {})
+        connection = connections.get(endpoint)
+        if connection is None:
+            host, port = endpoint.rsplit(":", 1)
+            connection = connections[endpoint] = http.client.HTTPConnection(
+                host, int(port), timeout=max(1.0, 4 * self.deadline)
+            )
+        return connection
+
+    def _request(
+        self, endpoint: str, method: str, path: str, body: Optional[bytes] = None, timeout: Optional[float] = None
+    ) -> dict:
+        """One request over the thread's persistent connection, or over a one-off connection allowing ``timeout``."""
+        if timeout is None:
+            connection = self._connection(endpoint)
+        else:
+            host, port = endpoint.rsplit(":", 1)
+            connection = http.client.HTTPConnection(host, int(port), timeout=timeout)
+        try:
+            connection.request(method, path, body=body)
+            response = connection.getresponse()
+            payload = response.read()
+        except Exception:
+            connection.close()  # reconnect on the next request
+            if timeout is None:
+                del self._local.connections[endpoint]
+            raise
+        finally:
+            if timeout is not None:
+                connection.close()
+        if response.status != 200:
+            raise ShardUnavailable(f"Shard {endpoint} returned {response.status}: {payload[:200]!r}")
+        return json.loads(payload)
+
+    def _scatter(
+        self, method: str, path: str, body: Optional[bytes] = None, timeout: Optional[float] = None
+    ) -> Dict[str, dict]:
+        """
+        Send one request to every shard in parallel; the replies that came back
+        within the deadline (or ``timeout`` seconds, if given), by endpoint.
+        """
+        futures = {
+            self._pool.submit(self._request, endpoint, method, path, body, timeout): endpoint
+            for endpoint in self.endpoints
+        }
+        done, _ = wait(futures, timeout=self.deadline if timeout is None else timeout)
+        replies: Dict[str, dict] = {}
+        for future, endpoint in futures.items():
+            if future not in done:
+                record_shard_request(endpoint, "timeout")
+            elif future.exception() is not None:
+                record_shard_request(endpoint, "error")
+            else:
+                record_shard_request(endpoint, "ok")
+                replies[endpoint] = future.result()
+        return replies
+
+    def refresh(self, reload: bool = False) -> bool:
+        """
+        Re-read the size, metric and generation of every shard that answers,
+        first asking each to open its newest version when ``reload``. Returns
+        True if the combined generation changed; shards that did not answer
+        count with their last known generation.
+        """
+        reloaded = self._scatter("POST", "/reload", b"", timeout=self.reload_timeout) if reload else {}
+        states = self._scatter("GET", "/health")
+        unavailable = [endpoint for endpoint in self.endpoints if endpoint not in states]
+        if not states:
+            raise ShardUnavailable(f"No index shard answered /health within {self.deadline * 1000:.0f} ms.")
+        if unavailable:
+            print(f"Index shards unavailable: {', '.join(unavailable)}")
+        metrics = {state["metric"] for state in states.values()}
+        if len(metrics) != 1:
+            raise ValueError(f"Shards disagree on the metric: {sorted(metrics)}")
+        for endpoint, state in states.items():
+            # The reply to /reload names the version the shard has just opened
+            self.generations[endpoint] = reloaded.get(endpoint, state)["generation"]
+        generation = hashlib.blake2b(
+            "\0".join(f"{endpoint}={self.generations.get(endpoint)}" for endpoint in self.endpoints).encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+        changed = generation != self.generation
+        self.metric, self._count, self.generation = metrics.pop(), sum(state["count"] for state in states.values()), generation
+        self.unavailable = unavailable
+        return changed
+
+    def search(self, query: np.ndarray, k: int) -> List[Hit]:
+        body = np.ascontiguousarray(query, dtype="<f4").tobytes()
+        replies = self._scatter("POST", f"/search?k={k}", body)
+        if not replies:
+            raise ShardUnavailable(f"No index shard answered within {self.deadline * 1000:.0f} ms.")
+        rows = [row for reply in replies.values() for row in reply["hits"]]
+        rows.sort(key=lambda row: row[1], reverse=self.metric == "ip")
+        return [Hit(int(position), float(score), Chunk(**chunk)) for position, score, chunk in rows[:k]]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+def sharded_index_from_env() -> Optional[ShardedIndex]:
+    endpoints = [endpoint.strip() for endpoint in os.getenv("INDEX_SHARDS", "").split(",") if endpoint.strip()]
+    if not endpoints:
+        return None
+    return ShardedIndex(
+        endpoints,
+        float(os.getenv("INDEX_SHARD_DEADLINE_MS", str(DEFAULT_DEADLINE_MS))),
+        float(os.getenv("INDEX_SHARD_RELOAD_TIMEOUT_S", str(DEFAULT_RELOAD_TIMEOUT_S))),
+    )
+
+
+def split(chunks_path: str, out_root: str, shards: int, model_name: str, workers: int = 1) -> List[str]:
+    """Split ``chunks_path`` into ``shards`` contiguous parts, each built and published as ``<out_root>/shard-NNN``."""
+    chunks = list(iter_chunks_jsonl(chunks_path))
+    size = -(-len(chunks) // shards)
+    roots: List[str] = []
+    for number in range(shards):
+        part = chunks[number * size:(number + 1) * size]
+        if not part:
+            break
+        root = os.path.join(out_root, f"{SHARD_PREFIX}{number:03d}")
+        os.makedirs(root, exist_ok=True)
+        part_path = os.path.join(root, "chunks.jsonl")
+        write_chunks_jsonl(part, part_path)
+        builder = IndexBuilder(model_name, workers)
+        with new_version(root) as staging:
+            staging.counts["chunks"] = builder.build(part_path, staging.path, os.path.join(root, BUILD_DIR))
+            staging.extra = index_metadata(model_name, builder.dimension, "ip", {"shard": number, "of": shards})
+            staging.extra["sources"] = source_digests((chunk.source, chunk.text) for chunk in part)
+        os.remove(part_path)
+        roots.append(root)
+    return roots
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    split_parser = commands.add_parser("split", help="Build one published index per shard")
+    split_parser.add_argument("chunks", help="JSONL file with one chunk per line")
+    split_parser.add_argument("out", help="Directory to create shard-NNN roots in")
+    split_parser.add_argument("--shards", type=int, required=True)
+    split_parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    split_parser.add_argument("--workers", type=int, default=int(os.getenv("INGEST_WORKERS", "1")))
+    args = parser.parse_args()
+
+    roots = split(args.chunks, args.out, args.shards, args.model, args.workers)
+    print(f"Built {len(roots)} shards under {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Sentence-level index over ingested chunks, for extractive answers.
+
+Every chunk is split with ``curated_sentence_split`` once, at ingestion, and
+each sentence is embedded with the same encoder as the chunks. Sentences are
+stored contiguously in one ``float32`` matrix; ``offsets[i]:offsets[i + 1]``
+are the rows belonging to chunk ``i`` (the chunk's position in the main index).
+At query time the sentences of the retrieved chunks are scored against the
+query vector with a single matrix-vector product.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+from .encoders import Encoder
+from .text import curated_sentence_split
+
+SENTENCES_FILE = "sentences.json"
+SENTENCE_EMBEDDINGS_FILE = "sentence_embeddings.npy"
+
+
+@dataclass
+class SentenceMatch:
+    position: int
+    sentences: List[str]
+    score: float
+
+
+class SentenceIndex:
+    def __init__(self, sentences: List[str], vectors: np.ndarray, offsets: np.ndarray) -> None:
+        if len(sentences) != vectors.shape[0] or offsets[-1] != len(sentences):
+            raise ValueError("Mismatch between sentence embeddings and sentences length.")
+        self.sentences = sentences
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.offsets.nbytes + sum(map(sys.getsizeof, self.sentences))
+
+    @classmethod
+    def build(cls, texts: Sequence[str], encoder: Encoder) -> "SentenceIndex":
+        sentences: List[str] = []
+        offsets = [0]
+        for text in texts:
+            sentences.extend(curated_sentence_split(text))
+            offsets.append(len(sentences))
+        if sentences:
+            vectors = encoder.encode(sentences)
+        else:
+            vectors = np.zeros((0, encoder.dimension), dtype=np.float32)
+        return cls(sentences, vectors, np.array(offsets))
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / SENTENCE_EMBEDDINGS_FILE, self.vectors)
+        with (directory / SENTENCES_FILE).open("w", encoding="utf-8") as f:
+            json.dump({"offsets": self.offsets.tolist(), "sentences": self.sentences}, f)
+
+    @classmethod
+    def load(cls, directory: Path) -> "SentenceIndex":
+        with (directory / SENTENCES_FILE).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        vectors = np.load(directory / SENTENCE_EMBEDDINGS_FILE)
+        return cls(data["sentences"], vectors, np.array(data["offsets"]))
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (directory / SENTENCES_FILE).exists() and (directory / SENTENCE_EMBEDDINGS_FILE).exists()
+
+    def best(self, query: np.ndarray, positions: Sequence[int], limit: int) -> SentenceMatch:
+        """
+        The chunk among ``positions`` holding the best-scoring sentence, with
+        its top ``limit`` sentences ordered by score.
+        """
+        rows = np.concatenate(
+            [np.arange(self.offsets[p], self.offsets[p + 1]) for p in positions] or [np.zeros(0, np.int64)]
+        )
+        if rows.size == 0:
+            return SentenceMatch(positions[0] if positions else -1, [], 0.0)
+
+        scores = self.vectors[rows] @ np.asarray(query, dtype=np.float32)
+        best_row = int(rows[int(np.argmax(scores))])
+        position = int(np.searchsorted(self.offsets, best_row, side="right") - 1)
+
+        in_chunk = (rows >= self.offsets[position]) & (rows < self.offsets[position + 1])
+        chunk_rows, chunk_scores = rows[in_chunk], scores[in_chunk]
+        order = np.argsort(-chunk_scores)[:limit]
+        return SentenceMatch(
+            position,
+            [self.sentences[int(chunk_rows[i])] for i in order],
+            float(chunk_scores[order[0]]),
+        )
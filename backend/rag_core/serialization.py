@@ -0,0 +1,48 @@
+"""
+Fast JSON bodies for responses we construct ourselves.
+
+FastAPI's default path re-validates a returned model against ``response_model``,
+walks it with ``jsonable_encoder`` and then calls ``json.dumps``. For models
+built from data that has already been validated (settings, ingested chunks,
+generator output), endpoints instead build them with ``model_construct`` and
+return ``Response(model_body(model), media_type=JSON_MEDIA_TYPE)``.
+
+orjson handles ``date``/``datetime`` natively; pydantic URL types fall back to
+``str``. Without orjson installed the stdlib encoder is used with the same
+compact output.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return dict(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def model_body(model: BaseModel) -> bytes:
+    """Serialize a (possibly ``model_construct``-ed) model without re-validating it."""
+    return dumps(dict(model))
@@ -0,0 +1,238 @@
+"""
+RAG service for querying mutual fund facts
+Uses a FAISS vector store and Google Gemini for answer generation
+
+Shared by ``backend/main.py`` and the serverless copy in
+``frontend/api/fastapi``; configuration comes from environment variables.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional
+
+from . import artifacts, memory
+from .catalogue import registry_from_env
+from .completion_cache import completion_cache_from_env
+from .encoders import load_encoder
+from .engine import RagEngine
+from .generators import ExtractiveGenerator, RuleBasedGenerator, gemini_from_env
+from .indexes import FAISS_FILE, SHARDS_FILE, confidence, load_faiss_store
+from .quality import governor_from_env
+from .rerank import reranker_from_config
+from .scatter import sharded_index_from_env
+from .startup import NotReady, Startup
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def prepare_vector_store_path() -> str:
+    """
+    Ensure FAISS data is available in environments with read-only filesystems (e.g. Vercel).
+    Copies the bundled ./data/faiss_index into /tmp if running on Vercel.
+    """
+    bundled_path = os.getenv("VECTOR_STORE_PATH", "./data/faiss_index")
+    if os.getenv("VERCEL"):
+        tmp_dir = os.path.join(tempfile.gettempdir(), "faiss_index")
+        if not os.path.exists(tmp_dir):
+            try:
+                if not os.path.exists(bundled_path):
+                    raise FileNotFoundError(
+                        f"Bundled FAISS data not found at {bundled_path}. "
+                        "Ensure data/faiss_index is committed."
+                    )
+                shutil.copytree(bundled_path, tmp_dir)
+                print(f"Copied FAISS index to temporary directory: {tmp_dir}")
+            except Exception as copy_err:
+                print(f"Failed to copy FAISS data to /tmp: {copy_err}")
+        return tmp_dir
+    return bundled_path
+
+
+class RAGService:
+    """RAG service for retrieving and answering MF factual queries"""
+
+    def __init__(self, background: bool = False):
+        self.engine = None
+        self.metadata_store = {}
+        self.generation = None
+        self.changed_sources = None  # sources the last reload changed; None means all
+        self.catalogues = None
+        self.shards = None
+        self.is_ready_flag = False
+        self.startup = Startup()
+        if not background:
+            # Otherwise the entry point calls startup.start(self.load) once it is serving
+            self._initialize()
+
+    def _initialize(self):
+        """Initialize embeddings, LLM, and load vector store; failures are logged"""
+        self.startup.run(self.load)
+
+    def load(self, startup: Startup) -> None:
+        """Load the encoder, engine and vector store as timed startup phases"""
+        with startup.phase("encoder"):
+            model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+            encoder = load_encoder(model_name)
+            print(f"Hugging Face embeddings initialised with '{model_name}'")
+
+        with startup.phase("engine"):
+            engine = RagEngine(
+                encoder,
+                generator=gemini_from_env(os.getenv("GEMINI_API_KEY")),
+                fallback=RuleBasedGenerator(),
+                degraded=(ExtractiveGenerator(disclaimer=True), RuleBasedGenerator()),
+                governor=governor_from_env(),
+                completion_cache=completion_cache_from_env(),
+                index_name="faiss",
+                embedding_cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+                reranker=reranker_from_config(
+                    os.getenv("RERANK_MODEL"),
+                    candidates=int(os.getenv("RERANK_CANDIDATES", "20")),
+                    budget_ms=float(os.getenv("RERANK_BUDGET_MS", "150")),
+                ),
+            )
+            # Per-AMC indexes under CATALOGUE_ROOT, opened on first use
+            self.catalogues = registry_from_env()
+            # Sharded mode: the index lives in INDEX_SHARDS shard server processes
+            self.shards = sharded_index_from_env()
+            self.engine = engine
+
+        with startup.phase("index"):
+            self._load_vector_store()
+            if not self.is_ready() and self.catalogues is None:
+                raise FileNotFoundError("Vector store not loaded. Please run data ingestion first.")
+
+    def _load_vector_store(self) -> bool:
+        """
+        Load the published FAISS index and its manifest if ingestion has produced them.
+        Returns False when the published generation is already loaded.
+        """
+        if self.shards is not None:
+            return self._load_shards()
+        root = prepare_vector_store_path()
+        vector_store_path = artifacts.resolve(root)
+        if not any(os.path.exists(os.path.join(vector_store_path, name)) for name in (FAISS_FILE, SHARDS_FILE)):
+            print(f"Vector store not found at {vector_store_path}. Run ingestion first.")
+            return False
+
+        # Size checks only; a mismatch keeps the index already being served
+        manifest = artifacts.verify(vector_store_path)
+        generation = artifacts.generation(manifest)
+        if generation is not None and generation == self.generation and self.is_ready():
+            print(f"Vector store generation {generation} already loaded")
+            return False
+        artifacts.check_compatible(manifest, self.engine.encoder.model_name, self.engine.encoder.dimension)
+        index = load_faiss_store(vector_store_path, self.engine.encoder)
+        artifacts.check_count(manifest, "chunks", len(index))
+        self.engine.set_index(index)
+        previous, self.metadata_store = self.metadata_store, {
+            key: value for key, value in (manifest or {}).items() if key != "files"
+        }
+        self.changed_sources = artifacts.changed_sources(previous, self.metadata_store)
+        self.generation = generation
+        if self.engine.completion_cache is not None:
+            # Keep completions whose funds this generation did not change
+            self.engine.completion_cache.refresh(generation, self.metadata_store.get("sources"))
+        self.is_ready_flag = True
+        print(f"Vector store loaded from {vector_store_path} (generation {generation})")
+        return True
+
+    def _load_shards(self) -> bool:
+        """Serve the shard servers' index; reloading asks each shard to open its newest version."""
+        changed = self.shards.refresh(reload=self.is_ready())
+        self.metadata_store = {"shards": self.shards.endpoints, "unavailable_shards": self.shards.unavailable}
+        if not changed and self.is_ready():
+            print(f"Sharded index generation {self.shards.generation} already loaded")
+            return False
+        self.engine.set_index(self.shards)
+        self.changed_sources = None
+        self.generation = self.shards.generation
+        if self.engine.completion_cache is not None:
+            self.engine.completion_cache.refresh(self.generation)
+        self.is_ready_flag = True
+        answered = len(self.shards.endpoints) - len(self.shards.unavailable)
+        print(f"Sharded index: {len(self.shards)} vectors across {answered} of {len(self.shards.endpoints)} shards")
+        return True
+
+    def reload(self) -> bool:
+        """Reload the vector store after re-ingestion; False if the generation is unchanged"""
+        if self.startup.state == "loading":
+            raise NotReady("The service is still loading; retry the reload once /health/ready is ok.")
+        if self.engine is None:
+            self._initialize()
+            return self.is_ready()
+        loaded = self._load_vector_store()
+        if loaded and not self.startup.ready:
+            # Startup found no index; this reindex published one
+            self.startup.mark_ready()
+        return loaded
+
+    def memory_components(self) -> memory.Components:
+        """Bytes held by the encoder, index, caches, manifest and open catalogues"""
+        components = memory.engine_components(self.engine)
+        components["metadata_store"] = memory.Component(
+            memory.generation_sizeof("service.metadata_store", self.metadata_store, self.generation)
+        )
+        if self.catalogues is not None:
+            components["catalogues"] = memory.Component(self.catalogues.resident_bytes, "mapped")
+        return components
+
+    def is_ready(self) -> bool:
+        """Check if RAG service is ready"""
+        return self.is_ready_flag and self.engine is not None and self.engine.is_ready
+
+    def query(self, question: str, k: int = 3, catalogue: Optional[str] = None) -> Dict:
+        """
+        Query the RAG system and return answer with source
+        Returns dict with answer, source, and confidence
+        Searches the named (or routed) catalogue's index instead of the default one when catalogues are configured
+        """
+        if self.catalogues is not None and self.engine is not None:
+            catalogue = catalogue or self.catalogues.route(question)
+        if catalogue and self.engine is not None and (self.catalogues is None or catalogue not in self.catalogues):
+            return {
+                "answer": f"Unknown catalogue '{catalogue}'.",
+                "source": "",
+                "confidence": 0.0
+            }
+        if self.engine is None or (not catalogue and not self.is_ready()):
+            return {
+                "answer": "Vector store not loaded. Please run data ingestion first.",
+                "source": "",
+                "confidence": 0.0
+            }
+
+        try:
+            # Retrieve relevant documents
+            index = self.catalogues.get(catalogue) if catalogue else self.engine.index
+            hits = self.engine.retrieve(question, k, index)
+
+            if not hits:
+                return {
+                    "answer": "I couldn't find relevant information for your query. Please try rephrasing or ask about expense ratio, exit load, minimum SIP, lock-in period, riskometer, or benchmark.",
+                    "source": "",
+                    "confidence": 0.0
+                }
+
+            # The most relevant document provides the source URL
+            top_hit = hits[0]
+
+            # Generate concise answer (Gemini, or extractive/rule-based under load or on failure)
+            answer = self.engine.generate(question, hits)
+
+            return {
+                "answer": answer.text,
+                "source": top_hit.chunk.source,
+                "confidence": confidence(top_hit.score, index.metric),
+                "tier": answer.generator,
+                "sources": self.engine.context_sources(hits),
+                "catalogue": catalogue
+            }
+
+        except Exception as e:
+            return {
+                "answer": f"Error processing query: {str(e)}",
+                "source": "",
+                "confidence": 0.0
+            }
@@ -0,0 +1,133 @@
+"""
+One index shard served over local HTTP, for scatter-gather search.
+
+Each process memory-maps one published shard root (``docstore.json`` plus
+``index.faiss`` or ``embeddings.npy``, as written by
+``python -m rag_core.scatter split``) and answers:
+
+- ``POST /search?k=<k>``: the body is the query vector as raw little-endian
+  ``float32``. The response is ``{"metric": ..., "hits": [[position, score,
+  chunk], ...]}``, where ``position`` is the row within this shard.
+- ``GET /health``: ``{"status", "count", "metric", "generation"}``.
+- ``POST /reload``: reopen the shard if a new version was published.
+
+It uses only the standard library HTTP server, one thread per connection
+with keep-alive, so ``rag_core.scatter.ShardedIndex`` can hold one
+persistent connection per shard and client thread.
+
+Usage (from the backend directory):
+    python -m rag_core.shard_server ./data/shards/shard-000 --port 8101
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from . import artifacts
+from .catalogue import open_index
+from .indexes import VectorIndex
+
+
+class ShardState:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.index: Optional[VectorIndex] = None
+        self.generation: Optional[str] = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> bool:
+        """Open the published version if it is not the one being served."""
+        with self._lock:
+            path = artifacts.resolve(self.root)
+            manifest = artifacts.verify(path)
+            generation = artifacts.generation(manifest)
+            if self.index is not None and generation is not None and generation == self.generation:
+                return False
+            index, _ = open_index(path)
+            artifacts.check_count(manifest, "chunks", len(index))
+            self.index, self.generation = index, generation
+            print(f"Shard {self.root}: {len(index)} vectors (generation {generation})")
+            return True
+
+    def current(self) -> Tuple[VectorIndex, Optional[str]]:
+        return self.index, self.generation
+
+
+def make_handler(state: ShardState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for the scatter client
+
+        def _send(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if urlparse(self.path).path != "/health":
+                self._send(404, {"detail": "Not found"})
+                return
+            index, generation = state.current()
+            self._send(200, {"status": "ok", "count": len(index), "metric": index.metric, "generation": generation})
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if url.path == "/reload":
+                try:
+                    changed = state.reload()
+                except Exception as e:
+                    self._send(500, {"detail": f"Reload failed: {e}"})
+                    return
+                self._send(200, {"reloaded": changed, "generation": state.generation})
+                return
+            if url.path != "/search":
+                self._send(404, {"detail": "Not found"})
+                return
+            k = int(parse_qs(url.query).get("k", ["5"])[0])
+            index, _ = state.current()
+            hits = index.search(np.frombuffer(body, dtype="<f4"), k)
+            self._send(
+                200,
+                {"metric": index.metric, "hits": [[hit.position, hit.score, asdict(hit.chunk)] for hit in hits]},
+            )
+
+        def log_message(self, format: str, *args) -> None:  # one line per search is too noisy
+            pass
+
+    return Handler
+
+
+def serve(root: str, host: str = "127.0.0.1", port: int = 8101) -> None:
+    state = ShardState(root)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    print(f"Serving shard {root} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="Published shard root")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    args = parser.parse_args()
+    serve(args.root, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
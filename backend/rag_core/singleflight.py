@@ -0,0 +1,58 @@
+"""
+Single-flight coalescing of identical in-flight queries.
+
+When a question trends, many identical ``/query`` requests arrive within
+the same second. ``SingleFlight.run`` lets the first request for a key (the
+normalized question) start the computation on a worker thread. Requests
+that arrive for the same key before it finishes await that computation
+instead of starting their own, so one embed, search and LLM call serves
+all of them.
+
+- Errors propagate to every waiter. The key is released as soon as the
+  computation finishes, so the next request retries instead of getting a
+  cached failure.
+- A cancelled waiter (client disconnect, timeout) only stops waiting. The
+  shared computation keeps running for the others, and its result is
+  dropped if nobody is left.
+- Only computations in progress are shared; nothing is cached once they finish.
+
+Leaders and followers are counted in ``mf_coalesced_requests_total``.
+Stage timings are recorded on the leader's request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from typing import Callable, Dict, TypeVar
+
+from .telemetry import record_coalesce
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _release(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved when every waiter was cancelled
+
+    async def run(self, key: str, fn: Callable[[], T]) -> T:
+        """Result of ``fn()`` run on a worker thread, shared with concurrent calls for ``key``."""
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(None, contextvars.copy_context().run, fn)
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+            record_coalesce("leader")
+        else:
+            record_coalesce("follower")
+        return await asyncio.shield(future)
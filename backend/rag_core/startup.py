@@ -0,0 +1,198 @@
+"""
+Background model and index loading with liveness and readiness probes.
+
+Loading the encoder and index before the server binds means an orchestrator
+that probes the port (or ``/health``) sees nothing for as long as loading
+takes, and kills slow-starting pods. Instead each entry point binds first
+and runs its loading with ``Startup.start`` on a background thread, as a
+sequence of named phases (encoder, engine, index, warmup, ...):
+
+- ``GET /health/live`` answers 200 as soon as the process serves HTTP;
+- ``GET /health/ready`` answers 200 once loading finished, and 503 while it
+  is still running or after it failed. Either way the body lists each phase
+  with its status and duration, so slow starts can be followed;
+- when ``require_ready`` is set (``QUERY_REQUIRES_READY=1``, or the
+  ``query_requires_ready`` setting for ``app/main.py``), ``/query`` answers
+  503 with ``Retry-After`` until ready, instead of the "not loaded" answer.
+
+Each phase is logged with its duration and exported as
+``mf_startup_phase_seconds{phase}``; ``mf_ready`` is 1 once loading finished.
+
+``BACKGROUND_LOADING=0`` loads before the app binds, as before. It defaults
+to off on Vercel, where there is no long-lived process to load in.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .telemetry import READY, STARTUP_PHASE_SECONDS
+
+DEFAULT_RETRY_AFTER_SECONDS = 5
+
+
+class NotReady(RuntimeError):
+    """Raised for work that needs the model or index while they are still loading."""
+
+
+@dataclass
+class Phase:
+    name: str
+    status: str = "running"  # running, done, failed
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Startup:
+    """Progress of one loading run; ``state`` goes pending -> loading -> ready or failed."""
+
+    def __init__(self) -> None:
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.phases: List[Phase] = []
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("ready", "failed")
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time one loading phase; an exception marks it (and the run) failed."""
+        current = Phase(name)
+        with self._lock:
+            self.phases.append(current)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            current.status, current.error = "failed", str(e)
+            raise
+        else:
+            current.status = "done"
+        finally:
+            current.seconds = time.perf_counter() - started
+            STARTUP_PHASE_SECONDS.set(current.seconds, phase=name)
+            print(f"Startup phase '{name}' {current.status} in {current.seconds:.2f}s")
+
+    def run(self, load: Callable[["Startup"], None]) -> bool:
+        """Run ``load(self)`` in this thread; returns True when it finished without raising."""
+        with self._lock:
+            self.state, self.error, self.phases = "loading", None, []
+            self._started, self._finished = time.monotonic(), None
+        READY.set(0)
+        try:
+            load(self)
+        except Exception as e:
+            self.state, self.error = "failed", str(e)
+            print(f"Startup failed after {self.elapsed:.2f}s: {e}")
+        else:
+            self.state = "ready"
+            READY.set(1)
+            print(f"Startup ready after {self.elapsed:.2f}s")
+        self._finished = time.monotonic()
+        return self.ready
+
+    def mark_ready(self) -> None:
+        """Record that a later load (a reindex after a failed startup) made the service ready."""
+        self.state, self.error = "ready", None
+        READY.set(1)
+
+    def start(self, load: Callable[["Startup"], None], background: Optional[bool] = None) -> None:
+        """Run ``load`` on a daemon thread, or inline when background loading is off."""
+        background = background_loading_enabled() if background is None else background
+        if not background:
+            self.run(load)
+            return
+        self.state = "loading"
+        threading.Thread(target=self.run, args=(load,), name="startup", daemon=True).start()
+
+    @property
+    def elapsed(self) -> float:
+        if self._started is None:
+            return 0.0
+        return (self._finished or time.monotonic()) - self._started
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            phases = [asdict(phase) for phase in self.phases]
+        return {"status": self.state, "elapsed_seconds": round(self.elapsed, 3), "phases": phases, "error": self.error}
+
+
+def background_loading_enabled() -> bool:
+    default = "0" if os.getenv("VERCEL") else "1"
+    return os.getenv("BACKGROUND_LOADING", default).lower() not in ("0", "false", "no")
+
+
+def require_ready_from_env() -> bool:
+    return os.getenv("QUERY_REQUIRES_READY", "0").lower() in ("1", "true", "yes")
+
+
+class ReadinessMiddleware:
+    """ASGI middleware answering 503 on ``paths`` until ``startup`` is ready."""
+
+    def __init__(
+        self, app, startup: Startup, paths: Iterable[str] = ("/query",), retry_after_seconds: int = DEFAULT_RETRY_AFTER_SECONDS
+    ) -> None:
+        self.app = app
+        self.startup = startup
+        self.paths = frozenset(paths)
+        self.retry_after = str(retry_after_seconds)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope.get("path") not in self.paths or self.startup.ready:
+            await self.app(scope, receive, send)
+            return
+        if self.startup.state == "failed":
+            message = f"The service failed to load: {self.startup.error}"
+        else:
+            message = "The service is still loading. Please retry shortly."
+        body = json.dumps({"detail": message}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", self.retry_after.encode("ascii")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def install(
+    app, startup: Startup, require_ready: Optional[bool] = None, paths: Iterable[str] = ("/query",)
+) -> None:
+    """
+    Add ``/health/live`` and ``/health/ready`` to ``app``, and the ``/query``
+    readiness gate when ``require_ready`` (default: ``QUERY_REQUIRES_READY``).
+    Call this right after ``admission.install`` so requests turned away
+    while loading do not take a query slot.
+    """
+    from fastapi.responses import JSONResponse
+
+    require_ready = require_ready_from_env() if require_ready is None else require_ready
+    if require_ready:
+        app.add_middleware(ReadinessMiddleware, startup=startup, paths=tuple(paths))
+
+    @app.get("/health/live", include_in_schema=False)
+    async def live() -> dict:
+        return {"status": "alive"}
+
+    @app.get("/health/ready", include_in_schema=False)
+    async def ready() -> JSONResponse:
+        return JSONResponse(startup.snapshot(), status_code=200 if startup.ready else 503)
@@ -0,0 +1,534 @@
+"""
+Request tracing and stage timing instrumentation.
+
+Every request gets a ``RequestTrace`` stored in a context variable. Code on the
+query path wraps its work in ``stage("embed")`` style blocks; each block is
+recorded in a per-stage histogram, appended to the request's ``Server-Timing``
+header and, when OpenTelemetry is installed, emitted as a span.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:  # OpenTelemetry is optional; without it spans are no-ops.
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - depends on the deployment
+    otel_trace = None
+
+
+STAGES = ("validation", "embed", "search", "rerank", "context", "llm", "extractive", "fallback")
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ``path`` label of requests that matched no route (404 scans, typos), so they share one series
+UNMATCHED_PATH = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        lines: List[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal Prometheus text-format registry with no external dependencies."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before rendering."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as exc:  # a broken collector must not break /metrics
+                print(f"Metrics collector failed: {exc}")
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "mf_stage_duration_seconds", "Time spent in each stage of the query path.", ("stage",)
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "mf_request_duration_seconds", "End-to-end HTTP request latency.", ("method", "path", "status")
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "mf_cache_lookups_total", "Cache lookups by cache name and result.", ("cache", "result")
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "mf_cache_hit_ratio", "Fraction of lookups served from each cache.", ("cache",)
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "mf_llm_fallbacks_total", "Answers produced by the rule-based fallback instead of the LLM.", ("reason",)
+)
+RERANKS = REGISTRY.counter(
+    "mf_rerank_total", "Rerank stage outcomes (scored, cached, timeout, skipped_busy, error).", ("outcome",)
+)
+COALESCED = REGISTRY.counter(
+    "mf_coalesced_requests_total", "Query computations shared through single-flight, by role (leader, follower).", ("role",)
+)
+ADMISSIONS = REGISTRY.counter(
+    "mf_admission_total", "Admission decisions for limited paths (admitted, queue_full, standing_queue).", ("outcome",)
+)
+ADMISSION_QUEUE = REGISTRY.histogram(
+    "mf_admission_queue_seconds", "Time admitted requests waited for a query slot."
+)
+ANSWER_TIERS = REGISTRY.counter(
+    "mf_answer_tier_total", "Answers by the generator tier that produced them (llm, extractive, rules).", ("tier",)
+)
+QUALITY_PRESSURE = REGISTRY.gauge(
+    "mf_quality_pressure", "LLM load relative to its in-flight and p95 targets; above 1 degrades answers."
+)
+CACHE_REFRESH_ENTRIES = REGISTRY.counter(
+    "mf_cache_refresh_entries_total",
+    "Cache entries preserved or invalidated when a new index generation is loaded.",
+    ("cache", "outcome"),
+)
+CACHE_REFRESH_PRESERVED = REGISTRY.gauge(
+    "mf_cache_refresh_preserved_entries", "Cache entries preserved by the most recent refresh.", ("cache",)
+)
+CATALOGUE_LOAD_SECONDS = REGISTRY.histogram(
+    "mf_catalogue_load_seconds", "Time to open a catalogue index on first use."
+)
+CATALOGUE_RESIDENT = REGISTRY.gauge(
+    "mf_catalogue_resident_indexes", "Catalogue indexes currently open."
+)
+CATALOGUE_RESIDENT_BYTES = REGISTRY.gauge(
+    "mf_catalogue_resident_bytes", "Bytes charged to open catalogue indexes against the memory budget."
+)
+CATALOGUE_EVICTIONS = REGISTRY.counter(
+    "mf_catalogue_evictions_total", "Catalogue indexes closed to stay within the memory budget."
+)
+SHARD_REQUESTS = REGISTRY.counter(
+    "mf_shard_requests_total", "Scatter-gather shard searches by shard and outcome (ok, timeout, error).", ("shard", "outcome")
+)
+STARTUP_PHASE_SECONDS = REGISTRY.gauge(
+    "mf_startup_phase_seconds", "Duration of each phase of the most recent model and index loading.", ("phase",)
+)
+READY = REGISTRY.gauge(
+    "mf_ready", "1 once model and index loading finished, 0 while loading or after it failed."
+)
+PROFILES = REGISTRY.counter(
+    "mf_profiles_total", "Admin profiling captures by kind (sample, request).", ("kind",)
+)
+PROCESS_RSS_BYTES = REGISTRY.gauge(
+    "mf_process_rss_bytes", "Resident set size of this worker process."
+)
+MEMORY_COMPONENT_BYTES = REGISTRY.gauge(
+    "mf_memory_component_bytes", "Estimated bytes held by each component, by kind (heap, mapped, disk).", ("component", "kind")
+)
+INDEX_SIZE = REGISTRY.gauge(
+    "mf_index_vectors", "Number of vectors in the loaded retrieval index.", ("index",)
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_cache_refresh(cache: str, preserved: int, invalidated: int) -> None:
+    CACHE_REFRESH_ENTRIES.inc(preserved, cache=cache, outcome="preserved")
+    CACHE_REFRESH_ENTRIES.inc(invalidated, cache=cache, outcome="invalidated")
+    CACHE_REFRESH_PRESERVED.set(preserved, cache=cache)
+    print(f"Cache '{cache}' refresh: {preserved} entries preserved, {invalidated} invalidated")
+
+
+def _refresh_cache_ratios() -> None:
+    caches = {key[0] for key in list(CACHE_LOOKUPS._values)}
+    for cache in caches:
+        hits = CACHE_LOOKUPS.value(cache=cache, result="hit")
+        total = hits + CACHE_LOOKUPS.value(cache=cache, result="miss")
+        CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=cache)
+
+
+REGISTRY.add_collector(_refresh_cache_ratios)
+
+
+def record_fallback(reason: str) -> None:
+    LLM_FALLBACKS.inc(reason=reason)
+
+
+def record_rerank(outcome: str) -> None:
+    RERANKS.inc(outcome=outcome)
+
+
+def record_coalesce(role: str) -> None:
+    COALESCED.inc(role=role)
+
+
+def record_admission(outcome: str) -> None:
+    ADMISSIONS.inc(outcome=outcome)
+
+
+def record_answer_tier(tier: str) -> None:
+    ANSWER_TIERS.inc(tier=tier)
+
+
+def record_catalogue_eviction() -> None:
+    CATALOGUE_EVICTIONS.inc()
+
+
+def set_catalogue_residency(indexes: int, nbytes: int) -> None:
+    CATALOGUE_RESIDENT.set(indexes)
+    CATALOGUE_RESIDENT_BYTES.set(nbytes)
+
+
+def record_shard_request(shard: str, outcome: str) -> None:
+    SHARD_REQUESTS.inc(shard=shard, outcome=outcome)
+
+
+def record_profile(kind: str) -> None:
+    PROFILES.inc(kind=kind)
+
+
+def set_index_size(index: str, size: int) -> None:
+    INDEX_SIZE.set(size, index=index)
+
+
+# ---------------------------------------------------------------------------
+# Tracing
+# ---------------------------------------------------------------------------
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: object) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+class _NoopTracer:
+    @contextmanager
+    def start_as_current_span(self, name: str) -> Iterator[_NoopSpan]:
+        yield _NoopSpan()
+
+
+_tracer = None
+
+
+def configure_tracing(service_name: str = "mf-assistant") -> None:
+    """
+    Wire OpenTelemetry spans to an OTLP exporter when one is configured.
+
+    Without ``OTEL_EXPORTER_OTLP_ENDPOINT`` (or without the SDK installed) the
+    local no-op tracer is used and stage timing still works.
+    """
+    global _tracer
+    _tracer = _NoopTracer()
+    if otel_trace is None:
+        return
+    if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            otel_trace.set_tracer_provider(provider)
+        except ImportError as exc:
+            print(f"OpenTelemetry exporter unavailable, using no-op tracer: {exc}")
+            return
+    _tracer = otel_trace.get_tracer("mf_assistant")
+
+
+def _get_tracer():
+    if _tracer is None:
+        configure_tracing()
+    return _tracer
+
+
+@dataclass
+class RequestTrace:
+    """Stage timings collected for a single request."""
+
+    stages: List[Tuple[str, float]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages.append((name, seconds))
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar(
+    "mf_request_trace", default=None
+)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block of the query path and attribute it to ``name``."""
+    started = time.perf_counter()
+    with _get_tracer().start_as_current_span(f"mf.{name}") as span:
+        try:
+            yield
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            STAGE_SECONDS.observe(elapsed, stage=name)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.add(name, elapsed)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that opens a ``RequestTrace`` per HTTP request, adds the
+    ``Server-Timing`` header and records the request latency histogram.
+
+    The histogram's ``path`` label is the matched route template
+    (``/admin/profile/requests/{profile_id}``, not the id), so the number of
+    series is bounded by the routes. Requests answered by a middleware before
+    routing (admission, readiness) are matched against ``router`` when given;
+    anything else is labelled ``UNMATCHED_PATH``.
+    """
+
+    def __init__(self, app, router=None) -> None:
+        self.app = app
+        self.router = router
+
+    def _route_path(self, scope) -> str:
+        route = scope.get("route")
+        if route is None and self.router is not None:
+            from starlette.routing import Match
+
+            partial = None
+            for candidate in self.router.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = candidate
+                    break
+                if match == Match.PARTIAL and partial is None:
+                    partial = candidate
+            route = route or partial
+        return getattr(route, "path", None) or UNMATCHED_PATH
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        status = {"code": 500}
+
+        async def send_with_timing(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - trace.started,
+                method=scope.get("method", ""),
+                path=self._route_path(scope),
+                status=str(status["code"]),
+            )
+
+
+def install(app, metrics_path: str = "/metrics") -> None:
+    """Attach timing middleware and the Prometheus endpoint to a FastAPI app."""
+    from fastapi import Response
+
+    configure_tracing(getattr(app, "title", "mf-assistant"))
+    app.add_middleware(TimingMiddleware, router=app.router)
+
+    @app.get(metrics_path, include_in_schema=False)
+    async def metrics() -> Response:
+        return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
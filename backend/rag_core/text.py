@@ -1,3 +1,7 @@
+"""
+Text helpers shared by the validators and the extractive answer path.
+"""
+
 import re
 from typing import List
 
@@ -0,0 +1,139 @@
+"""
+Pre-serialized responses for refusals and the most frequent questions.
+
+At startup (and after a reindex) each entry point runs its normal query path
+once for every question in the warm list and keeps the resulting JSON bytes.
+``/query`` then serves those bytes directly, skipping retrieval, generation,
+response-model construction and serialization. Questions are matched after
+``normalize_question``, so casing and spacing differences still hit.
+
+Each body is stored with the sources (fund URLs or fund ids) of the chunks it
+was built from. After a partial re-ingestion, ``warm(..., changed=...)``
+keeps the bodies whose sources did not change and recomputes only the rest.
+
+The default list is the seven fact types the README advertises for each fund.
+``WARM_QUESTIONS_FILE`` points at a replacement list (one question per line,
+``#`` comments allowed); ``WARMUP_ENABLED=0`` turns warm-up off. It defaults
+to off on Vercel, where every cold start would pay for it.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Collection, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .embedding_cache import normalize_question
+from .telemetry import record_cache_lookup, record_cache_refresh
+
+DEFAULT_WARM_FUNDS = [
+    "Nippon India Large Cap Fund",
+    "Nippon India Growth Mid Cap Fund",
+    "Nippon India Small Cap Fund",
+]
+
+DEFAULT_WARM_TEMPLATES = [
+    "What is the expense ratio of {fund}?",
+    "What is the exit load on {fund}?",
+    "What is the minimum SIP amount for {fund}?",
+    "Is there a lock-in period for {fund}?",
+    "What is the riskometer rating of {fund}?",
+    "What is the benchmark of {fund}?",
+    "How to download the capital gain statement for {fund}?",
+]
+
+
+def default_warm_questions() -> List[str]:
+    return [template.format(fund=fund) for template in DEFAULT_WARM_TEMPLATES for fund in DEFAULT_WARM_FUNDS]
+
+
+def load_warm_questions(path: Optional[str] = None) -> List[str]:
+    """Questions from ``path`` / ``WARM_QUESTIONS_FILE``, or the defaults."""
+    path = path or os.getenv("WARM_QUESTIONS_FILE")
+    if not path:
+        return default_warm_questions()
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def warmup_enabled() -> bool:
+    default = "0" if os.getenv("VERCEL") else "1"
+    return os.getenv("WARMUP_ENABLED", default).lower() not in ("0", "false", "no")
+
+
+@dataclass
+class WarmupReport:
+    questions: int
+    warmed: int
+    seconds: float
+    preserved: int = 0
+
+
+Prepared = Tuple[bytes, Collection[str]]  # JSON body, sources it was built from
+
+
+class PreparedResponses:
+    """Normalized question -> JSON body, rebuilt by ``warm``."""
+
+    def __init__(self) -> None:
+        self._bodies: Dict[str, bytes] = {}
+        self._sources: Dict[str, FrozenSet[str]] = {}
+        self.report: Optional[WarmupReport] = None
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    @property
+    def nbytes(self) -> int:
+        """Stored JSON bodies and their keys."""
+        bodies = self._bodies
+        return sum(len(body) + len(key) for key, body in bodies.items())
+
+    def get(self, question: str) -> Optional[bytes]:
+        body = self._bodies.get(normalize_question(question))
+        record_cache_lookup("warm", body is not None)
+        return body
+
+    def warm(
+        self,
+        questions: Iterable[str],
+        answer: Callable[[str], Optional[Prepared]],
+        changed: Optional[Set[str]] = None,
+    ) -> WarmupReport:
+        """
+        Build a new table from ``answer(question)`` and swap it in. ``answer``
+        returns ``None`` for responses that must not be served from the table
+        (index not loaded, no match, errors). With ``changed``, the sources a
+        re-ingestion touched, bodies built only from other sources are kept
+        instead of recomputed; ``None`` recomputes everything.
+        """
+        questions = list(questions)
+        started = time.perf_counter()
+        bodies: Dict[str, bytes] = {}
+        sources: Dict[str, FrozenSet[str]] = {}
+        preserved = 0
+        for question in questions:
+            key = normalize_question(question)
+            if changed is not None and key in self._bodies and self._sources[key].isdisjoint(changed):
+                bodies[key], sources[key] = self._bodies[key], self._sources[key]
+                preserved += 1
+                continue
+            try:
+                prepared = answer(question)
+            except Exception as e:
+                print(f"Warm-up failed for '{question}': {e}")
+                continue
+            if prepared is not None:
+                bodies[key], sources[key] = prepared[0], frozenset(prepared[1])
+        invalidated = len(self._bodies) - preserved
+        self._bodies, self._sources = bodies, sources
+        self.report = WarmupReport(len(questions), len(bodies), time.perf_counter() - started, preserved)
+        if changed is not None:
+            record_cache_refresh("warm", preserved, invalidated)
+        print(f"Warmed {len(bodies)}/{len(questions)} answers in {self.report.seconds:.2f}s")
+        return self.report
+
+    def clear(self) -> None:
+        self._bodies, self._sources = {}, {}
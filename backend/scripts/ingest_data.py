@@ -8,15 +8,17 @@ import requests
 from bs4 import BeautifulSoup
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-import pickle
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from rag_core.artifacts import index_metadata, new_version, resolve, source_digests
+from rag_core.index_builder import BUILD_DIR, IndexBuilder, write_chunks_jsonl
+from rag_core.indexes import Chunk
+
 load_dotenv()
 
 # Fund URLs to scrape
@@ -28,6 +30,14 @@ FUND_URLS = {
 
 ALLOWED_DOMAINS = os.getenv("SOURCE_ALLOWED_DOMAINS", "mf.nipponindiaim.com").split(",")
 
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Text splitter settings used for every ingestion run
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
 def extract_fund_facts(html_content: str, url: str) -> str:
     """
     Extract relevant fund facts from HTML content
@@ -93,7 +103,16 @@ def extract_fund_facts(html_content: str, url: str) -> str:
     
     return combined_text
 
-def scrape_fund_page(url: str) -> tuple:
+def fetch_fund_page(url: str, session: requests.Session = None) -> str:
+    """
+    Download a fund page, optionally through a caller-provided session
+    (the benchmarks replay recorded pages this way)
+    """
+    response = (session or requests).get(url, headers=REQUEST_HEADERS, timeout=30)
+    response.raise_for_status()
+    return response.text
+
+def scrape_fund_page(url: str, session: requests.Session = None) -> tuple:
     """
     Scrape a fund page and return (content, success)
     """
@@ -105,39 +124,42 @@ def scrape_fund_page(url: str) -> tuple:
             print(f"Warning: URL {url} not in allowed domains")
             return None, False
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        content = extract_fund_facts(response.text, url)
+        html = fetch_fund_page(url, session)
+        content = extract_fund_facts(html, url)
         return content, True
     
     except Exception as e:
         print(f"Error scraping {url}: {e}")
         return None, False
 
+def split_documents(documents: list) -> list:
+    """Split scraped page documents into overlapping chunks"""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len
+    )
+    
+    chunks = []
+    for doc in documents:
+        doc_chunks = text_splitter.split_documents([doc])
+        chunks.extend(doc_chunks)
+    return chunks
+
 def run_ingestion():
     """Main ingestion function"""
     print("Starting data ingestion...")
     
     model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-    embeddings = HuggingFaceEmbeddings(
-        model_name=model_name,
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
-    )
     print(f"Using Hugging Face embeddings model: {model_name}")
     
-    # Scrape all fund pages
+    # Scrape all fund pages concurrently
     all_documents = []
+    print(f"Scraping {len(FUND_URLS)} fund pages...")
+    with ThreadPoolExecutor(max_workers=len(FUND_URLS)) as pool:
+        results = list(pool.map(scrape_fund_page, FUND_URLS.values()))
     
-    for fund_name, url in FUND_URLS.items():
-        print(f"Scraping {fund_name}...")
-        content, success = scrape_fund_page(url)
-        
+    for (fund_name, url), (content, success) in zip(FUND_URLS.items(), results):
         if success and content:
             # Create document with metadata
             doc = Document(
@@ -160,43 +182,44 @@ def run_ingestion():
     
     # Split documents into chunks
     print("Splitting documents into chunks...")
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len
-    )
-    
-    chunks = []
-    for doc in all_documents:
-        doc_chunks = text_splitter.split_documents([doc])
-        chunks.extend(doc_chunks)
+    chunks = split_documents(all_documents)
     
     print(f"Created {len(chunks)} chunks")
     
-    # Create vector store
-    print("Creating vector store...")
-    vector_store = FAISS.from_documents(chunks, embeddings)
-    
-    # Save vector store
+    # Embed in batches across INGEST_WORKERS processes and build the FAISS index
     vector_store_path = os.getenv("VECTOR_STORE_PATH", "./data/faiss_index")
     os.makedirs(vector_store_path, exist_ok=True)
     
-    vector_store.save_local(vector_store_path)
-    
-    # Save metadata
-    metadata = {
-        "fund_urls": FUND_URLS,
-        "ingestion_date": datetime.now().isoformat(),
-        "num_documents": len(all_documents),
-        "num_chunks": len(chunks)
-    }
-    
-    metadata_path = os.path.join(vector_store_path, "metadata.pkl")
-    with open(metadata_path, "wb") as f:
-        pickle.dump(metadata, f)
-    
-    print(f"✓ Vector store saved to {vector_store_path}")
-    print(f"✓ Metadata saved to {metadata_path}")
+    chunks_path = os.path.join(vector_store_path, "chunks.jsonl")
+    write_chunks_jsonl(
+        (
+            Chunk(id=str(row), text=chunk.page_content, source=chunk.metadata["source"], metadata=dict(chunk.metadata))
+            for row, chunk in enumerate(chunks)
+        ),
+        chunks_path,
+    )
+    print("Building vector index...")
+    builder = IndexBuilder(model_name, workers=int(os.getenv("INGEST_WORKERS", "1")))
+    # Everything is written to a staging version and published atomically as `current`
+    with new_version(vector_store_path) as staging:
+        staging.counts["chunks"] = builder.build(
+            chunks_path, staging.path, os.path.join(vector_store_path, BUILD_DIR)
+        )
+        staging.counts["documents"] = len(all_documents)
+        
+        # Build metadata goes in manifest.json; its content hash is the index generation
+        staging.extra = index_metadata(
+            model_name,
+            builder.dimension,
+            "ip",
+            {"splitter": "recursive_character", "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP},
+        )
+        staging.extra["fund_urls"] = FUND_URLS
+        # Per-fund digests let caches keep answers for funds this run did not change
+        staging.extra["sources"] = source_digests((chunk.metadata["source"], chunk.page_content) for chunk in chunks)
+    os.remove(chunks_path)
+    
+    print(f"✓ Vector store saved to {resolve(vector_store_path)}")
     print("Ingestion complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+"""
+Copy ``rag_core`` into the serverless function before a Vercel deploy.
+
+Vercel is deployed from ``frontend/`` (``cd frontend; vercel``), so only that
+directory is uploaded and ``backend/rag_core`` is not in the function bundle.
+This copies the package to ``frontend/api/fastapi/_vendor/rag_core``, which
+``frontend/api/fastapi/__init__.py`` puts on ``sys.path`` when ``backend/``
+is not next to it. Run it before every deploy so the function ships the
+current engine:
+
+    python backend/scripts/vendor_rag_core.py
+"""
+
+import os
+import shutil
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(BACKEND_DIR, "rag_core")
+VENDOR_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "frontend", "api", "fastapi", "_vendor")
+
+
+def vendor(source: str = SOURCE_DIR, vendor_dir: str = VENDOR_DIR) -> str:
+    """Replace ``vendor_dir/rag_core`` with a fresh copy of ``source``; returns the copy's path."""
+    target = os.path.join(vendor_dir, "rag_core")
+    staging = target + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.copytree(source, staging, ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    return target
+
+
+def main() -> None:
+    if not os.path.isdir(SOURCE_DIR):
+        sys.exit(f"rag_core not found at {SOURCE_DIR}")
+    target = vendor()
+    files = sum(len(names) for _, _, names in os.walk(target))
+    print(f"Vendored rag_core ({files} files) into {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +0,0 @@
-# Services package
-
-
-
@@ -0,0 +1,3 @@
+"""
+Offline benchmark and load-test suite for the Facts-Only MF Assistant.
+"""
@@ -0,0 +1,171 @@
+"""
+Torn reads during reindex: in-place writes versus versioned publishes.
+
+A writer thread republishes a synthetic ``documents.json`` +
+``embeddings.npy`` store over and over, alternating between two sizes.
+Reader threads load the store in a loop, the way
+``RagService.load_index`` does, and count loads whose documents and
+embeddings disagree or that fail to parse. A load whose version was pruned
+by two later publishes is counted as ``missing``; the service keeps its
+current index in that case.
+
+The first mode rewrites both files in place, as ingestion did before
+versioning. The second publishes each store through
+``rag_core.artifacts.new_version``. The benchmark also reports the cost of
+the per-load ``verify`` size check next to a full ``verify_checksums``.
+
+Usage:
+    python -m benchmarks.artifact_bench --chunks 20000 --seconds 10 --out artifacts.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .fakes import DIMENSION
+from .load_test import latency_summary
+from .serve import BACKEND_DIR
+
+
+def synthetic_store(count: int) -> tuple:
+    documents = [{"id": str(row), "text": f"Synthetic chunk {row} about the exit load."} for row in range(count)]
+    embeddings = np.random.default_rng(count).standard_normal((count, DIMENSION)).astype(np.float32)
+    return documents, embeddings
+
+
+def write_store(directory: Path, documents: List[Dict], embeddings: np.ndarray) -> None:
+    np.save(directory / "embeddings.npy", embeddings)
+    with (directory / "documents.json").open("w", encoding="utf-8") as f:
+        json.dump(documents, f)
+
+
+def load_store(directory: Path) -> str:
+    """
+    ``"ok"`` if the documents and embeddings read from ``directory`` agree,
+    ``"missing"`` if the version was pruned mid-load, otherwise ``"torn"``.
+    """
+    try:
+        with (directory / "documents.json").open("r", encoding="utf-8") as f:
+            documents = json.load(f)
+        return "ok" if len(documents) == np.load(directory / "embeddings.npy").shape[0] else "torn"
+    except FileNotFoundError:
+        return "missing"
+    except (OSError, ValueError):
+        return "torn"
+
+
+def race(
+    publish: Callable[[int], None],
+    resolve: Callable[[], Path],
+    seconds: float,
+    readers: int,
+    sizes: List[int],
+) -> Dict:
+    stop = threading.Event()
+    counts = {"publishes": 0, "loads": 0, "ok": 0, "torn": 0, "missing": 0}
+    lock = threading.Lock()
+
+    def writer() -> None:
+        while not stop.is_set():
+            publish(sizes[counts["publishes"] % len(sizes)])
+            counts["publishes"] += 1
+
+    def reader() -> None:
+        while not stop.is_set():
+            outcome = load_store(resolve())
+            with lock:
+                counts["loads"] += 1
+                counts[outcome] += 1
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    counts["torn_rate"] = counts["torn"] / max(counts["loads"], 1)
+    return counts
+
+
+def run(chunks: int, seconds: float, readers: int) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core import artifacts
+
+    sizes = [chunks, chunks // 2]
+    stores = {size: synthetic_store(size) for size in sizes}
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="mf-artifact-bench-") as tmp:
+        in_place = Path(tmp) / "in_place"
+        in_place.mkdir()
+        write_store(in_place, *stores[sizes[0]])
+        print("[artifacts] in_place", file=sys.stderr)
+        results["in_place"] = race(
+            lambda size: write_store(in_place, *stores[size]), lambda: in_place, seconds, readers, sizes
+        )
+
+        root = Path(tmp) / "versioned"
+
+        def publish(size: int) -> None:
+            with artifacts.new_version(str(root)) as staging:
+                write_store(Path(staging.path), *stores[size])
+                staging.counts["documents"] = size
+
+        publish(sizes[0])
+        print("[artifacts] versioned", file=sys.stderr)
+        results["versioned"] = race(
+            publish, lambda: Path(artifacts.resolve(str(root))), seconds, readers, sizes
+        )
+
+        current = artifacts.resolve(str(root))
+        checks: Dict[str, List[float]] = {"verify": [], "verify_checksums": []}
+        for _ in range(50):
+            for name, check in (("verify", artifacts.verify), ("verify_checksums", artifacts.verify_checksums)):
+                started = time.perf_counter()
+                check(current)
+                checks[name].append(time.perf_counter() - started)
+        results["verify_seconds"] = {name: latency_summary(values) for name, values in checks.items()}
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "chunks": chunks,
+            "seconds": seconds,
+            "readers": readers,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.chunks, args.seconds, args.readers)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+    if report["results"]["versioned"]["torn"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Many catalogue indexes behind a memory-budgeted LRU.
+
+Publishes ``--catalogues`` synthetic catalogue indexes of ``--chunks``
+vectors each (``embeddings.npy`` + ``docstore.json``) under a temporary
+``CATALOGUE_ROOT``. It then runs ``--queries`` searches whose catalogue is
+drawn from a Zipf distribution (a few hot AMCs, a long cold tail), with
+``--budget-mb`` allowing only part of them to stay open. The report gives:
+
+- the hit ratio, opens and evictions
+- open (cold) and search latency, p50/p95/p99
+- the peak bytes charged to open indexes against the budget
+- the process RSS before and after, which with memory-mapped vectors grows
+  by the pages actually touched rather than by every index opened
+
+It exits with status 1 if the charged bytes ever exceed the budget while
+more than one index is open.
+
+Usage:
+    python -m benchmarks.catalogue_bench --catalogues 50 --chunks 20000 --budget-mb 200 --queries 5000 --out catalogue.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .fakes import DIMENSION
+from .load_test import latency_summary, rss_bytes
+from .serve import BACKEND_DIR
+
+
+def publish(root: Path, name: str, chunks: int, seed: int) -> None:
+    from rag_core.artifacts import new_version
+    from rag_core.catalogue import CATALOGUE_FILE, EMBEDDINGS_FILE
+    from rag_core.indexes import Chunk, write_docstore
+
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((chunks, DIMENSION)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    directory = root / name
+    directory.mkdir(parents=True)
+    (directory / CATALOGUE_FILE).write_text(json.dumps({"name": f"AMC {seed}", "aliases": [name]}), encoding="utf-8")
+    with new_version(str(directory)) as staging:
+        np.save(Path(staging.path) / EMBEDDINGS_FILE, vectors)
+        write_docstore(
+            staging.path,
+            (Chunk(str(row), f"{name} chunk {row}", f"https://example.com/{name}") for row in range(chunks)),
+        )
+        staging.counts["chunks"] = chunks
+
+
+def run(catalogues: int, chunks: int, budget_mb: float, queries: int, zipf: float) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.catalogue import CatalogueRegistry
+    from rag_core.telemetry import CATALOGUE_EVICTIONS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        names = [f"amc_{index:03d}" for index in range(catalogues)]
+        for seed, name in enumerate(names):
+            publish(root, name, chunks, seed)
+
+        budget = int(budget_mb * 1024 * 1024)
+        registry = CatalogueRegistry(str(root), budget)
+        rng = np.random.default_rng(0)
+        picks = np.minimum(rng.zipf(zipf, queries), catalogues) - 1
+        vectors = rng.standard_normal((queries, DIMENSION)).astype(np.float32)
+        rss_before = rss_bytes(os.getpid())
+        evictions_before = CATALOGUE_EVICTIONS.value()
+
+        opens: List[float] = []
+        searches: List[float] = []
+        peak = 0
+        over_budget = 0
+        for pick, vector in zip(picks, vectors):
+            name = names[int(pick)]
+            was_open = name in registry.resident()
+            started = time.perf_counter()
+            index = registry.get(name)
+            if not was_open:
+                opens.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            index.search(vector, 5)
+            searches.append(time.perf_counter() - started)
+            charged = registry.resident_bytes
+            peak = max(peak, charged)
+            if charged > budget and len(registry.resident()) > 1:
+                over_budget += 1
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "catalogues": catalogues,
+            "chunks_per_catalogue": chunks,
+            "budget_bytes": budget,
+            "queries": queries,
+            "zipf": zipf,
+        },
+        "results": {
+            "hit_ratio": 1.0 - len(opens) / queries if queries else 0.0,
+            "opens": len(opens),
+            "evictions": CATALOGUE_EVICTIONS.value() - evictions_before,
+            "open_latency": latency_summary(opens),
+            "search_latency": latency_summary(searches),
+            "peak_charged_bytes": peak,
+            "over_budget_samples": over_budget,
+            "rss_before_bytes": rss_before,
+            "rss_after_bytes": rss_bytes(os.getpid()),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalogues", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--budget-mb", type=float, default=200.0)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--zipf", type=float, default=1.3)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.catalogues, args.chunks, args.budget_mb, args.queries, args.zipf)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+    if report["results"]["over_budget_samples"]:
+        print("open catalogue indexes exceeded the memory budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
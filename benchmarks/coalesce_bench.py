@@ -0,0 +1,126 @@
+"""
+Bursts of identical questions against single-flight coalescing.
+
+Starts each app with warm-up disabled, so repeated questions are not served
+from the precomputed table. It then sends ``--rounds`` bursts; each burst is
+``--burst`` concurrent requests for one question, with a different question
+per round. From ``/metrics`` it reports how many retrieval and LLM runs the
+bursts caused (``mf_stage_duration_seconds_count``), the leader/follower
+split (``mf_coalesced_requests_total``), and request latency. Without
+coalescing every request runs retrieval and the LLM itself.
+
+Usage:
+    python -m benchmarks.coalesce_bench --apps services,app --burst 50 --rounds 10 --out coalesce.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import free_port, run_level, wait_until_healthy
+from .questions import FACTUAL_TEMPLATES, FUNDS
+from .serve import APPS, REPO_ROOT
+
+_STAGE_COUNT = re.compile(r'^mf_stage_duration_seconds_count\{stage="(\w+)"\} (\S+)$', re.M)
+_COALESCED = re.compile(r'^mf_coalesced_requests_total\{role="(\w+)"\} (\S+)$', re.M)
+
+
+def scrape(port: int) -> Dict[str, float]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.request("GET", "/metrics")
+    text = connection.getresponse().read().decode("utf-8")
+    counts = {f"stage_{name}": float(value) for name, value in _STAGE_COUNT.findall(text)}
+    counts.update({f"coalesced_{role}": float(value) for role, value in _COALESCED.findall(text)})
+    return counts
+
+
+def measure(name: str, burst: int, rounds: int, llm_latency_ms: float, timeout: float) -> Dict:
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.serve",
+        "--app", name, "--port", str(port), "--llm-latency-ms", str(llm_latency_ms),
+    ]
+    env = dict(os.environ, WARMUP_ENABLED="0")
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    try:
+        wait_until_healthy(port, process, timeout=300)
+        before = scrape(port)
+        questions = [
+            template.format(fund=FUNDS[index % len(FUNDS)]) for index, template in enumerate(FACTUAL_TEMPLATES)
+        ]
+        latencies: List[Dict] = []
+        statuses: Dict[str, int] = {}
+        for index in range(rounds):
+            question = questions[index % len(questions)]
+            level = run_level(port, [("factual", question)] * burst, concurrency=burst, timeout=timeout)
+            latencies.append(level["latency"])
+            for status, count in level["statuses"].items():
+                statuses[status] = statuses.get(status, 0) + count
+        after = scrape(port)
+        delta = {key: after.get(key, 0.0) - before.get(key, 0.0) for key in after}
+        return {
+            "requests": burst * rounds,
+            "statuses": statuses,
+            "search_runs": delta.get("stage_search", 0.0),
+            "llm_runs": delta.get("stage_llm", 0.0),
+            "leaders": delta.get("coalesced_leader", 0.0),
+            "followers": delta.get("coalesced_follower", 0.0),
+            "p50_ms_per_round": [latency["p50_ms"] for latency in latencies],
+            "p95_ms_per_round": [latency["p95_ms"] for latency in latencies],
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(apps: List[str], burst: int, rounds: int, llm_latency_ms: float, timeout: float) -> Dict:
+    results: Dict[str, Dict] = {}
+    for name in apps:
+        print(f"[{name}] burst={burst} rounds={rounds}", file=sys.stderr)
+        results[name] = {"entry_point": APPS[name], **measure(name, burst, rounds, llm_latency_ms, timeout)}
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "burst": burst,
+            "rounds": rounds,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default=",".join(APPS))
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    apps = [name.strip() for name in args.apps.split(",") if name.strip()]
+    report = run(apps, args.burst, args.rounds, args.llm_latency_ms, args.timeout)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Multi-process stress test of the persistent LLM completion cache.
+
+Runs ``--processes`` workers against one SQLite file. Each worker looks up
+``--ops`` prompts drawn from a fixed pool, and stores an answer of
+``--answer-bytes`` on every miss, as the engine does after an LLM call. The
+report gives:
+
+- lookup and store latency (p50/p95/p99)
+- the hit ratio, and errors raised out of the cache (should be zero)
+- the stored bytes against ``--max-mb`` after eviction
+- whether a fresh cache object (a restarted worker) still hits
+- after a generation that changed one of ``FUNDS`` sources, how many
+  entries were preserved, and whether any that depend on the changed fund
+  survived
+- whether a generation without per-source digests invalidates everything
+
+It exits with status 1 if any worker raised, the budget was exceeded, the
+restart lost entries, an entry of the changed fund survived, an unchanged
+one was dropped, or the digest-less generation still hit.
+
+Usage:
+    python -m benchmarks.completion_cache_bench --processes 4 --ops 2000 --max-mb 1 --out completion_cache.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import latency_summary
+from .serve import BACKEND_DIR
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+FUNDS = 5
+DIGESTS = {f"fund-{fund}": "v1" for fund in range(FUNDS)}
+
+
+def prompt(index: int) -> str:
+    return f"Question {index}: what is the expense ratio of fund {index % FUNDS}?"
+
+
+def fund(index: int) -> str:
+    return f"fund-{index % FUNDS}"
+
+
+def cached(cache, pool: int, funds) -> int:
+    from rag_core.completion_cache import completion_key
+
+    return sum(
+        cache.get(completion_key("stub", prompt(index))) is not None for index in range(pool) if fund(index) in funds
+    )
+
+
+def worker(path: str, max_bytes: int, ops: int, pool: int, answer_bytes: int, seed: int, queue) -> None:
+    from rag_core.completion_cache import CompletionCache, completion_key
+
+    cache = CompletionCache(path, max_bytes)
+    cache.generation, cache.sources = "g1", DIGESTS
+    rng = random.Random(seed)
+    gets: List[float] = []
+    puts: List[float] = []
+    hits = errors = 0
+    for _ in range(ops):
+        index = rng.randrange(pool)
+        key = completion_key("stub", prompt(index))
+        try:
+            started = time.perf_counter()
+            answer = cache.get(key)
+            gets.append(time.perf_counter() - started)
+            if answer is not None:
+                hits += 1
+                continue
+            started = time.perf_counter()
+            cache.put(key, "x" * answer_bytes, [fund(index)])
+            puts.append(time.perf_counter() - started)
+        except Exception as exc:
+            errors += 1
+            print(f"worker {seed}: {exc}", file=sys.stderr)
+    queue.put({"gets": gets, "puts": puts, "hits": hits, "errors": errors})
+
+
+def run(processes: int, ops: int, pool: int, answer_bytes: int, max_mb: float) -> Dict:
+    from rag_core.completion_cache import CompletionCache
+
+    max_bytes = int(max_mb * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "completions.sqlite")
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        workers = [
+            context.Process(target=worker, args=(path, max_bytes, ops, pool, answer_bytes, seed, queue))
+            for seed in range(processes)
+        ]
+        started = time.perf_counter()
+        for process in workers:
+            process.start()
+        reports = [queue.get() for _ in workers]
+        for process in workers:
+            process.join()
+        wall = time.perf_counter() - started
+
+        everything, changed = set(DIGESTS), {fund(0)}
+        restarted = CompletionCache(path, max_bytes)
+        restarted.generation, restarted.sources = "g1", DIGESTS
+        stored = restarted.nbytes
+        survivors = cached(restarted, pool, everything)
+        unchanged_before = cached(restarted, pool, everything - changed)
+        preserved, invalidated = restarted.refresh("g2", dict(DIGESTS, **{fund(0): "v2"}))
+        changed_after = cached(restarted, pool, changed)
+        unchanged_after = cached(restarted, pool, everything - changed)
+        restarted.refresh("g3", None)
+        after_reindex = cached(restarted, pool, everything)
+        restarted.close()
+
+    lookups = processes * ops
+    hits = sum(report["hits"] for report in reports)
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processes": processes,
+            "ops_per_process": ops,
+            "prompt_pool": pool,
+            "answer_bytes": answer_bytes,
+            "max_bytes": max_bytes,
+        },
+        "results": {
+            "ops_per_second": lookups / wall if wall else 0.0,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "errors": sum(report["errors"] for report in reports),
+            "get": latency_summary([value for report in reports for value in report["gets"]]),
+            "put": latency_summary([value for report in reports for value in report["puts"]]),
+            "stored_bytes": stored,
+            "entries_after_restart": survivors,
+            "partial_refresh": {
+                "preserved": preserved,
+                "invalidated": invalidated,
+                "changed_fund_entries_left": changed_after,
+                "unchanged_fund_entries": [unchanged_before, unchanged_after],
+            },
+            "entries_after_new_generation": after_reindex,
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--pool", type=int, default=2000)
+    parser.add_argument("--answer-bytes", type=int, default=600)
+    parser.add_argument("--max-mb", type=float, default=1.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.processes, args.ops, args.pool, args.answer_bytes, args.max_mb)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+    results = report["results"]
+    if (
+        results["errors"]
+        or results["stored_bytes"] > report["meta"]["max_bytes"]
+        or not results["entries_after_restart"]
+        or results["partial_refresh"]["changed_fund_entries_left"]
+        or len(set(results["partial_refresh"]["unchanged_fund_entries"])) != 1
+        or results["entries_after_new_generation"]
+    ):
+        print("completion cache check failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
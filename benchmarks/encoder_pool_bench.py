@@ -0,0 +1,103 @@
+"""
+Encoder pool scaling benchmark.
+
+Starts ``rag_core.encoder_pool`` with 1..N single-core workers and drives it
+with concurrent single-question requests (the shape of uncached ``/query``
+traffic), reporting throughput, latency and scaling efficiency per worker
+count. A baseline row runs the same load against one unpinned in-process
+encoder shared by all client threads.
+
+Usage:
+    python -m benchmarks.encoder_pool_bench --max-workers 8 --requests 2000
+    python -m benchmarks.encoder_pool_bench --model fake:hash   # offline smoke run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fakes import FakeEmbeddings
+from .load_test import latency_summary
+from .questions import build_mix
+from .serve import BACKEND_DIR
+
+
+def drive(encoder, questions: List[str], concurrency: int) -> Dict:
+    def one(question: str) -> float:
+        started = time.perf_counter()
+        encoder.encode([question])
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, questions))
+    wall = time.perf_counter() - started
+    return {"throughput_qps": len(questions) / wall, "latency": latency_summary(latencies)}
+
+
+def run(model: str, max_workers: int, requests: int, clients_per_worker: int) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.encoder_pool import EncoderPool, RemoteEncoder
+    from rag_core.encoders import load_encoder, register_encoder
+
+    register_encoder("fake:", FakeEmbeddings)
+    questions = [question for _, question in build_mix(requests)]
+    cpus = len(os.sched_getaffinity(0))
+    max_workers = min(max_workers, cpus)
+
+    in_process = load_encoder(model)
+    baseline = drive(in_process, questions, concurrency=max_workers * clients_per_worker)
+    del in_process
+
+    scaling: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="mf-encoder-pool-") as tmp:
+        for workers in range(1, max_workers + 1):
+            socket_path = os.path.join(tmp, f"pool-{workers}.sock")
+            with EncoderPool(model, workers, cores_per_worker=1, socket_path=socket_path) as pool:
+                pool.wait_ready()
+                client = RemoteEncoder(socket_path)
+                drive(client, questions[: max(10, workers * 5)], workers)  # warm every worker
+                print(f"[pool] workers={workers}", file=sys.stderr)
+                scaling[str(workers)] = drive(client, questions, workers * clients_per_worker)
+
+    single = scaling["1"]["throughput_qps"]
+    for workers, result in scaling.items():
+        result["speedup"] = result["throughput_qps"] / single
+        result["efficiency"] = result["speedup"] / int(workers)
+
+    return {
+        "model": model,
+        "cpus": cpus,
+        "requests": requests,
+        "clients_per_worker": clients_per_worker,
+        "in_process_unpinned": baseline,
+        "pool": scaling,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients-per-worker", type=int, default=2)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.model, args.max_workers, args.requests, args.clients_per_worker)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
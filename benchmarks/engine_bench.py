@@ -0,0 +1,138 @@
+"""
+Shared performance suite for ``rag_core``.
+
+Every entry point now answers through ``rag_core.engine.RagEngine``, so this
+suite measures the engine once per backend combination instead of once per
+app: encode, search and generate latency for each index backend at several
+corpus sizes, using the fake encoder and stub LLM.
+
+Usage:
+    python -m benchmarks.engine_bench --sizes 100,10000,100000 --out engine.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .fakes import DIMENSION, FakeEmbeddings, StubGenerator
+from .load_test import latency_summary
+from .questions import build_mix
+from .serve import BACKEND_DIR, load_corpus
+
+
+def synthetic_corpus(size: int, seed: int = 3):
+    """``size`` chunks built from the bundled corpus plus random unit vectors beyond it."""
+    from rag_core.indexes import chunk_from_record
+
+    records = load_corpus()
+    encoder = FakeEmbeddings()
+    base = encoder.encode([record["text"] for record in records])
+    rng = np.random.default_rng(seed)
+    extra = max(0, size - len(records))
+    noise = rng.standard_normal((extra, DIMENSION)).astype(np.float32)
+    noise /= np.linalg.norm(noise, axis=1, keepdims=True)
+    vectors = np.vstack([base, noise])[:size]
+    chunks = [chunk_from_record(records[idx % len(records)]) for idx in range(size)]
+    return vectors, chunks
+
+
+def index_builders() -> Dict[str, Callable]:
+    from rag_core.indexes import NumpyIndex
+
+    builders: Dict[str, Callable] = {"numpy": NumpyIndex}
+    try:
+        from langchain_community.vectorstores import FAISS
+
+        from rag_core.indexes import LangChainFaissIndex
+
+        def build_langchain(vectors, chunks):
+            store = FAISS.from_embeddings(
+                [(chunk.text, vector.tolist()) for chunk, vector in zip(chunks, vectors)],
+                FakeEmbeddings(),
+                metadatas=[{"source": chunk.source} for chunk in chunks],
+            )
+            return LangChainFaissIndex(store)
+
+        builders["langchain_faiss"] = build_langchain
+    except ImportError:
+        pass
+    return builders
+
+
+def time_calls(fn: Callable[[str], object], questions: List[str]) -> Dict[str, float]:
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        fn(question)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+def run(sizes: List[int], queries: int, k: int, llm_latency_ms: float) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.engine import RagEngine
+    from rag_core.generators import RuleBasedGenerator
+
+    generator = StubGenerator(llm_latency_ms / 1000.0)
+
+    questions = [question for _, question in build_mix(queries)]
+    encoder = FakeEmbeddings()
+    results: Dict[str, Dict] = {}
+    for size in sizes:
+        vectors, chunks = synthetic_corpus(size)
+        for name, build in index_builders().items():
+            started = time.perf_counter()
+            index = build(vectors, chunks)
+            build_seconds = time.perf_counter() - started
+            # The embedding cache is disabled so "embed" measures the encoder itself.
+            engine = RagEngine(
+                encoder, index, generator=generator, fallback=RuleBasedGenerator(), embedding_cache_size=0
+            )
+            query_vectors = {question: engine.embed(question) for question in questions}
+            print(f"[{name}] size={size}", file=sys.stderr)
+            results.setdefault(name, {})[str(size)] = {
+                "build_seconds": build_seconds,
+                "embed": time_calls(engine.embed, questions),
+                "search": time_calls(lambda q: engine.search(query_vectors[q], k), questions),
+                "answer": time_calls(lambda q: engine.answer(q, k), questions),
+            }
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "queries": queries,
+            "k": k,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run([int(value) for value in args.sizes.split(",")], args.queries, args.k, args.llm_latency_ms)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
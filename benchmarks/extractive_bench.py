@@ -0,0 +1,133 @@
+"""
+Extractive answers: regex split of the top chunk versus the sentence index.
+
+For every factual question in the mix, retrieves chunks from the bundled
+corpus. It then picks the answer both ways. The first is
+``ExtractiveGenerator``'s logic: split the top chunk at query time and take
+its first sentences. The second is ``rag_core.sentences.SentenceIndex``: one
+dot product against precomputed sentence vectors of the retrieved chunks. Reports the per-query latency of
+the selection step and two relevance proxies. The first is the mean
+query-sentence similarity. The second is the share of answers that contain
+the fact the question asks about.
+
+Usage:
+    python -m benchmarks.extractive_bench --out extractive.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .fakes import FakeEmbeddings
+from .load_test import latency_summary
+from .questions import FACTUAL_TEMPLATES, FUNDS
+from .serve import BACKEND_DIR, load_corpus
+
+# Term each factual template asks about, in FACTUAL_TEMPLATES order.
+TEMPLATE_TERMS = [
+    "expense",
+    "exit load",
+    "sip",
+    "lock",
+    "risk",
+    "benchmark",
+    "statement",
+    "objective",
+    "manager",
+]
+
+
+def labelled_questions() -> List[Tuple[str, str]]:
+    return [
+        (template.format(fund=fund), term)
+        for template, term in zip(FACTUAL_TEMPLATES, TEMPLATE_TERMS)
+        for fund in FUNDS
+    ]
+
+
+def run(k: int, max_sentences: int, repeats: int) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.indexes import NumpyIndex, chunk_from_record
+    from rag_core.sentences import SentenceIndex
+    from rag_core.text import curated_sentence_split
+
+    encoder = FakeEmbeddings()
+    records = load_corpus()
+    texts = [record["text"] for record in records]
+    index = NumpyIndex(encoder.encode(texts), [chunk_from_record(record) for record in records])
+    started = time.perf_counter()
+    sentences = SentenceIndex.build(texts, encoder)
+    build_seconds = time.perf_counter() - started
+
+    def regex_split(vector, hits) -> List[str]:
+        return curated_sentence_split(hits[0].chunk.text)[:max_sentences]
+
+    def sentence_index(vector, hits) -> List[str]:
+        return sentences.best(vector, [hit.position for hit in hits], max_sentences).sentences
+
+    methods: Dict[str, Callable] = {"regex_split": regex_split, "sentence_index": sentence_index}
+    questions = labelled_questions()
+    prepared = []
+    for question, term in questions:
+        vector = encoder.encode([question])[0]
+        prepared.append((vector, index.search(vector, k), term))
+
+    results: Dict[str, Dict] = {}
+    for name, method in methods.items():
+        latencies: List[float] = []
+        similarities: List[float] = []
+        term_hits = 0
+        for vector, hits, term in prepared:
+            for _ in range(repeats):
+                begun = time.perf_counter()
+                answer = method(vector, hits)
+                latencies.append(time.perf_counter() - begun)
+            if answer:
+                similarities.append(float(np.mean(encoder.encode(answer) @ vector)))
+            term_hits += term in " ".join(answer).lower()
+        results[name] = {
+            "latency": latency_summary(latencies),
+            "mean_similarity": float(np.mean(similarities)) if similarities else 0.0,
+            "term_hit_rate": term_hits / len(prepared),
+        }
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "questions": len(questions),
+            "k": k,
+            "max_sentences": max_sentences,
+            "sentences_indexed": len(sentences.sentences),
+            "sentence_index_build_seconds": build_seconds,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--max-sentences", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.k, args.max_sentences, args.repeats)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
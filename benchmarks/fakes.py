@@ -0,0 +1,145 @@
+"""
+Deterministic stand-ins for the embedding model, the cross-encoder and the LLM.
+
+They keep benchmarks offline and reproducible: the fake encoder hashes tokens
+into a fixed-size normalized vector (so lexically similar questions still
+retrieve the right chunks) and the stub LLM sleeps for a configurable latency.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+DIMENSION = 384
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _token_bucket(token: str) -> int:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % DIMENSION
+
+
+class FakeEncoder:
+    """Feature-hashing encoder exposing the ``SentenceTransformer.encode`` API."""
+
+    def __init__(self, model_name_or_path: str = "fake-hash-encoder", *args, **kwargs) -> None:
+        self.model_name = model_name_or_path
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIMENSION
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(DIMENSION, dtype=np.float32)
+        tokens = _TOKEN_RE.findall(text.lower())
+        for token in tokens:
+            vector[_token_bucket(token)] += 1.0
+        for first, second in zip(tokens, tokens[1:]):
+            vector[_token_bucket(f"{first} {second}")] += 0.5
+        return vector
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ):
+        single = isinstance(sentences, str)
+        texts: Sequence[str] = [sentences] if single else list(sentences)
+        matrix = np.stack([self._encode_one(text) for text in texts]) if texts else np.zeros(
+            (0, DIMENSION), dtype=np.float32
+        )
+        if normalize_embeddings:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        return matrix[0] if single else matrix
+
+
+class FakeEmbeddings(FakeEncoder):
+    """
+    The same encoder, normalized by default, behind both the ``rag_core``
+    encoder interface and the LangChain ``Embeddings`` interface.
+    """
+
+    def __init__(self, model_name: str = "fake-hash-encoder", **kwargs) -> None:
+        super().__init__(model_name)
+
+    @property
+    def dimension(self) -> int:
+        return DIMENSION
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, **kwargs):
+        return super().encode(sentences, batch_size, convert_to_numpy, normalize_embeddings, **kwargs)
+
+    def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    def __call__(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+class _StubResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class StubLLM:
+    """Mimics ``genai.GenerativeModel`` with a fixed, configurable latency."""
+
+    latency_seconds = 0.05
+
+    def __init__(self, model_name: str = "stub-llm", *args, **kwargs) -> None:
+        self.model_name = model_name
+        self.calls = 0
+
+    def generate_content(self, prompt: str) -> _StubResponse:
+        self.calls += 1
+        time.sleep(self.latency_seconds)
+        context = prompt.split("Context from official sources:", 1)[-1]
+        first_line = next((line.strip() for line in context.splitlines() if line.strip()), "")
+        return _StubResponse(f"{first_line[:200]} Facts-only. No investment advice.")
+
+
+class StubGenerator:
+    """A ``rag_core`` generator with a fixed latency, for engine-level benchmarks."""
+
+    name = "llm"
+    stage = "llm"
+
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+
+    def generate(self, question: str, context: str) -> str:
+        time.sleep(self.latency_seconds)
+        first_line = next((line.strip() for line in context.splitlines() if line.strip()), "")
+        return f"{first_line[:200]} Facts-only. No investment advice."
+
+
+class LexicalScorer:
+    """
+    Cross-encoder stand-in for ``rag_core.rerank``: scores by question-token
+    overlap and sleeps ``latency_per_pair_seconds`` per scored pair.
+    """
+
+    def __init__(self, latency_per_pair_seconds: float = 0.0) -> None:
+        self.latency_per_pair_seconds = latency_per_pair_seconds
+
+    def score(self, question: str, texts: Sequence[str]) -> np.ndarray:
+        time.sleep(self.latency_per_pair_seconds * len(texts))
+        terms = set(_TOKEN_RE.findall(question.lower()))
+        scores = []
+        for text in texts:
+            tokens = _TOKEN_RE.findall(text.lower())
+            scores.append(sum(token in terms for token in tokens) / (len(tokens) ** 0.5 or 1.0))
+        return np.asarray(scores, dtype=np.float32)
@@ -0,0 +1,263 @@
+"""
+Record fund pages to disk and replay them without touching the AMC site.
+
+Recorded pages live in ``benchmarks/fixtures/pages`` with an ``index.json``
+mapping each URL to its snapshot. Replay either reads snapshots straight from
+disk (``file`` transport) or serves them from a local HTTP server (``http``
+transport) so socket and HTTP parsing costs stay in the measurement. Both are
+exposed as ``requests.Session`` objects that the ingestion functions accept.
+
+Usage:
+    python -m benchmarks.fixtures record
+    python -m benchmarks.fixtures synth --count 100 --out /tmp/pages
+    python -m benchmarks.fixtures serve --port 8200
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "pages"
+INDEX_FILE = "index.json"
+SYNTHETIC_URL = "https://mf.nipponindiaim.com/FundsAndPerformance/Pages/NipponIndia-Synthetic-Fund-{index}.aspx"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def fixture_name(url: str) -> str:
+    parsed = urlparse(url)
+    stem = Path(parsed.path).stem or "page"
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+    return f"{stem}-{digest}.html"
+
+
+def load_index(directory: Path) -> Dict[str, str]:
+    index_path = directory / INDEX_FILE
+    if not index_path.exists():
+        return {}
+    with index_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_pages(pages: Dict[str, str], directory: Path) -> Dict[str, str]:
+    """Write ``url -> html`` pairs as fixtures and merge them into the index."""
+    directory.mkdir(parents=True, exist_ok=True)
+    index = load_index(directory)
+    for url, html in pages.items():
+        name = fixture_name(url)
+        (directory / name).write_text(html, encoding="utf-8")
+        index[url] = name
+    with (directory / INDEX_FILE).open("w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    return index
+
+
+def default_urls() -> List[str]:
+    import sys
+
+    from .serve import BACKEND_DIR
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.ingest import FUND_SOURCES
+
+    return [source.url for source in FUND_SOURCES]
+
+
+def record(urls: List[str], directory: Path = FIXTURE_DIR) -> Dict[str, str]:
+    """Snapshot live pages to disk. This is the only step that needs network access."""
+    pages: Dict[str, str] = {}
+    for url in urls:
+        response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=30)
+        response.raise_for_status()
+        pages[url] = response.text
+        print(f"Recorded {url} ({len(response.content)} bytes)")
+    return write_pages(pages, directory)
+
+
+def synthetic_page(index: int) -> str:
+    """A fund page shaped like the AMC's: navigation noise plus fact tables, lists and paragraphs."""
+    fund = f"Nippon India Synthetic Fund {index}"
+    expense = 0.5 + (index % 150) / 100
+    exit_load = 1 + index % 3
+    minimum = 100 * (1 + index % 10)
+    nav_links = "".join(f'<li><a href="/p/{n}">Menu item {n}</a></li>' for n in range(60))
+    filler = " ".join(
+        f"<p>Section {n} of the {fund} page carries general scheme literature and disclaimers.</p>"
+        for n in range(80)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>{fund}: Check NAV, Portfolio &amp; Returns</title>
+<style>.fund-detail {{ color: #333; }}</style>
+<script>var analytics = {{ page: "{fund}", id: {index} }};</script></head>
+<body>
+<nav><ul>{nav_links}</ul></nav>
+<header><h1>{fund}</h1></header>
+<main>
+<div class="fund-detail">
+<table>
+<tr><th>Expense Ratio</th><td>{expense:.2f}%</td></tr>
+<tr><th>Exit Load</th><td>{exit_load}% if redeemed within 1 year</td></tr>
+<tr><th>Minimum Investment</th><td>Rs {minimum * 10} and in multiples of Re 1</td></tr>
+<tr><th>Minimum SIP</th><td>Rs {minimum}</td></tr>
+<tr><th>Lock-in</th><td>Nil</td></tr>
+<tr><th>Riskometer</th><td>Very High</td></tr>
+<tr><th>Benchmark</th><td>NIFTY {100 + index % 5 * 50} TRI</td></tr>
+<tr><th>NAV</th><td>{10 + index % 90}.{index % 100:02d}</td></tr>
+</table>
+</div>
+<p>Investment Objective: The primary investment objective of {fund} is to seek to generate long term capital appreciation.</p>
+<p>Fund Manager: Synthetic Manager {index % 7}. Inception date 01-01-20{10 + index % 15}.</p>
+<p>Entry load: Not applicable. Exit load details are in the load structure section.</p>
+<ul><li>Benchmark: NIFTY TRI</li><li>Riskometer: Very High risk</li><li>Minimum SIP Rs {minimum}</li></ul>
+<div class="content">{filler}</div>
+</main>
+<footer>Mutual Fund investments are subject to market risks.</footer>
+</body></html>
+"""
+
+
+def synthetic_pages(count: int, directory: Path = FIXTURE_DIR) -> Dict[str, str]:
+    """
+    ``count`` pages under distinct allowed-domain URLs. Recorded fixtures are
+    cycled as templates when present; otherwise pages are generated.
+    """
+    recorded = [(directory / name).read_text(encoding="utf-8") for name in load_index(directory).values()]
+    pages: Dict[str, str] = {}
+    for index in range(count):
+        url = SYNTHETIC_URL.format(index=index)
+        pages[url] = recorded[index % len(recorded)] if recorded else synthetic_page(index)
+    return pages
+
+
+def _fixture_response(request, status: int, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8"})
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = "OK" if status == 200 else "Not Found"
+    return response
+
+
+class FileTransportAdapter(BaseAdapter):
+    """Serve recorded fixtures for any URL present in the index, straight from disk."""
+
+    def __init__(self, directory: Path) -> None:
+        super().__init__()
+        self.directory = directory
+        self.index = load_index(directory)
+
+    def send(self, request, **kwargs) -> requests.Response:
+        name = self.index.get(request.url)
+        if name is None:
+            return _fixture_response(request, 404, b"")
+        return _fixture_response(request, 200, (self.directory / name).read_bytes())
+
+    def close(self) -> None:
+        pass
+
+
+class LocalServerAdapter(HTTPAdapter):
+    """Rewrite requests for recorded URLs to a local fixture server."""
+
+    def __init__(self, directory: Path, base_url: str) -> None:
+        super().__init__()
+        self.index = load_index(directory)
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, **kwargs) -> requests.Response:
+        name = self.index.get(request.url)
+        original = request.url
+        request.url = f"{self.base_url}/{name or 'missing'}"
+        response = super().send(request, **kwargs)
+        response.url = original
+        return response
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@contextmanager
+def fixture_server(directory: Path, port: int = 0) -> Iterator[str]:
+    """Serve ``directory`` over HTTP on localhost for the duration of the block."""
+
+    def handler(*args, **kwargs):
+        return _QuietHandler(*args, directory=str(directory), **kwargs)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def replay_session(directory: Path = FIXTURE_DIR, transport: str = "file") -> Iterator[requests.Session]:
+    """A session that answers recorded URLs from fixtures via ``file`` or ``http`` transport."""
+    session = requests.Session()
+    if transport == "file":
+        session.mount("https://", FileTransportAdapter(directory))
+        session.mount("http://", FileTransportAdapter(directory))
+        try:
+            yield session
+        finally:
+            session.close()
+    elif transport == "http":
+        with fixture_server(directory) as base_url:
+            session.mount("https://", LocalServerAdapter(directory, base_url))
+            try:
+                yield session
+            finally:
+                session.close()
+    else:
+        raise ValueError(f"Unknown transport '{transport}'. Use 'file' or 'http'.")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Snapshot live fund pages")
+    rec.add_argument("urls", nargs="*", help="Defaults to the configured fund sources")
+    rec.add_argument("--out", type=Path, default=FIXTURE_DIR)
+
+    synth = sub.add_parser("synth", help="Write synthetic fixtures")
+    synth.add_argument("--count", type=int, default=100)
+    synth.add_argument("--out", type=Path, required=True)
+
+    serve = sub.add_parser("serve", help="Serve fixtures over HTTP until interrupted")
+    serve.add_argument("--dir", type=Path, default=FIXTURE_DIR)
+    serve.add_argument("--port", type=int, default=8200)
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record(args.urls or default_urls(), args.out)
+    elif args.command == "synth":
+        write_pages(synthetic_pages(args.count), args.out)
+        print(f"Wrote {args.count} synthetic pages to {args.out}")
+    else:
+        with fixture_server(args.dir, args.port) as base_url:
+            print(f"Serving fixtures from {args.dir} at {base_url} (Ctrl+C to stop)")
+            threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Parallel index build throughput with ``rag_core.index_builder.IndexBuilder``.
+
+Writes ``--chunks`` synthetic chunks to a JSONL file and builds the serving
+index from it with each worker count. For every run it reports chunks per
+second, speedup over one worker and the peak RSS of the build processes.
+It then loads the merged ``index.faiss`` and the sharded layout
+(``--no-merge``) and checks that both return the same hits for a sample
+of questions.
+
+The fake encoder keeps the run offline; ``--encoder real`` embeds with the
+sentence-transformers model.
+
+Usage:
+    python -m benchmarks.index_build_bench --chunks 200000 --workers 1,2,4 --out index_build.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fakes import FakeEmbeddings
+from .questions import build_mix
+from .serve import BACKEND_DIR
+
+WORDS = (
+    "expense ratio exit load minimum sip lock-in riskometer benchmark statement objective manager "
+    "equity debt large cap mid cap small cap growth direct plan regular plan nav allotment"
+).split()
+
+
+def synthetic_chunks(count: int):
+    from rag_core.indexes import Chunk
+
+    for row in range(count):
+        words = [WORDS[(row * 7 + step * 13) % len(WORDS)] for step in range(24)]
+        yield Chunk(
+            id=str(row),
+            text=f"Synthetic Fund {row % 500}: " + " ".join(words) + f" {row}.",
+            source=f"https://example.com/fund/{row % 500}",
+        )
+
+
+def peak_rss_bytes() -> int:
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * 1024
+
+
+def same_hits(merged, sharded, questions: List[str], encoder, k: int) -> bool:
+    for question in questions:
+        vector = encoder.encode([question])[0]
+        left = [(hit.position, round(hit.score, 5)) for hit in merged.search(vector, k)]
+        right = [(hit.position, round(hit.score, 5)) for hit in sharded.search(vector, k)]
+        if left != right:
+            return False
+    return True
+
+
+def run(chunk_count: int, worker_counts: List[int], batch_size: int, shard_size: int, model: str) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.encoders import load_encoder, register_encoder
+    from rag_core.index_builder import IndexBuilder, write_chunks_jsonl
+    from rag_core.indexes import FaissIndex
+
+    register_encoder("fake:", FakeEmbeddings)
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="mf-index-build-") as tmp:
+        chunks_path = str(Path(tmp) / "chunks.jsonl")
+        write_chunks_jsonl(synthetic_chunks(chunk_count), chunks_path)
+
+        for workers in worker_counts:
+            out_dir = str(Path(tmp) / f"workers-{workers}")
+            print(f"[build] chunks={chunk_count} workers={workers}", file=sys.stderr)
+            started = time.perf_counter()
+            IndexBuilder(model, workers, batch_size, shard_size).build(chunks_path, out_dir)
+            seconds = time.perf_counter() - started
+            results[str(workers)] = {
+                "seconds": seconds,
+                "chunks_per_second": chunk_count / seconds,
+                "peak_rss_bytes": peak_rss_bytes(),
+            }
+        single = results[str(worker_counts[0])]["chunks_per_second"]
+        for result in results.values():
+            result["speedup"] = result["chunks_per_second"] / single
+
+        sharded_dir = str(Path(tmp) / "sharded")
+        IndexBuilder(model, max(worker_counts), batch_size, shard_size, merge=False).build(chunks_path, sharded_dir)
+        merged = FaissIndex.load(str(Path(tmp) / f"workers-{worker_counts[-1]}"))
+        sharded = FaissIndex.load(sharded_dir)
+        questions = [question for _, question in build_mix(50)]
+        encoder = load_encoder(model)
+        parity = same_hits(merged, sharded, questions, encoder, k=10)
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "chunks": chunk_count,
+            "batch_size": batch_size,
+            "shard_size": shard_size,
+            "model": model,
+        },
+        "results": results,
+        "merged_and_sharded_hits_equal": parity,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--batch-size", type=int, default=2048)
+    parser.add_argument("--shard-size", type=int, default=65_536)
+    parser.add_argument("--encoder", choices=("fake", "real"), default="fake")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    model = "fake:hash" if args.encoder == "fake" else args.model
+    report = run(
+        args.chunks,
+        [int(value) for value in args.workers.split(",")],
+        args.batch_size,
+        args.shard_size,
+        model,
+    )
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+    if not report["merged_and_sharded_hits_equal"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Ingestion throughput benchmark over recorded or synthetic fund pages.
+
+Times each stage (fetch, parse/extract, chunk, embed, persist, plus the
+sentence index for ``app``) of both
+ingestion pipelines — ``app/ingest.py`` and ``scripts/ingest_data.py`` — at
+several page counts, replaying pages through ``benchmarks.fixtures`` so the
+AMC site is never contacted.
+
+Usage:
+    python -m benchmarks.ingest_bench --pages 3,100,1000 --transport http --out ingest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .fakes import FakeEmbeddings, FakeEncoder
+from .fixtures import replay_session, synthetic_pages, write_pages
+from .load_test import rss_bytes
+from .serve import BACKEND_DIR
+
+PIPELINES = ("app", "scripts")
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - started
+
+
+def _encoder(kind: str, model_name: str):
+    if kind == "fake":
+        return FakeEncoder()
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def run_app_pipeline(urls: List[str], session, workdir: Path, encoder) -> Dict:
+    from app.ingest import FundSource, chunk_documents, chunk_lines, extract_lines, fetch_html, write_documents
+    from rag_core.sentences import SentenceIndex
+
+    timer = StageTimer()
+    sources = [
+        FundSource(fund_id=f"synthetic_{idx}", fund_name=f"Synthetic Fund {idx}", url=url)
+        for idx, url in enumerate(urls)
+    ]
+    captured_at = datetime.utcnow().date().isoformat()
+    with timer.stage("fetch"):
+        pages = [fetch_html(source, session) for source in sources]
+    with timer.stage("parse_extract"):
+        lines = [extract_lines(html) for html in pages]
+    with timer.stage("chunk"):
+        documents: List[dict] = []
+        for source, page_lines in zip(sources, lines):
+            documents.extend(chunk_documents(source, chunk_lines(page_lines), captured_at))
+    with timer.stage("embed"):
+        embeddings = encoder.encode(
+            [doc["text"] for doc in documents], convert_to_numpy=True, normalize_embeddings=True
+        )
+    with timer.stage("persist"):
+        write_documents(documents, workdir / "documents.json")
+        np.save(workdir / "embeddings.npy", embeddings)
+    with timer.stage("sentence_index"):
+        SentenceIndex.build([doc["text"] for doc in documents], encoder).save(workdir)
+    return {"chunks": len(documents), "stages": timer.seconds}
+
+
+def run_scripts_pipeline(urls: List[str], session, workdir: Path, encoder) -> Dict:
+    from langchain.schema import Document
+    from langchain_community.vectorstores import FAISS
+    from scripts.ingest_data import extract_fund_facts, fetch_fund_page, split_documents
+
+    timer = StageTimer()
+    with timer.stage("fetch"):
+        pages = [(url, fetch_fund_page(url, session)) for url in urls]
+    with timer.stage("parse_extract"):
+        documents = [
+            Document(page_content=extract_fund_facts(html, url), metadata={"source": url})
+            for url, html in pages
+        ]
+    with timer.stage("chunk"):
+        chunks = split_documents(documents)
+    texts = [chunk.page_content for chunk in chunks]
+    with timer.stage("embed"):
+        vectors = encoder.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    with timer.stage("persist"):
+        # Index build is included here: from_embeddings only adds precomputed vectors.
+        store = FAISS.from_embeddings(
+            list(zip(texts, vectors.tolist())),
+            FakeEmbeddings(),
+            metadatas=[chunk.metadata for chunk in chunks],
+        )
+        store.save_local(str(workdir / "faiss_index"))
+    return {"chunks": len(chunks), "stages": timer.seconds}
+
+
+def run(
+    page_counts: List[int],
+    pipelines: List[str],
+    transport: str,
+    encoder_kind: str,
+    model_name: str,
+) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    encoder = _encoder(encoder_kind, model_name)
+    results: Dict[str, Dict] = {}
+    for count in page_counts:
+        with tempfile.TemporaryDirectory(prefix="mf-ingest-bench-") as tmp:
+            fixture_dir = Path(tmp) / "pages"
+            pages = synthetic_pages(count)
+            write_pages(pages, fixture_dir)
+            urls = list(pages)
+            for pipeline in pipelines:
+                workdir = Path(tmp) / pipeline
+                workdir.mkdir()
+                print(f"[{pipeline}] pages={count} transport={transport}", file=sys.stderr)
+                runner = run_app_pipeline if pipeline == "app" else run_scripts_pipeline
+                with replay_session(fixture_dir, transport) as session:
+                    started = time.perf_counter()
+                    result = runner(urls, session, workdir, encoder)
+                    total = time.perf_counter() - started
+                result.update(
+                    {
+                        "pages": count,
+                        "total_seconds": total,
+                        "pages_per_second": count / total if total else 0.0,
+                        "chunks_per_second": result["chunks"] / total if total else 0.0,
+                        "rss_bytes": rss_bytes(os.getpid()),
+                    }
+                )
+                results.setdefault(pipeline, {})[str(count)] = result
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "transport": transport,
+            "encoder": encoder_kind if encoder_kind == "fake" else model_name,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="3,100,1000")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES))
+    parser.add_argument("--transport", choices=("file", "http"), default="file")
+    parser.add_argument("--encoder", choices=("fake", "real"), default="fake")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(
+        [int(value) for value in args.pages.split(",")],
+        [name.strip() for name in args.pipelines.split(",") if name.strip()],
+        args.transport,
+        args.encoder,
+        args.model,
+    )
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+End-to-end load test for the /query path.
+
+Starts each app with ``benchmarks.serve``, replays the question mix from
+``benchmarks.questions`` at fixed concurrency levels and writes throughput,
+latency percentiles and server RSS as JSON. ``compare`` diffs two result files
+and exits non-zero when a metric regresses by more than the threshold.
+
+Usage:
+    python -m benchmarks.load_test run --apps services,app,serverless \
+        --concurrency 1,8,32 --requests 400 --out results.json
+    python -m benchmarks.load_test compare baseline.json results.json --threshold 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .questions import build_mix
+from .serve import APPS, REPO_ROOT
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of ``pid`` from /proc (Linux) or psutil when available."""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "mean_ms": (sum(ordered) / len(ordered) * 1000) if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": (ordered[-1] * 1000) if ordered else 0.0,
+    }
+
+
+class _Client(threading.local):
+    connection: Optional[http.client.HTTPConnection] = None
+
+
+def post_json(client: _Client, port: int, path: str, payload: Dict, timeout: float) -> Tuple[int, bytes]:
+    if client.connection is None:
+        client.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    body = json.dumps(payload).encode("utf-8")
+    try:
+        client.connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+        response = client.connection.getresponse()
+        return response.status, response.read()
+    except (http.client.HTTPException, OSError):
+        client.connection.close()
+        client.connection = None
+        raise
+
+
+def wait_until_healthy(port: int, process: subprocess.Popen, timeout: float, path: str = "/health/ready") -> float:
+    """Seconds until ``path`` answers below 500; the default waits for background loading to finish."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited early with code {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", path)
+            if connection.getresponse().status < 500:
+                return time.perf_counter() - started
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"Server on port {port} not healthy after {timeout:.0f}s")
+
+
+def run_level(
+    port: int, questions: List[Tuple[str, str]], concurrency: int, timeout: float, path: str = "/query"
+) -> Dict:
+    client = _Client()
+    latencies: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def one(item: Tuple[str, str]) -> None:
+        category, question = item
+        started = time.perf_counter()
+        try:
+            status, _ = post_json(client, port, path, {"question": question}, timeout)
+            key = str(status)
+        except Exception as exc:
+            key = type(exc).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            statuses[key] = statuses.get(key, 0) + 1
+            if key == "200":
+                latencies.setdefault(category, []).append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, questions))
+    wall = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    ok = statuses.get("200", 0)
+    return {
+        "concurrency": concurrency,
+        "requests": len(questions),
+        "wall_seconds": wall,
+        "throughput_rps": ok / wall if wall else 0.0,
+        "error_rate": 1.0 - ok / len(questions) if questions else 0.0,
+        "statuses": statuses,
+        "latency": latency_summary(all_latencies),
+        "by_category": {category: latency_summary(values) for category, values in latencies.items()},
+    }
+
+
+def benchmark_app(
+    name: str,
+    concurrency_levels: List[int],
+    total_requests: int,
+    llm_latency_ms: float,
+    warmup: int,
+    timeout: float,
+) -> Dict:
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.serve",
+        "--app", name, "--port", str(port), "--llm-latency-ms", str(llm_latency_ms),
+    ]
+    process = subprocess.Popen(command, cwd=REPO_ROOT)
+    try:
+        startup = wait_until_healthy(port, process, timeout=300)
+        rss_idle = rss_bytes(process.pid)
+        run_level(port, build_mix(warmup, seed=1), concurrency=1, timeout=timeout)
+        levels = {}
+        for concurrency in concurrency_levels:
+            print(f"[{name}] concurrency={concurrency} requests={total_requests}", file=sys.stderr)
+            result = run_level(port, build_mix(total_requests), concurrency, timeout)
+            result["rss_bytes"] = rss_bytes(process.pid)
+            levels[str(concurrency)] = result
+        return {
+            "entry_point": APPS[name],
+            "startup_seconds": startup,
+            "rss_bytes_idle": rss_idle,
+            "rss_bytes_peak": max((level["rss_bytes"] or 0) for level in levels.values()) if levels else None,
+            "levels": levels,
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def command_run(args: argparse.Namespace) -> int:
+    apps = [name.strip() for name in args.apps.split(",") if name.strip()]
+    levels = [int(value) for value in args.concurrency.split(",")]
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests_per_level": args.requests,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "results": {},
+    }
+    for name in apps:
+        report["results"][name] = benchmark_app(
+            name, levels, args.requests, args.llm_latency_ms, args.warmup, args.timeout
+        )
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+    return 0
+
+
+# metric path -> True when higher is better
+COMPARED_METRICS = {
+    ("throughput_rps",): True,
+    ("latency", "p50_ms"): False,
+    ("latency", "p95_ms"): False,
+    ("latency", "p99_ms"): False,
+    ("rss_bytes",): False,
+}
+
+
+def _lookup(data: Dict, path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data if isinstance(data, (int, float)) else None
+
+
+def compare_reports(baseline: Dict, candidate: Dict, threshold: float) -> Tuple[List[Dict], bool]:
+    rows: List[Dict] = []
+    regressed = False
+    for app, base_app in baseline.get("results", {}).items():
+        cand_app = candidate.get("results", {}).get(app)
+        if cand_app is None:
+            continue
+        for level, base_level in base_app.get("levels", {}).items():
+            cand_level = cand_app.get("levels", {}).get(level)
+            if cand_level is None:
+                continue
+            for path, higher_is_better in COMPARED_METRICS.items():
+                before = _lookup(base_level, path)
+                after = _lookup(cand_level, path)
+                if before is None or after is None or before == 0:
+                    continue
+                change = (after - before) / before
+                worse = -change if higher_is_better else change
+                is_regression = worse > threshold
+                regressed = regressed or is_regression
+                rows.append(
+                    {
+                        "app": app,
+                        "concurrency": level,
+                        "metric": ".".join(path),
+                        "baseline": before,
+                        "candidate": after,
+                        "change_pct": change * 100,
+                        "regression": is_regression,
+                    }
+                )
+    return rows, regressed
+
+
+def command_compare(args: argparse.Namespace) -> int:
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    candidate = json.loads(Path(args.candidate).read_text(encoding="utf-8"))
+    rows, regressed = compare_reports(baseline, candidate, args.threshold)
+    if args.json:
+        print(json.dumps({"rows": rows, "regressed": regressed}, indent=2))
+    else:
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(
+                f"{row['app']:<11} c={row['concurrency']:<4} {row['metric']:<15} "
+                f"{row['baseline']:>14.2f} -> {row['candidate']:>14.2f} "
+                f"({row['change_pct']:+6.1f}%) {flag}"
+            )
+    return 1 if regressed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Benchmark one or more apps")
+    run.add_argument("--apps", default=",".join(APPS))
+    run.add_argument("--concurrency", default="1,8,32")
+    run.add_argument("--requests", type=int, default=400, help="Requests per concurrency level")
+    run.add_argument("--warmup", type=int, default=20)
+    run.add_argument("--llm-latency-ms", type=float, default=50.0)
+    run.add_argument("--timeout", type=float, default=30.0)
+    run.add_argument("--out", default=None)
+    run.set_defaults(handler=command_run)
+
+    compare = sub.add_parser("compare", help="Diff two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    compare.add_argument("--json", action="store_true")
+    compare.set_defaults(handler=command_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
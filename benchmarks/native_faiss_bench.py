@@ -0,0 +1,140 @@
+"""
+LangChain vs native FAISS serving path.
+
+Builds one store, then checks that ``rag_core.indexes.FaissIndex`` returns the
+same chunks and scores as ``LangChainFaissIndex`` and reports what dropping
+LangChain saves: import time and RSS of a fresh process that loads the store,
+and per-query search overhead.
+
+Usage:
+    python -m benchmarks.native_faiss_bench --size 20000 --queries 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .engine_bench import synthetic_corpus
+from .fakes import FakeEmbeddings
+from .load_test import latency_summary
+from .questions import build_mix
+from .serve import BACKEND_DIR
+
+# Run in a fresh interpreter so import cost and RSS are not shared with this process.
+_LOADER = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+started = time.perf_counter()
+if {backend_name!r} == "langchain":
+    from langchain_community.vectorstores import FAISS
+    from rag_core.indexes import LangChainFaissIndex
+else:
+    import faiss
+    from rag_core.indexes import FaissIndex
+imported = time.perf_counter()
+if {backend_name!r} == "langchain":
+    index = LangChainFaissIndex(FAISS.load_local({path!r}, None))
+else:
+    index = FaissIndex.load({path!r})
+loaded = time.perf_counter()
+rss = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss = int(line.split()[1]) * 1024
+print(json.dumps({{"import_seconds": imported - started, "load_seconds": loaded - imported, "rss_bytes": rss}}))
+"""
+
+
+def cold_start(backend_name: str, path: str) -> Dict:
+    code = _LOADER.format(backend=str(BACKEND_DIR), backend_name=backend_name, path=path)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def build_store(size: int, path: str) -> None:
+    from langchain_community.vectorstores import FAISS
+    from rag_core.indexes import chunks_from_langchain, write_docstore
+
+    vectors, chunks = synthetic_corpus(size)
+    store = FAISS.from_embeddings(
+        [(chunk.text, vector.tolist()) for chunk, vector in zip(chunks, vectors)],
+        FakeEmbeddings(),
+        metadatas=[{"source": chunk.source} for chunk in chunks],
+    )
+    store.save_local(path)
+    write_docstore(path, chunks_from_langchain(store.docstore, store.index_to_docstore_id))
+
+
+def run(size: int, queries: int, k: int) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from langchain_community.vectorstores import FAISS
+    from rag_core.indexes import FaissIndex, LangChainFaissIndex
+
+    encoder = FakeEmbeddings()
+    questions = [question for _, question in build_mix(queries)]
+    vectors = [encoder.encode([question])[0] for question in questions]
+
+    with tempfile.TemporaryDirectory(prefix="mf-native-faiss-") as path:
+        build_store(size, path)
+        legacy = LangChainFaissIndex(FAISS.load_local(path, encoder))
+        native = FaissIndex.load(path)
+
+        mismatches = 0
+        for vector in vectors:
+            expected = [(hit.chunk.text, hit.chunk.source, hit.score) for hit in legacy.search(vector, k)]
+            actual = [(hit.chunk.text, hit.chunk.source, hit.score) for hit in native.search(vector, k)]
+            mismatches += expected != actual
+
+        timings = {}
+        for name, index in (("langchain", legacy), ("native", native)):
+            latencies = []
+            for vector in vectors:
+                started = time.perf_counter()
+                index.search(vector, k)
+                latencies.append(time.perf_counter() - started)
+            timings[name] = latency_summary(latencies)
+
+        cold = {name: cold_start(name, path) for name in ("langchain", "native")}
+
+    return {
+        "size": size,
+        "queries": queries,
+        "k": k,
+        "identical_results": mismatches == 0,
+        "mismatched_queries": mismatches,
+        "search": timings,
+        "cold_start": cold,
+        "saved": {
+            "import_seconds": cold["langchain"]["import_seconds"] - cold["native"]["import_seconds"],
+            "rss_bytes": cold["langchain"]["rss_bytes"] - cold["native"]["rss_bytes"],
+            "per_query_ms": timings["langchain"]["mean_ms"] - timings["native"]["mean_ms"],
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(args.size, args.queries, args.k)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+    return 0 if report["identical_results"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
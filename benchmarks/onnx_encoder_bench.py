@@ -0,0 +1,117 @@
+"""
+Torch vs ONNX Runtime (fp32 and int8) encoder comparison.
+
+Reports the cosine similarity of ONNX embeddings to the torch
+sentence-transformers embeddings, latency per batch size and the RSS of a
+fresh process holding each backend. Needs the real model and a prior
+``python -m rag_core.onnx_encoder export``. The parity tolerance itself is
+asserted by ``tests/test_onnx_encoder.py``.
+
+Usage:
+    python -m benchmarks.onnx_encoder_bench --batch-sizes 1,8,32,128
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .load_test import latency_summary
+from .questions import build_mix
+from .serve import BACKEND_DIR, load_corpus
+
+BACKENDS = {
+    "torch": "{model}",
+    "onnx_fp32": "onnx:{model}:fp32",
+    "onnx_int8": "onnx:{model}",
+}
+
+_RSS_PROBE = """
+import json, sys
+sys.path.insert(0, {backend!r})
+from rag_core.encoders import load_encoder
+encoder = load_encoder({name!r})
+encoder.encode(["warm up"])
+with open("/proc/self/status") as f:
+    rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+print(json.dumps({{"rss_bytes": rss}}))
+"""
+
+
+def rss_of(name: str) -> Optional[int]:
+    code = _RSS_PROBE.format(backend=str(BACKEND_DIR), name=name)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])["rss_bytes"]
+
+
+def run(model: str, batch_sizes: List[int], repeats: int, threads: int) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ["ONNX_INTRA_OP_THREADS"] = str(threads)
+    from rag_core.encoders import load_encoder
+
+    texts = [question for _, question in build_mix(64)] + [doc["text"] for doc in load_corpus()]
+    encoders = {key: load_encoder(template.format(model=model)) for key, template in BACKENDS.items()}
+
+    reference = encoders["torch"].encode(texts)
+    parity = {}
+    for key in ("onnx_fp32", "onnx_int8"):
+        cosines = np.sum(reference * encoders[key].encode(texts), axis=1)
+        parity[key] = {"min_cosine": float(cosines.min()), "mean_cosine": float(cosines.mean())}
+
+    latency: Dict[str, Dict] = {}
+    for key, encoder in encoders.items():
+        for batch_size in batch_sizes:
+            batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+            encoder.encode(batch)
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                encoder.encode(batch)
+                samples.append(time.perf_counter() - started)
+            summary = latency_summary(samples)
+            summary["per_text_ms"] = summary["mean_ms"] / batch_size
+            latency.setdefault(key, {})[str(batch_size)] = summary
+
+    return {
+        "model": model,
+        "intra_op_threads": threads,
+        "parity": parity,
+        "latency": latency,
+        "rss_bytes": {key: rss_of(template.format(model=model)) for key, template in BACKENDS.items()},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.model,
+        [int(value) for value in args.batch_sizes.split(",")],
+        args.repeats,
+        args.threads,
+    )
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
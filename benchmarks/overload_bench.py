@@ -0,0 +1,149 @@
+"""
+Goodput under overload, with and without admission control.
+
+Starts an app twice, with ``ADMISSION_ENABLED=0`` and ``1``, and offers
+open-loop load at each ``--rates`` value (requests per second, for
+``--duration`` seconds). Arrivals keep coming on schedule whatever the
+server does, as real traffic would. The client gives up after
+``--slo-ms``. For each rate the report gives:
+
+- goodput: 200 responses within the SLO, per second
+- the p50/p95 latency of those responses
+- rejections (429/503) and timeouts
+
+Without admission control, goodput collapses once the offered rate passes
+capacity, because every request queues and then times out. With it,
+goodput stays near capacity and the excess is rejected immediately.
+
+Usage:
+    python -m benchmarks.overload_bench --app services --rates 20,50,100,200 --duration 10 --out overload.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import _Client, free_port, latency_summary, post_json, wait_until_healthy
+from .questions import build_mix
+from .serve import APPS, REPO_ROOT
+
+
+def offer(port: int, rate: float, duration: float, slo: float) -> Dict:
+    questions = build_mix(int(rate * duration))
+    client = _Client()
+    lock = threading.Lock()
+    statuses: Dict[str, int] = {}
+    good: List[float] = []
+
+    def one(question: str) -> None:
+        started = time.perf_counter()
+        try:
+            status, _ = post_json(client, port, "/query", {"question": question}, slo)
+            key = str(status)
+        except Exception as exc:
+            key = type(exc).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            statuses[key] = statuses.get(key, 0) + 1
+            if key == "200" and elapsed <= slo:
+                good.append(elapsed)
+
+    started = time.perf_counter()
+    workers = max(8, int(rate * slo * 2))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, (_, question) in enumerate(questions):
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, question)
+    wall = time.perf_counter() - started
+    return {
+        "offered_rps": rate,
+        "requests": len(questions),
+        "goodput_rps": len(good) / wall if wall else 0.0,
+        "statuses": statuses,
+        "rejected": statuses.get("429", 0) + statuses.get("503", 0),
+        "good_latency": latency_summary(good),
+    }
+
+
+def measure(name: str, admission: bool, rates: List[float], duration: float, slo: float, llm_latency_ms: float) -> Dict:
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.serve",
+        "--app", name, "--port", str(port), "--llm-latency-ms", str(llm_latency_ms),
+    ]
+    env = dict(os.environ, WARMUP_ENABLED="0", ADMISSION_ENABLED="1" if admission else "0")
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    try:
+        wait_until_healthy(port, process, timeout=300)
+        results: Dict[str, Dict] = {}
+        for rate in rates:
+            print(f"[{name}] admission={'on' if admission else 'off'} rate={rate:g}/s", file=sys.stderr)
+            results[f"{rate:g}"] = offer(port, rate, duration, slo)
+            time.sleep(slo)  # let stragglers drain before the next rate
+        return results
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(name: str, rates: List[float], duration: float, slo_ms: float, llm_latency_ms: float) -> Dict:
+    slo = slo_ms / 1000.0
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "app": name,
+            "entry_point": APPS[name],
+            "duration_seconds": duration,
+            "slo_ms": slo_ms,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "results": {
+            "admission_off": measure(name, False, rates, duration, slo, llm_latency_ms),
+            "admission_on": measure(name, True, rates, duration, slo, llm_latency_ms),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), default="services")
+    parser.add_argument("--rates", default="20,50,100,200")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--slo-ms", type=float, default=2000.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.app,
+        [float(value) for value in args.rates.split(",")],
+        args.duration,
+        args.slo_ms,
+        args.llm_latency_ms,
+    )
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Overhead of the profiling surface when idle, and a check that it captures.
+
+Starts each app twice with warm-up disabled: once without
+``PROFILER_TOKEN`` (nothing installed) and once with it (installed, idle).
+Both replay the same question mix. The report compares their latency and
+throughput. With the token it then:
+
+- captures ``/admin/profile`` for ``--sample-seconds`` while the mix runs
+  again, and reports the samples and distinct stacks;
+- sends one ``/query`` with ``X-Profile: 1`` and fetches its cProfile from
+  ``/admin/profile/requests/<id>``.
+
+It exits with status 1 if the idle p50 is more than ``--max-overhead`` above
+the run without profiling, or if either capture came back empty.
+
+Usage:
+    python -m benchmarks.profiler_bench --apps services,app --requests 400 --out profiler.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import free_port, run_level, wait_until_healthy
+from .questions import build_mix
+from .serve import APPS, REPO_ROOT
+
+TOKEN = "profiler-bench"
+
+
+def request(port: int, method: str, path: str, headers: Dict[str, str], body: Optional[dict] = None, timeout: float = 120) -> tuple:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    payload = json.dumps(body).encode("utf-8") if body is not None else None
+    connection.request(method, path, body=payload, headers={"Content-Type": "application/json", **headers})
+    response = connection.getresponse()
+    return response.status, dict(response.getheaders()), response.read()
+
+
+def captures(port: int, requests: int, concurrency: int, sample_seconds: float, timeout: float) -> Dict:
+    admin = {"X-Admin-Token": TOKEN}
+    sampled: Dict = {}
+
+    def sample() -> None:
+        status, _, body = request(port, "GET", f"/admin/profile?seconds={sample_seconds}", admin)
+        profile = json.loads(body) if status == 200 else {"profiles": [{"samples": []}], "shared": {"frames": []}}
+        sampled.update(
+            status=status,
+            stacks=len(profile["profiles"][0]["samples"]),
+            frames=len(profile["shared"]["frames"]),
+        )
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    run_level(port, build_mix(requests, seed=3), concurrency, timeout)
+    sampler.join()
+
+    question = {"question": "What is the exit load on Nippon India Small Cap Fund?"}
+    status, headers, _ = request(port, "POST", "/query", {**admin, "X-Profile": "1"}, question)
+    profile_id = {key.lower(): value for key, value in headers.items()}.get("x-profile-id")
+    stats = b""
+    if profile_id:
+        _, _, stats = request(port, "GET", f"/admin/profile/requests/{profile_id}", admin)
+    return {
+        "sample": sampled,
+        "request": {"status": status, "profile_id": profile_id, "stats_lines": len(stats.splitlines())},
+    }
+
+
+def measure(name: str, token: Optional[str], requests: int, concurrency: int, sample_seconds: float, timeout: float) -> Dict:
+    port = free_port()
+    command = [sys.executable, "-m", "benchmarks.serve", "--app", name, "--port", str(port)]
+    env = dict(os.environ, WARMUP_ENABLED="0")
+    env.pop("PROFILER_TOKEN", None)
+    if token:
+        env["PROFILER_TOKEN"] = token
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    try:
+        wait_until_healthy(port, process, timeout=300)
+        run_level(port, build_mix(50, seed=1), concurrency=1, timeout=timeout)
+        level = run_level(port, build_mix(requests), concurrency, timeout)
+        result = {"latency": level["latency"], "throughput_rps": level["throughput_rps"]}
+        if token:
+            result["captures"] = captures(port, requests, concurrency, sample_seconds, timeout)
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(apps: List[str], requests: int, concurrency: int, sample_seconds: float, timeout: float) -> Dict:
+    results: Dict[str, Dict] = {}
+    for name in apps:
+        print(f"[{name}] profiling off / installed", file=sys.stderr)
+        off = measure(name, None, requests, concurrency, sample_seconds, timeout)
+        idle = measure(name, TOKEN, requests, concurrency, sample_seconds, timeout)
+        base = off["latency"]["p50_ms"]
+        results[name] = {
+            "off": off,
+            "installed": idle,
+            "idle_p50_overhead": (idle["latency"]["p50_ms"] - base) / base if base else 0.0,
+        }
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "sample_seconds": sample_seconds,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default="services,app")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--sample-seconds", type=float, default=2.0)
+    parser.add_argument("--max-overhead", type=float, default=0.10)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    apps = [name.strip() for name in args.apps.split(",") if name.strip()]
+    unknown = [name for name in apps if name not in APPS]
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(unknown)}")
+
+    report = run(apps, args.requests, args.concurrency, args.sample_seconds, args.timeout)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+    failed = []
+    for name, result in report["results"].items():
+        found = result["installed"]["captures"]
+        if result["idle_p50_overhead"] > args.max_overhead:
+            failed.append(f"{name}: idle overhead {result['idle_p50_overhead']:.1%}")
+        if not found["sample"].get("stacks"):
+            failed.append(f"{name}: empty sampling profile")
+        if not found["request"]["stats_lines"]:
+            failed.append(f"{name}: no request profile")
+    if failed:
+        print("; ".join(failed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Answer tiers under rising LLM load.
+
+Builds a ``RagEngine`` over the bundled corpus with a slow stub LLM
+(``--llm-latency-ms``) and a ``QualityGovernor``. It then answers
+``--queries`` questions at each ``--concurrency`` level, with a fresh
+governor per level. For each level the report gives:
+
+- how many answers came from each tier (llm, extractive, rules)
+- answer latency, and the governor's final pressure
+
+At concurrency up to ``--max-in-flight`` every answer should come from the
+LLM. Beyond it, the excess is moved to the cheaper tiers, so latency stays
+near the LLM's own instead of growing with the queue. The run exits with
+status 1 when the lowest level degrades anything or the highest level
+degrades nothing.
+
+Usage:
+    python -m benchmarks.quality_tiers_bench --concurrency 1,4,16,64 --llm-latency-ms 300 --out tiers.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .engine_bench import synthetic_corpus
+from .fakes import FakeEmbeddings, StubGenerator
+from .load_test import latency_summary
+from .questions import build_mix
+from .serve import BACKEND_DIR, load_corpus
+
+
+def measure(engine, governor, questions: List[str], concurrency: int) -> Dict:
+    lock = threading.Lock()
+    tiers: Dict[str, int] = {}
+    latencies: List[float] = []
+
+    def one(question: str) -> None:
+        started = time.perf_counter()
+        answer = engine.answer(question, 3)
+        elapsed = time.perf_counter() - started
+        with lock:
+            tiers[answer.generator] = tiers.get(answer.generator, 0) + 1
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, questions))
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(questions),
+        "tiers": tiers,
+        "throughput_rps": len(questions) / wall if wall else 0.0,
+        "latency": latency_summary(latencies),
+        "final_pressure": governor.pressure(),
+    }
+
+
+def run(levels: List[int], queries: int, llm_latency_ms: float, max_in_flight: int, p95_ms: float) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.engine import RagEngine
+    from rag_core.generators import ExtractiveGenerator, RuleBasedGenerator
+    from rag_core.indexes import NumpyIndex
+    from rag_core.quality import QualityGovernor
+
+    vectors, chunks = synthetic_corpus(len(load_corpus()))
+    index = NumpyIndex(vectors, chunks)
+    questions = [question for _, question in build_mix(queries)]
+    results: Dict[str, Dict] = {}
+    for concurrency in levels:
+        governor = QualityGovernor(max_in_flight=max_in_flight, p95_target_ms=p95_ms)
+        engine = RagEngine(
+            FakeEmbeddings(),
+            index,
+            generator=StubGenerator(llm_latency_ms / 1000.0),
+            fallback=RuleBasedGenerator(),
+            degraded=(ExtractiveGenerator(disclaimer=True), RuleBasedGenerator()),
+            governor=governor,
+        )
+        print(f"concurrency={concurrency}", file=sys.stderr)
+        results[str(concurrency)] = measure(engine, governor, questions, concurrency)
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "queries": queries,
+            "llm_latency_ms": llm_latency_ms,
+            "max_in_flight": max_in_flight,
+            "p95_target_ms": p95_ms,
+        },
+        "results": results,
+    }
+
+
+def degraded(result: Dict) -> int:
+    return sum(count for tier, count in result["tiers"].items() if tier != "llm")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--p95-ms", type=float, default=3000.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    levels = sorted(int(value) for value in args.concurrency.split(","))
+    report = run(levels, args.queries, args.llm_latency_ms, args.max_in_flight, args.p95_ms)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+    lowest, highest = report["results"][str(levels[0])], report["results"][str(levels[-1])]
+    if degraded(lowest) or (levels[-1] > args.max_in_flight and not degraded(highest)):
+        print("tier switching did not follow load", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
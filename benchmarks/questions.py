@@ -0,0 +1,62 @@
+"""
+Realistic question mix replayed by the load generator.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import List, Tuple
+
+FUNDS = [
+    "Nippon India Large Cap Fund",
+    "Nippon India Growth Mid Cap Fund",
+    "Nippon India Small Cap Fund",
+]
+
+FACTUAL_TEMPLATES = [
+    "What is the expense ratio of {fund}?",
+    "What is the exit load on {fund}?",
+    "What is the minimum SIP amount for {fund}?",
+    "Is there a lock-in period for {fund}?",
+    "What is the riskometer rating of {fund}?",
+    "What is the benchmark of {fund}?",
+    "How to download the capital gain statement for {fund}?",
+    "What is the investment objective of {fund}?",
+    "Who is the fund manager of {fund}?",
+]
+
+ADVICE_QUESTIONS = [
+    "Should I buy Nippon India Small Cap Fund now?",
+    "Which fund is better for me, large cap or mid cap?",
+    "Would you recommend switching to Nippon India Growth Mid Cap Fund?",
+    "Is it a good time to invest in small caps?",
+    "Compare returns of the large cap and small cap funds",
+]
+
+UNKNOWN_QUESTIONS = [
+    "What is the weather in Mumbai today?",
+    "Tell me about the history of the stock exchange building",
+    "How many employees does the AMC have?",
+    "What colour is the fund logo?",
+]
+
+# Share of each category in the replayed traffic.
+MIX = {"factual": 0.7, "advice": 0.2, "unknown": 0.1}
+
+
+def factual_questions() -> List[str]:
+    return [template.format(fund=fund) for template in FACTUAL_TEMPLATES for fund in FUNDS]
+
+
+def build_mix(total: int, seed: int = 7) -> List[Tuple[str, str]]:
+    """Return ``total`` (category, question) pairs in a reproducible order."""
+    rng = random.Random(seed)
+    pools = {
+        "factual": factual_questions(),
+        "advice": ADVICE_QUESTIONS,
+        "unknown": UNKNOWN_QUESTIONS,
+    }
+    categories = list(MIX)
+    weights = [MIX[category] for category in categories]
+    picks = rng.choices(categories, weights=weights, k=total)
+    return [(category, rng.choice(pools[category])) for category in picks]
@@ -0,0 +1,157 @@
+"""
+Accuracy gained by the rerank stage against the milliseconds it costs.
+
+Each factual question in the mix is labelled with the chunks that are
+relevant to it: the same fund, and text that mentions the asked-about fact.
+The benchmark retrieves ``candidates`` hits and reranks them to the top ``k``
+with ``rag_core.rerank.Reranker``. For each candidate count it reports
+hit@1, hit@k, MRR, the rerank latency (cold, then with the score cache warm)
+and how often the budget was exceeded. ``candidates=k`` is the no-rerank
+baseline.
+
+The offline defaults use the fake encoder and a lexical-overlap scorer with a
+simulated cost per pair. Pass ``--encoder real --scorer real`` to measure the
+actual models, and ``--corpus`` to point at a larger ``documents.json``.
+
+Usage:
+    python -m benchmarks.rerank_bench --candidates 10,20,50 --budget-ms 150 --out rerank.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .extractive_bench import labelled_questions
+from .fakes import FakeEmbeddings, LexicalScorer
+from .load_test import latency_summary
+from .serve import BACKEND_DIR, CORPUS_PATH
+
+
+def relevant_ids(records: List[Dict], question: str, term: str) -> set:
+    return {
+        record["id"]
+        for record in records
+        if record["fund_name"].lower() in question.lower() and term in record["text"].lower()
+    }
+
+
+def rank_metrics(ranked_ids: List[List[str]], relevant: List[set]) -> Dict[str, float]:
+    hit1 = hitk = reciprocal = 0.0
+    for ids, wanted in zip(ranked_ids, relevant):
+        ranks = [rank for rank, chunk_id in enumerate(ids, start=1) if chunk_id in wanted]
+        hit1 += bool(ranks and ranks[0] == 1)
+        hitk += bool(ranks)
+        reciprocal += 1.0 / ranks[0] if ranks else 0.0
+    count = len(relevant) or 1
+    return {"hit_at_1": hit1 / count, "hit_at_k": hitk / count, "mrr": reciprocal / count}
+
+
+def run(
+    corpus: Path,
+    candidate_counts: List[int],
+    k: int,
+    budget_ms: float,
+    encoder_kind: str,
+    scorer_kind: str,
+    model_name: str,
+    pair_latency_ms: float,
+) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.encoders import load_encoder
+    from rag_core.indexes import NumpyIndex, chunk_from_record
+    from rag_core.rerank import CrossEncoderScorer, Reranker
+    from rag_core.telemetry import RERANKS
+
+    with corpus.open("r", encoding="utf-8") as f:
+        records = json.load(f)
+    encoder = FakeEmbeddings() if encoder_kind == "fake" else load_encoder("sentence-transformers/all-MiniLM-L6-v2")
+    index = NumpyIndex(encoder.encode([r["text"] for r in records]), [chunk_from_record(r) for r in records])
+    scorer = LexicalScorer(pair_latency_ms / 1000.0) if scorer_kind == "fake" else CrossEncoderScorer(model_name)
+
+    labelled = [(q, relevant_ids(records, q, term)) for q, term in labelled_questions()]
+    labelled = [(q, wanted) for q, wanted in labelled if wanted]
+    vectors = {q: encoder.encode([q])[0] for q, _ in labelled}
+    relevant = [wanted for _, wanted in labelled]
+
+    baseline = [[hit.chunk.id for hit in index.search(vectors[q], k)] for q, _ in labelled]
+    results: Dict[str, Dict] = {str(k): {"reranked": False, **rank_metrics(baseline, relevant)}}
+    for candidates in candidate_counts:
+        reranker = Reranker(scorer, candidates=candidates, budget_ms=budget_ms)
+        timeouts_before = RERANKS.value(outcome="timeout") + RERANKS.value(outcome="skipped_busy")
+        passes: Dict[str, List[float]] = {"cold": [], "cached": []}
+        ranked: List[List[str]] = []
+        for name in passes:
+            ranked = []
+            for question, _ in labelled:
+                hits = index.search(vectors[question], candidates)
+                started = time.perf_counter()
+                top = reranker.rerank(question, hits, k)
+                passes[name].append(time.perf_counter() - started)
+                ranked.append([hit.chunk.id for hit in top])
+            if name == "cold":
+                cold_metrics = rank_metrics(ranked, relevant)
+        over_budget = RERANKS.value(outcome="timeout") + RERANKS.value(outcome="skipped_busy") - timeouts_before
+        results[str(candidates)] = {
+            "reranked": True,
+            **cold_metrics,
+            "cached_pass": rank_metrics(ranked, relevant),
+            "rerank_ms_cold": latency_summary(passes["cold"]),
+            "rerank_ms_cached": latency_summary(passes["cached"]),
+            "over_budget": over_budget,
+        }
+        print(f"[rerank] candidates={candidates} mrr={cold_metrics['mrr']:.3f}", file=sys.stderr)
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus_chunks": len(records),
+            "questions": len(labelled),
+            "k": k,
+            "budget_ms": budget_ms,
+            "encoder": encoder_kind,
+            "scorer": scorer_kind if scorer_kind == "fake" else model_name,
+            "pair_latency_ms": pair_latency_ms if scorer_kind == "fake" else None,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(CORPUS_PATH))
+    parser.add_argument("--candidates", default="10,20,50")
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--encoder", choices=("fake", "real"), default="fake")
+    parser.add_argument("--scorer", choices=("fake", "real"), default="fake")
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--pair-latency-ms", type=float, default=1.5, help="Simulated cost per pair (fake scorer)")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    report = run(
+        Path(args.corpus),
+        [int(value) for value in args.candidates.split(",")],
+        args.k,
+        args.budget_ms,
+        args.encoder,
+        args.scorer,
+        args.model,
+        args.pair_latency_ms,
+    )
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Scatter-gather search latency and throughput against shard count.
+
+Splits a synthetic corpus of ``--chunks`` vectors into N contiguous shards
+for each ``--shards`` value. Each shard is published as ``embeddings.npy`` +
+``docstore.json`` and served by its own ``rag_core.shard_server`` process,
+which ``ShardedIndex`` then queries. For each N the report gives:
+
+- serial search latency (p50/p95/p99)
+- throughput with ``--concurrency`` client threads
+- whether every merged top-k matches a single in-process ``NumpyIndex``
+  over the whole corpus
+
+With the largest N it then kills one shard and reports how many searches
+still answered, and their latency, which the deadline bounds.
+
+It exits with status 1 if any merged result differs from the single index,
+or if searches fail while shards are still alive.
+
+Usage:
+    python -m benchmarks.scatter_bench --chunks 200000 --shards 1,2,4,8 --queries 500 --out scatter.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .fakes import DIMENSION
+from .load_test import free_port, latency_summary
+from .serve import BACKEND_DIR
+
+
+def publish(root: Path, vectors: np.ndarray, offset: int) -> None:
+    from rag_core.artifacts import new_version
+    from rag_core.catalogue import EMBEDDINGS_FILE
+    from rag_core.indexes import Chunk, write_docstore
+
+    root.mkdir(parents=True)
+    with new_version(str(root)) as staging:
+        np.save(Path(staging.path) / EMBEDDINGS_FILE, vectors)
+        write_docstore(
+            staging.path,
+            (Chunk(str(offset + row), f"chunk {offset + row}", "https://example.com") for row in range(len(vectors))),
+        )
+        staging.counts["chunks"] = len(vectors)
+
+
+def wait_for_shard(port: int, process: subprocess.Popen, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Shard server on port {port} exited with {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Shard server on port {port} did not become healthy")
+
+
+def start_shards(roots: List[Path]) -> List[tuple]:
+    shards = []
+    for root in roots:
+        port = free_port()
+        command = [sys.executable, "-m", "rag_core.shard_server", str(root), "--port", str(port)]
+        shards.append((port, subprocess.Popen(command, cwd=BACKEND_DIR)))
+    for port, process in shards:
+        wait_for_shard(port, process)
+    return shards
+
+
+def stop_shards(shards: List[tuple]) -> None:
+    for _, process in shards:
+        process.terminate()
+    for _, process in shards:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def timed(index, queries: np.ndarray, k: int) -> tuple:
+    latencies: List[float] = []
+    results: List[Optional[List[str]]] = []
+    for query in queries:
+        started = time.perf_counter()
+        try:
+            results.append([hit.chunk.id for hit in index.search(query, k)])
+        except Exception:
+            results.append(None)
+        latencies.append(time.perf_counter() - started)
+    return latencies, results
+
+
+def throughput(index, queries: np.ndarray, k: int, concurrency: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda query: index.search(query, k), queries))
+    wall = time.perf_counter() - started
+    return len(queries) / wall if wall else 0.0
+
+
+def run(chunks: int, counts: List[int], queries: int, k: int, concurrency: int, deadline_ms: float) -> Dict:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.indexes import Chunk, NumpyIndex
+    from rag_core.scatter import ShardedIndex
+
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((chunks, DIMENSION)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    probes = rng.standard_normal((queries, DIMENSION)).astype(np.float32)
+    reference = NumpyIndex(vectors, [Chunk(str(row), "", "") for row in range(chunks)])
+    expected = [[hit.chunk.id for hit in reference.search(query, k)] for query in probes]
+
+    results: Dict[str, Dict] = {}
+    fault: Dict = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            size = -(-chunks // count)
+            roots = []
+            for number in range(count):
+                root = Path(tmp) / f"n{count}" / f"shard-{number:03d}"
+                publish(root, vectors[number * size:(number + 1) * size], number * size)
+                roots.append(root)
+            print(f"shards={count}", file=sys.stderr)
+            shards = start_shards(roots)
+            try:
+                index = ShardedIndex([f"127.0.0.1:{port}" for port, _ in shards], deadline_ms)
+                timed(index, probes[:20], k)  # open connections and fault pages in
+                latencies, found = timed(index, probes, k)
+                results[str(count)] = {
+                    "latency": latency_summary(latencies),
+                    "throughput_qps": throughput(index, probes, k, concurrency),
+                    "failed": sum(result is None for result in found),
+                    "mismatched": sum(result != want for result, want in zip(found, expected)),
+                }
+                if count == max(counts) and count > 1:
+                    port, process = shards[-1]
+                    process.kill()
+                    process.wait()
+                    latencies, found = timed(index, probes, k)
+                    fault = {
+                        "killed_shard": f"127.0.0.1:{port}",
+                        "answered": sum(result is not None for result in found),
+                        "latency": latency_summary(latencies),
+                    }
+                index.close()
+            finally:
+                stop_shards(shards)
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "chunks": chunks,
+            "queries": queries,
+            "k": k,
+            "concurrency": concurrency,
+            "deadline_ms": deadline_ms,
+        },
+        "results": results,
+        "dead_shard": fault,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--shards", default="1,2,4,8")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--deadline-ms", type=float, default=250.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    counts = sorted(int(value) for value in args.shards.split(","))
+    report = run(args.chunks, counts, args.queries, args.k, args.concurrency, args.deadline_ms)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+    if any(result["mismatched"] or result["failed"] for result in report["results"].values()):
+        print("sharded search differed from the single index", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
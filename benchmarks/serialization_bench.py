@@ -0,0 +1,209 @@
+"""
+Cost of serializing /query responses: FastAPI's default path versus
+``model_construct`` + ``rag_core.serialization.model_body`` (orjson).
+
+``micro`` times one response body per variant for both response shapes (the
+``backend/app`` schema with ``HttpUrl``/``date`` fields, and the flat model
+from ``backend/main.py``):
+
+- ``fastapi_default``: validated model, re-validated against ``response_model``,
+  ``jsonable_encoder`` and ``JSONResponse`` rendering, as FastAPI does it
+- ``model_dump_json``: validated model, pydantic's own serializer
+- ``construct_orjson``: ``model_construct`` + ``model_body``
+
+``e2e`` serves the same payload from two routes of a minimal app, one per
+path, and reports requests per second, so the gain is visible without
+retrieval noise. For whole-app before/after numbers use ``benchmarks.load_test
+run`` on both revisions and ``benchmarks.load_test compare``.
+
+Usage:
+    python -m benchmarks.serialization_bench micro --iterations 20000
+    python -m benchmarks.serialization_bench e2e --concurrency 1,8,32 --requests 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .load_test import free_port, run_level, wait_until_healthy
+from .serve import BACKEND_DIR, REPO_ROOT
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.schemas import QueryResponse as AppQueryResponse  # noqa: E402
+from rag_core import serialization  # noqa: E402
+from rag_core.serialization import JSON_MEDIA_TYPE, model_body  # noqa: E402
+
+
+class ServicesQueryResponse(BaseModel):
+    """Mirror of ``QueryResponse`` in ``backend/main.py`` (importing it would load the RAG service)."""
+
+    answer: str
+    source: str
+    lastUpdated: str
+    isRefusal: bool = False
+    educationalLink: Optional[str] = None
+
+
+PAYLOADS = {
+    "app": (
+        AppQueryResponse,
+        {
+            "answer": "The total expense ratio of the Direct plan is 0.68%. Facts-only. No investment advice. "
+            "Last updated from sources: 2025-01-15.",
+            "citation": "https://mf.nipponindiaim.com/FundsAndPerformance/Pages/NipponIndia-Large-Cap-Fund.aspx",
+            "last_updated": date(2025, 1, 15),
+            "matched_fund": "Nippon India Large Cap Fund",
+            "metadata": {"score": 0.8123},
+        },
+    ),
+    "services": (
+        ServicesQueryResponse,
+        {
+            "answer": "The expense ratio of Nippon India Large Cap Fund (Direct) is 0.68% per annum.",
+            "source": "https://mf.nipponindiaim.com/FundsAndPerformance/Pages/NipponIndia-Large-Cap-Fund.aspx",
+            "lastUpdated": "N/A",
+            "isRefusal": False,
+        },
+    ),
+}
+
+
+def variants(model: type, data: Dict) -> Dict[str, Callable[[], bytes]]:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    field = create_response_field(name="Response_query", type_=model)
+    loop = asyncio.new_event_loop()
+
+    def fastapi_default() -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=model(**data)))
+        return JSONResponse(content).body
+
+    return {
+        "fastapi_default": fastapi_default,
+        "model_dump_json": lambda: model(**data).model_dump_json().encode("utf-8"),
+        "construct_orjson": lambda: model_body(model.model_construct(**data)),
+    }
+
+
+def time_per_call(fn: Callable[[], bytes], iterations: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def run_micro(iterations: int) -> Dict:
+    results: Dict[str, Dict] = {}
+    for shape, (model, data) in PAYLOADS.items():
+        timings = {name: time_per_call(fn, iterations) * 1e6 for name, fn in variants(model, data).items()}
+        bodies = {name: json.loads(fn()) for name, fn in variants(model, data).items()}
+        results[shape] = {
+            "us_per_response": timings,
+            "speedup_vs_default": timings["fastapi_default"] / timings["construct_orjson"],
+            "bodies_equal": all(body == bodies["fastapi_default"] for body in bodies.values()),
+        }
+    return results
+
+
+def create_e2e_app():
+    """Minimal app serving one payload through each path (``uvicorn --factory``)."""
+    from fastapi import FastAPI, Response
+
+    model, data = PAYLOADS["app"]
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok"}
+
+    @app.post("/default", response_model=model)
+    async def default_path():
+        return model(**data)
+
+    @app.post("/orjson", response_model=model)
+    async def orjson_path():
+        return Response(content=model_body(model.model_construct(**data)), media_type=JSON_MEDIA_TYPE)
+
+    return app
+
+
+def run_e2e(concurrency_levels: List[int], requests: int, timeout: float) -> Dict:
+    port = free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "--factory", "benchmarks.serialization_bench:create_e2e_app",
+        "--port", str(port), "--log-level", "warning",
+    ]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(BACKEND_DIR), os.getenv("PYTHONPATH")])))
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    questions = [("factual", "payload")] * requests
+    try:
+        wait_until_healthy(port, process, timeout=60, path="/health")
+        results: Dict[str, Dict] = {}
+        for path in ("/default", "/orjson"):
+            run_level(port, questions[:100], 1, timeout, path=path)
+            for concurrency in concurrency_levels:
+                level = run_level(port, questions, concurrency, timeout, path=path)
+                results.setdefault(path.strip("/"), {})[str(concurrency)] = {
+                    "throughput_rps": level["throughput_rps"],
+                    "latency": level["latency"],
+                }
+        return results
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    micro = sub.add_parser("micro", help="Per-response serialization cost")
+    micro.add_argument("--iterations", type=int, default=20000)
+    e2e = sub.add_parser("e2e", help="Requests per second through each response path")
+    e2e.add_argument("--concurrency", default="1,8,32")
+    e2e.add_argument("--requests", type=int, default=2000)
+    e2e.add_argument("--timeout", type=float, default=30.0)
+    for command in (micro, e2e):
+        command.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "micro":
+        results = run_micro(args.iterations)
+    else:
+        results = run_e2e([int(value) for value in args.concurrency.split(",")], args.requests, args.timeout)
+    encoder = "orjson" if serialization.orjson is not None else "stdlib json"
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "encoder": encoder,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Stand up one of the API apps offline for benchmarking.
+
+The real embedding model and Gemini are replaced with the deterministic fakes
+from ``benchmarks.fakes`` and a vector store is built from the bundled
+``backend/data/documents.json`` corpus, so no network access is needed.
+
+Usage:
+    python -m benchmarks.serve --app services --port 8101
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from .fakes import FakeEmbeddings, StubLLM
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = REPO_ROOT / "backend"
+FRONTEND_DIR = REPO_ROOT / "frontend"
+CORPUS_PATH = BACKEND_DIR / "data" / "documents.json"
+
+# Benchmark name -> entry point it stands up
+APPS = {
+    "services": "backend/main.py",
+    "app": "backend/app/main.py",
+    "serverless": "frontend/api/fastapi/main.py",
+}
+
+
+def load_corpus() -> List[Dict]:
+    with CORPUS_PATH.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def prepare_numpy_store(workdir: Path) -> Path:
+    """Write documents.json + embeddings.npy encoded with the fake encoder."""
+    store = workdir / "numpy_store"
+    store.mkdir(parents=True, exist_ok=True)
+    documents = load_corpus()
+    embeddings = FakeEmbeddings().encode([doc["text"] for doc in documents])
+    with (store / "documents.json").open("w", encoding="utf-8") as f:
+        json.dump(documents, f)
+    np.save(store / "embeddings.npy", embeddings)
+    return store
+
+
+def prepare_faiss_store(workdir: Path, native: bool = True) -> Path:
+    """
+    Build a LangChain FAISS store over the bundled corpus with fake embeddings,
+    plus the native ``docstore.json`` unless ``native`` is False.
+    """
+    from langchain_community.vectorstores import FAISS
+    from rag_core.indexes import chunks_from_langchain, write_docstore
+
+    store = workdir / "faiss_index"
+    documents = load_corpus()
+    vector_store = FAISS.from_texts(
+        [doc["text"] for doc in documents],
+        FakeEmbeddings(),
+        metadatas=[{"source": doc["source"], "fund_name": doc["fund_name"]} for doc in documents],
+    )
+    vector_store.save_local(str(store))
+    if native:
+        write_docstore(str(store), chunks_from_langchain(vector_store.docstore, vector_store.index_to_docstore_id))
+    return store
+
+
+def install_stub_llm(latency_seconds: float) -> None:
+    import google.generativeai as genai
+
+    StubLLM.latency_seconds = latency_seconds
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = StubLLM
+    os.environ["GEMINI_API_KEY"] = "benchmark-stub"
+
+
+# Model name that routes rag_core.encoders.load_encoder to the fake encoder
+FAKE_MODEL_NAME = "fake:hash"
+
+
+def build_app(
+    name: str, workdir: Path, llm_latency_seconds: float, native_store: bool = True, load_delay_seconds: float = 0.0
+):
+    """
+    Import the requested entry point with fakes wired in and return its ASGI app.
+    ``load_delay_seconds`` makes loading the fake encoder as slow as a real model.
+    """
+    sys.path.insert(0, str(BACKEND_DIR))
+    from rag_core.encoders import register_encoder
+
+    def slow_encoder(model_name: str) -> FakeEmbeddings:
+        time.sleep(load_delay_seconds)
+        return FakeEmbeddings(model_name)
+
+    register_encoder("fake:", slow_encoder if load_delay_seconds else FakeEmbeddings)
+    os.environ["EMBEDDING_MODEL"] = FAKE_MODEL_NAME
+    os.environ["EMBEDDINGS_MODEL"] = FAKE_MODEL_NAME
+
+    if name == "app":
+        os.environ["DATA_DIR"] = str(prepare_numpy_store(workdir))
+        return importlib.import_module("app.main").app
+
+    install_stub_llm(llm_latency_seconds)
+    os.environ["VECTOR_STORE_PATH"] = str(prepare_faiss_store(workdir, native_store))
+    if name == "services":
+        return importlib.import_module("main").app
+    if name == "serverless":
+        sys.path.insert(0, str(FRONTEND_DIR))
+        return importlib.import_module("api.fastapi.main").app
+
+    raise ValueError(f"Unknown app '{name}'. Choose from: {', '.join(APPS)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(APPS), required=True)
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--workdir", type=Path, default=None)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--langchain-store", action="store_true", help="Serve through the legacy LangChain loader")
+    parser.add_argument("--load-delay-ms", type=float, default=0.0, help="Extra time to load the fake encoder")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix=f"mf-bench-{args.app}-"))
+    app = build_app(
+        args.app,
+        workdir,
+        args.llm_latency_ms / 1000.0,
+        native_store=not args.langchain_store,
+        load_delay_seconds=args.load_delay_ms / 1000.0,
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
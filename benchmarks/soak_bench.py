@@ -0,0 +1,155 @@
+"""
+Soak test: RSS of a worker over thousands of queries.
+
+Starts each app with ``PROFILER_TOKEN`` set, so ``/admin/memory`` is
+available, and runs ``--warmup`` queries to fill its caches. It then takes
+the baseline RSS and runs ``--rounds`` rounds of ``--requests`` queries, each
+round a differently seeded question mix. The RSS is recorded after every
+round. The report gives:
+
+- the RSS after each round and its growth over the baseline
+- the per-component breakdown from ``/admin/memory`` at the baseline and
+  at the end
+- with ``--tracemalloc``, the top allocation sites grown since the baseline,
+  from ``/admin/memory/diff`` (tracing slows requests, so latency is not
+  comparable in that mode)
+
+It exits with status 1 if any app's RSS grew by more than ``--max-growth-mb``
+over the baseline, or if more than 1% of requests failed.
+
+Usage:
+    python -m benchmarks.soak_bench --apps services,app --rounds 5 --requests 1000 --max-growth-mb 50 --out soak.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import free_port, rss_bytes, run_level, wait_until_healthy
+from .questions import build_mix
+from .serve import APPS, REPO_ROOT
+
+TOKEN = "soak-bench"
+MB = 1024 * 1024
+
+
+def admin(port: int, method: str, path: str) -> Dict:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    connection.request(method, path, headers={"X-Admin-Token": TOKEN})
+    response = connection.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path} returned {response.status}: {body[:200]!r}")
+    return json.loads(body)
+
+
+def components(report: Dict) -> Dict[str, int]:
+    return {name: component["nbytes"] for name, component in report["components"].items()}
+
+
+def soak(name: str, warmup: int, rounds: int, requests: int, concurrency: int, trace: bool, timeout: float) -> Dict:
+    port = free_port()
+    command = [sys.executable, "-m", "benchmarks.serve", "--app", name, "--port", str(port)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=dict(os.environ, PROFILER_TOKEN=TOKEN))
+    try:
+        wait_until_healthy(port, process, timeout=300)
+        run_level(port, build_mix(warmup, seed=1), concurrency, timeout)
+        if trace:
+            admin(port, "POST", "/admin/memory/snapshot")
+        baseline_report = admin(port, "GET", "/admin/memory")
+        baseline = rss_bytes(process.pid) or 0
+
+        samples: List[Dict] = []
+        sent = failed = 0
+        for number in range(rounds):
+            level = run_level(port, build_mix(requests, seed=100 + number), concurrency, timeout)
+            sent += level["requests"]
+            failed += level["requests"] - level["statuses"].get("200", 0)
+            rss = rss_bytes(process.pid) or 0
+            samples.append({"round": number + 1, "rss_bytes": rss, "growth_bytes": rss - baseline, "p50_ms": level["latency"]["p50_ms"]})
+            print(f"[{name}] round {number + 1}/{rounds}: RSS {rss / MB:.1f} MB ({(rss - baseline) / MB:+.1f})", file=sys.stderr)
+
+        final_report = admin(port, "GET", "/admin/memory")
+        result = {
+            "entry_point": APPS[name],
+            "requests": sent,
+            "failed": failed,
+            "baseline_rss_bytes": baseline,
+            "rounds": samples,
+            "max_growth_bytes": max((sample["growth_bytes"] for sample in samples), default=0),
+            "components": {"baseline": components(baseline_report), "final": components(final_report)},
+            "accounted_heap_bytes": final_report["accounted_heap_bytes"],
+        }
+        if trace:
+            result["tracemalloc"] = admin(port, "GET", "/admin/memory/diff?limit=10")
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default="services,app")
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-growth-mb", type=float, default=50.0)
+    parser.add_argument("--tracemalloc", action="store_true", help="Trace allocations and report the top growth sites")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    apps = [name.strip() for name in args.apps.split(",") if name.strip()]
+    unknown = [name for name in apps if name not in APPS]
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(unknown)}")
+
+    results = {
+        name: soak(name, args.warmup, args.rounds, args.requests, args.concurrency, args.tracemalloc, args.timeout)
+        for name in apps
+    }
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "warmup": args.warmup,
+            "rounds": args.rounds,
+            "requests_per_round": args.requests,
+            "concurrency": args.concurrency,
+            "max_growth_mb": args.max_growth_mb,
+            "tracemalloc": args.tracemalloc,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+    failed = [
+        name
+        for name, result in results.items()
+        if result["max_growth_bytes"] > args.max_growth_mb * MB or result["failed"] > 0.01 * result["requests"]
+    ]
+    if failed:
+        print(f"RSS grew past {args.max_growth_mb:.0f} MB or requests failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
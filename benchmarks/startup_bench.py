@@ -0,0 +1,143 @@
+"""
+Time to bind versus time to ready, with and without background loading.
+
+Starts each app with ``BACKGROUND_LOADING=0`` and ``1``, with
+``QUERY_REQUIRES_READY=1`` and a fake encoder that takes ``--load-delay-ms``
+to load. It polls ``/health/live``, ``/health/ready`` and ``/query`` until
+ready, and reports:
+
+- the seconds until ``/health/live`` first answered (the server bound)
+- the seconds until ``/health/ready`` answered 200
+- the phases and their durations, from the final ``/health/ready`` body
+- the ``/query`` statuses seen while loading
+
+It exits with status 1 if, with background loading, the server did not
+answer ``/health/live`` well before it was ready, or ``/query`` answered
+200 before ready.
+
+Usage:
+    python -m benchmarks.startup_bench --apps services,app --load-delay-ms 5000 --out startup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import free_port
+from .serve import APPS, REPO_ROOT
+
+
+def probe(port: int, method: str, path: str, body: Optional[dict] = None) -> tuple:
+    """(status, parsed body) or (None, None) while the port is closed."""
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        connection.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    except (OSError, ValueError):
+        return None, None
+
+
+def measure(name: str, background: bool, load_delay_ms: float, timeout: float) -> Dict:
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.serve",
+        "--app", name, "--port", str(port), "--load-delay-ms", str(load_delay_ms),
+    ]
+    env = dict(os.environ, BACKGROUND_LOADING="1" if background else "0", QUERY_REQUIRES_READY="1")
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    live: Optional[float] = None
+    statuses: Dict[str, int] = {}
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited early with code {process.returncode}")
+            status, _ = probe(port, "GET", "/health/live")
+            if status == 200 and live is None:
+                live = time.perf_counter() - started
+            ready_status, snapshot = probe(port, "GET", "/health/ready")
+            if ready_status == 200:
+                return {
+                    "live_seconds": live,
+                    "ready_seconds": time.perf_counter() - started,
+                    "phases": {phase["name"]: phase["seconds"] for phase in snapshot["phases"]},
+                    "query_statuses_while_loading": statuses,
+                }
+            if live is not None:
+                status, _ = probe(port, "POST", "/query", {"question": "What is the expense ratio of Nippon India Large Cap Fund?"})
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            time.sleep(0.1)
+        raise TimeoutError(f"Server on port {port} not ready after {timeout:.0f}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(apps: List[str], load_delay_ms: float, timeout: float) -> Dict:
+    results: Dict[str, Dict] = {}
+    for name in apps:
+        print(f"[{name}] background loading off / on", file=sys.stderr)
+        results[name] = {
+            "foreground": measure(name, False, load_delay_ms, timeout),
+            "background": measure(name, True, load_delay_ms, timeout),
+        }
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "load_delay_ms": load_delay_ms,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default="services,app")
+    parser.add_argument("--load-delay-ms", type=float, default=5000.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    apps = [name.strip() for name in args.apps.split(",") if name.strip()]
+    unknown = [name for name in apps if name not in APPS]
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(unknown)}")
+
+    report = run(apps, args.load_delay_ms, args.timeout)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+    delay = args.load_delay_ms / 1000.0
+    failed = [
+        name
+        for name, result in report["results"].items()
+        if result["background"]["live_seconds"] is None
+        or result["background"]["ready_seconds"] - result["background"]["live_seconds"] < delay / 2
+        or result["background"]["query_statuses_while_loading"].get("200")
+    ]
+    if failed:
+        print(f"background loading did not bind before ready, or served /query early: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Startup cost versus hit rate of the warm-up stage (``rag_core.warmup``).
+
+Starts each app twice, with ``WARMUP_ENABLED=0`` and ``1``, and measures the
+time until ``/health/ready`` answers 200 (warm-up is the last loading
+phase, so it is included). Both runs then replay the same
+question mix. The report gives the warm table's hit rate, read from
+``mf_cache_lookups_total{cache="warm"}`` on ``/metrics``, and the latency for
+each run.
+
+Usage:
+    python -m benchmarks.warmup_bench --apps services,app --requests 400 --out warmup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .load_test import free_port, run_level, wait_until_healthy
+from .questions import build_mix
+from .serve import APPS, REPO_ROOT
+
+_LOOKUP_LINE = re.compile(r'^mf_cache_lookups_total\{cache="warm",result="(hit|miss)"\} (\S+)$', re.M)
+
+
+def warm_lookups(port: int) -> Dict[str, float]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.request("GET", "/metrics")
+    text = connection.getresponse().read().decode("utf-8")
+    counts = {"hit": 0.0, "miss": 0.0}
+    for result, value in _LOOKUP_LINE.findall(text):
+        counts[result] = float(value)
+    return counts
+
+
+def measure(name: str, warmup: bool, requests: int, llm_latency_ms: float, timeout: float) -> Dict:
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.serve",
+        "--app", name, "--port", str(port), "--llm-latency-ms", str(llm_latency_ms),
+    ]
+    env = dict(os.environ, WARMUP_ENABLED="1" if warmup else "0")
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    try:
+        startup = wait_until_healthy(port, process, timeout=300)
+        level = run_level(port, build_mix(requests), concurrency=1, timeout=timeout)
+        lookups = warm_lookups(port)
+        total = lookups["hit"] + lookups["miss"]
+        return {
+            "startup_seconds": startup,
+            "warm_hits": lookups["hit"],
+            "hit_rate": lookups["hit"] / total if total else 0.0,
+            "latency": level["latency"],
+            "by_category": level["by_category"],
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(apps: List[str], requests: int, llm_latency_ms: float, timeout: float) -> Dict:
+    results: Dict[str, Dict] = {}
+    for name in apps:
+        print(f"[{name}] warm-up off / on", file=sys.stderr)
+        cold = measure(name, False, requests, llm_latency_ms, timeout)
+        warm = measure(name, True, requests, llm_latency_ms, timeout)
+        results[name] = {
+            "entry_point": APPS[name],
+            "without_warmup": cold,
+            "with_warmup": warm,
+            "startup_cost_seconds": warm["startup_seconds"] - cold["startup_seconds"],
+            "p50_saved_ms": cold["latency"]["p50_ms"] - warm["latency"]["p50_ms"],
+        }
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": requests,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default=",".join(APPS))
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    apps = [name.strip() for name in args.apps.split(",") if name.strip()]
+    report = run(apps, args.requests, args.llm_latency_ms, args.timeout)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Serverless copy of the backend API.
+
+Shared code lives in ``backend/rag_core``. In a checkout of the repository it
+is imported from there. A Vercel deploy uploads only ``frontend/``, so
+``backend/scripts/vendor_rag_core.py`` copies the package into ``_vendor/``
+before deploying, and that copy is used instead.
+"""
+
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_BACKEND_DIR = os.path.abspath(os.path.join(_HERE, "..", "..", "..", "backend"))
+_VENDOR_DIR = os.path.join(_HERE, "_vendor")
+
+for _path in (_BACKEND_DIR, _VENDOR_DIR):
+    if os.path.isdir(os.path.join(_path, "rag_core")):
+        if _path not in sys.path:
+            sys.path.append(_path)
+        break
+else:
+    raise ImportError(
+        "rag_core is not in this deployment. Run `python backend/scripts/vendor_rag_core.py` "
+        "from the repository root before deploying frontend/."
+    )
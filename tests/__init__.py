@@ -0,0 +1,3 @@
+"""
+Unit tests for the shared ``rag_core`` building blocks.
+"""
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from rag_core import admission
+from rag_core.admission import AdmissionController
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+async def settle() -> None:
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_slots_are_handed_over_in_arrival_order(clock):
+    async def scenario():
+        controller = AdmissionController(concurrency=2, max_queue=10, target_ms=100, interval_ms=500)
+        assert await controller.acquire() is None
+        assert await controller.acquire() is None
+        admitted = []
+
+        async def queued(name):
+            admitted.append((name, await controller.acquire()))
+
+        tasks = [asyncio.create_task(queued(name)) for name in ("b", "c", "d")]
+        await settle()
+        assert controller.queued == 3 and admitted == []
+
+        for _ in range(3):
+            controller.release()
+            await settle()
+        await asyncio.gather(*tasks)
+        return controller, admitted
+
+    controller, admitted = asyncio.run(scenario())
+
+    assert admitted == [("b", None), ("c", None), ("d", None)]
+    assert controller.running == 2 and controller.queued == 0
+
+
+def test_arrivals_beyond_the_queue_limit_are_rejected(clock):
+    async def scenario():
+        controller = AdmissionController(concurrency=1, max_queue=2)
+        await controller.acquire()
+        waiting = [asyncio.create_task(controller.acquire()) for _ in range(2)]
+        await settle()
+        reason = await controller.acquire()
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        return controller, reason
+
+    controller, reason = asyncio.run(scenario())
+
+    assert reason == "queue_full"
+    assert controller.queued == 0 and controller.running == 1
+
+
+def test_a_standing_queue_is_shed_until_a_request_gets_through_under_target(clock):
+    async def scenario():
+        controller = AdmissionController(concurrency=1, max_queue=10, target_ms=100, interval_ms=500)
+        assert await controller.acquire() is None  # a
+        b = asyncio.create_task(controller.acquire())
+        c = asyncio.create_task(controller.acquire())
+        await settle()
+
+        clock.now += 0.2  # b waited 200 ms: above target, but not yet for a whole interval
+        controller.release()
+        assert await b is None
+        assert not controller.dropping
+
+        d = asyncio.create_task(controller.acquire())
+        await settle()
+        clock.now += 0.6  # c waited 800 ms, and waits have been above target for 600 ms
+        controller.release()
+        await asyncio.sleep(0)  # c wakes, is shed and hands its slot to d
+        shed_on_arrival = controller.reject_reason()
+        reasons = await asyncio.gather(c, d)
+
+        clock.now += 1.0
+        recovered = await controller.acquire()
+        return controller, shed_on_arrival, reasons, recovered
+
+    controller, shed_on_arrival, reasons, recovered = asyncio.run(scenario())
+
+    assert reasons == ["standing_queue", "standing_queue"]
+    assert shed_on_arrival == "standing_queue"
+    assert recovered is None and not controller.dropping
+    assert controller.running == 1
+
+
+def test_a_cancelled_waiter_leaves_the_queue(clock):
+    async def scenario():
+        controller = AdmissionController(concurrency=1, max_queue=10)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await settle()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        controller.release()
+        return controller
+
+    controller = asyncio.run(scenario())
+
+    assert controller.queued == 0 and controller.running == 0
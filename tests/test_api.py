@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+
+from rag_core.api import QueryAPI, QueryRequest
+from rag_core.startup import Startup
+
+QUESTION = "What is the expense ratio of Nippon India Large Cap Fund?"
+
+
+class StubService:
+    """Answers every question from one fund page and counts the queries."""
+
+    def __init__(self) -> None:
+        self.queries = []
+        self.reloaded = True
+        self.changed_sources = None
+        self.generation = "g1"
+        self.startup = Startup()
+
+    def is_ready(self) -> bool:
+        return True
+
+    def query(self, question: str, k: int = 3, catalogue=None) -> dict:
+        self.queries.append(question)
+        return {"answer": "The expense ratio is 1.62%.", "source": "https://example.com/large-cap", "sources": ["https://example.com/large-cap"]}
+
+    def reload(self) -> bool:
+        return self.reloaded
+
+    def memory_components(self) -> dict:
+        return {}
+
+
+def body(api: QueryAPI, question: str) -> dict:
+    return json.loads(asyncio.run(api.query_body(QueryRequest(question=question))))
+
+
+def test_warmed_answers_skip_the_service_and_refusals_never_reach_it(monkeypatch):
+    monkeypatch.setenv("WARMUP_ENABLED", "1")
+    service = StubService()
+    api = QueryAPI(service)
+    api.warm_up()
+    warmed = len(service.queries)
+
+    assert body(api, QUESTION)["answer"] == "The expense ratio is 1.62%."
+    assert body(api, "Should I invest in small cap funds?")["isRefusal"] is True
+    assert len(service.queries) == warmed
+
+
+def test_a_reload_rewarms_only_when_the_index_changed(monkeypatch):
+    monkeypatch.setenv("WARMUP_ENABLED", "1")
+    service = StubService()
+    api = QueryAPI(service)
+
+    service.reloaded = False
+    api.reload_and_warm_up()
+    assert service.queries == []
+
+    service.reloaded = True
+    api.reload_and_warm_up()
+    assert QUESTION in service.queries and len(api.prepared) > 0
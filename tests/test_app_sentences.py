@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic_settings")
+
+from app.config import Settings
+from app.rag_service import RagService
+from benchmarks.fakes import FakeEmbeddings
+from rag_core import artifacts
+from rag_core.sentences import SENTENCE_EMBEDDINGS_FILE, SENTENCES_FILE, SentenceIndex
+
+DOCUMENTS = [
+    {
+        "id": f"nippon_small_cap_{number}",
+        "fund_id": "nippon_small_cap",
+        "fund_name": "Nippon India Small Cap Fund",
+        "section": "Load",
+        "text": text,
+        "source": "https://mf.nipponindiaim.com/FundsAndPerformance/Pages/NipponIndia-Small-Cap-Fund.aspx",
+        "captured_at": "2025-01-18",
+    }
+    for number, text in enumerate(
+        [
+            "Exit load is 1% if redeemed within one year. There is no entry load.",
+            "The minimum SIP amount is Rs 100. The benchmark is the Nifty Smallcap 250 TRI.",
+        ]
+    )
+]
+
+
+def service_for(data_dir) -> RagService:
+    service = RagService()
+    service.settings = Settings(data_dir=data_dir, embeddings_model="fake-hash-encoder", warmup_enabled=False)
+    service._encoder = FakeEmbeddings()
+    return service
+
+
+def files_in(directory: str) -> dict:
+    return {name: os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)}
+
+
+def test_ingestion_publishes_the_sentence_index_in_the_manifest(tmp_path, monkeypatch):
+    raw = tmp_path / "raw_documents.json"
+    raw.write_text(json.dumps(DOCUMENTS))
+    service_for(tmp_path).ingest_documents(raw)
+
+    version = artifacts.resolve(str(tmp_path))
+    manifest = artifacts.verify_checksums(version)
+    assert {SENTENCES_FILE, SENTENCE_EMBEDDINGS_FILE} <= set(manifest["files"])
+    assert manifest["counts"]["sentences"] == 4
+
+    def no_build(*args, **kwargs):
+        raise AssertionError("the published sentence index should be loaded, not rebuilt")
+
+    monkeypatch.setattr(SentenceIndex, "build", no_build)
+    loaded = service_for(tmp_path)
+    assert loaded.load_index()
+    assert loaded._snapshot.sentences.chunk_count == len(DOCUMENTS)
+
+
+def test_a_version_without_sentences_is_served_without_being_written_to(tmp_path):
+    encoder = FakeEmbeddings()
+    with artifacts.new_version(str(tmp_path)) as staging:
+        np.save(os.path.join(staging.path, "embeddings.npy"), encoder.encode([doc["text"] for doc in DOCUMENTS]))
+        with open(os.path.join(staging.path, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(DOCUMENTS, f)
+        staging.counts["documents"] = len(DOCUMENTS)
+    version = artifacts.resolve(str(tmp_path))
+    before = files_in(version)
+
+    service = service_for(tmp_path)
+    assert service.load_index()
+
+    assert service._snapshot.sentences is not None and service._snapshot.sentences.chunk_count == len(DOCUMENTS)
+    assert files_in(version) == before
+    artifacts.verify_checksums(version)
+
+
+def test_queries_during_a_reload_are_answered_from_one_version(tmp_path, monkeypatch):
+    raw = tmp_path / "raw_documents.json"
+    raw.write_text(json.dumps(DOCUMENTS))
+    service = service_for(tmp_path)
+    service.ingest_documents(raw)
+    question = "What is the exit load?"
+    before = service.answer(question)
+
+    # The next version has no sentence index, so loading it builds one
+    replacement = [dict(doc, fund_name="Nippon India Growth Fund", text=doc["text"].replace("1%", "0.5%")) for doc in DOCUMENTS]
+    encoder = FakeEmbeddings()
+    with artifacts.new_version(str(tmp_path)) as staging:
+        np.save(os.path.join(staging.path, "embeddings.npy"), encoder.encode([doc["text"] for doc in replacement]))
+        with open(os.path.join(staging.path, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(replacement[::-1], f)
+        staging.counts["documents"] = len(replacement)
+
+    during = []
+    build = SentenceIndex.build
+
+    def build_while_answering(texts, model):
+        during.append(service.answer(question))
+        return build(texts, model)
+
+    monkeypatch.setattr(SentenceIndex, "build", build_while_answering)
+    assert service.load_index()
+
+    assert (during[0].answer, during[0].matched_fund) == (before.answer, before.matched_fund)
+    after = service.answer(question)
+    assert after.matched_fund == "Nippon India Growth Fund" and "0.5%" in after.answer
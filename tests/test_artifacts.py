@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import errno
+import os
+
+import pytest
+
+from rag_core import artifacts
+from rag_core.artifacts import CURRENT_FILE, LOCK_SUFFIX, STAGING_PREFIX, VERSIONS_DIR, new_version, resolve
+
+
+def publish(root, text: str) -> str:
+    with new_version(str(root)) as staging:
+        with open(os.path.join(staging.path, "chunks.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        staging.counts["chunks"] = 1
+    return resolve(str(root))
+
+
+def test_publish_flips_current_and_leaves_no_lock_behind(tmp_path):
+    first = publish(tmp_path, "one")
+    second = publish(tmp_path, "two")
+
+    assert first != second
+    with open(os.path.join(second, "chunks.txt"), encoding="utf-8") as f:
+        assert f.read() == "two"
+    assert not [name for name in os.listdir(tmp_path / VERSIONS_DIR) if name.endswith(LOCK_SUFFIX)]
+
+
+def test_failed_ingest_removes_its_staging_and_lock(tmp_path):
+    with pytest.raises(RuntimeError):
+        with new_version(str(tmp_path)):
+            raise RuntimeError("scrape failed")
+
+    assert os.listdir(tmp_path / VERSIONS_DIR) == []
+    assert resolve(str(tmp_path)) == str(tmp_path)
+
+
+def test_pointer_file_is_used_where_symlinks_are_not(tmp_path, monkeypatch):
+    version = os.path.basename(publish(tmp_path, "one"))
+    os.remove(tmp_path / "current")
+
+    with monkeypatch.context() as windows:
+        windows.setattr(os, "name", "nt")
+        artifacts._flip_current(str(tmp_path), version)
+
+    assert not os.path.islink(tmp_path / "current")
+    assert (tmp_path / CURRENT_FILE).read_text(encoding="utf-8").strip() == version
+    assert resolve(str(tmp_path)) == os.path.join(str(tmp_path), VERSIONS_DIR, version)
+
+
+def test_prune_keeps_stagings_whose_writer_holds_the_lock(tmp_path):
+    publish(tmp_path, "one")
+    versions = tmp_path / VERSIONS_DIR
+    live, dead, unlocked = (versions / f"{STAGING_PREFIX}{name}" for name in ("live", "dead", "unlocked"))
+    for path in (live, dead, unlocked):
+        path.mkdir()
+    (dead.parent / (dead.name + LOCK_SUFFIX)).write_bytes(b"\0")
+
+    with open(str(live) + LOCK_SUFFIX, "wb+") as held:
+        held.write(b"\0")
+        held.flush()
+        assert artifacts._try_lock(held)
+        artifacts._prune(str(tmp_path), keep=2)
+
+        assert live.exists()
+        assert not dead.exists() and not (dead.parent / (dead.name + LOCK_SUFFIX)).exists()
+        assert not unlocked.exists()
+
+
+def test_directory_fsync_is_skipped_where_unsupported(tmp_path, monkeypatch):
+    def no_directory_fsync(fd):
+        raise OSError(errno.EINVAL, "Invalid argument")
+
+    monkeypatch.setattr(os, "fsync", no_directory_fsync)
+
+    artifacts._fsync_path(str(tmp_path))
+    (tmp_path / "file").write_bytes(b"x")
+    with pytest.raises(OSError):
+        artifacts._fsync_path(str(tmp_path / "file"))
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag_core import artifacts
+from rag_core.artifacts import new_version
+from rag_core.catalogue import CATALOGUE_FILE, EMBEDDINGS_FILE, CatalogueRegistry
+from rag_core.indexes import Chunk, write_docstore
+
+CATALOGUES = {
+    "uti": {"name": "UTI Mutual Fund", "aliases": ["uti"]},
+    "nippon": {"name": "Nippon India Mutual Fund", "aliases": ["nippon", "nippon india small cap"]},
+    "nippon_small_cap": {"name": "Nippon Small Cap Catalogue", "aliases": ["nippon india small cap fund"]},
+}
+
+
+def publish(directory, rows: int = 3) -> None:
+    with new_version(str(directory)) as staging:
+        np.save(f"{staging.path}/{EMBEDDINGS_FILE}", np.eye(rows, 8, dtype=np.float32))
+        write_docstore(staging.path, (Chunk(str(row), f"chunk {row}", "https://example.com") for row in range(rows)))
+        staging.counts["chunks"] = rows
+
+
+@pytest.fixture
+def registry(tmp_path) -> CatalogueRegistry:
+    for catalogue_id, info in CATALOGUES.items():
+        directory = tmp_path / catalogue_id
+        directory.mkdir()
+        (directory / CATALOGUE_FILE).write_text(json.dumps(info), encoding="utf-8")
+        publish(directory)
+    return CatalogueRegistry(str(tmp_path))
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("What is the exit load of the UTI Flexi Cap fund?", "uti"),
+        ("What is uti's expense ratio?", "uti"),
+        ("What is the income distribution cum capital withdrawal option?", None),
+        ("Is the Nippon India Large Cap fund open?", "nippon"),
+        ("What is the exit load on Nippon India Small Cap Fund?", "nippon_small_cap"),
+        ("Who manages the nippon small cap?", "nippon_small_cap"),
+        ("What is an ELSS fund?", None),
+    ],
+)
+def test_route_matches_whole_words_and_prefers_the_longest(registry, question, expected):
+    assert registry.route(question) == expected
+
+
+def test_get_does_not_reread_the_manifest_until_a_new_version_is_published(registry, tmp_path, monkeypatch):
+    first = registry.get("uti")
+    reads = []
+    read_manifest = artifacts.read_manifest
+    monkeypatch.setattr(artifacts, "read_manifest", lambda path: reads.append(path) or read_manifest(path))
+
+    assert registry.get("uti") is first
+    assert registry.get("uti") is first
+    assert reads == []
+
+    publish(tmp_path / "uti", rows=5)
+
+    second = registry.get("uti")
+    assert second is not first and len(second) == 5
+    assert len(reads) == 1
+    assert registry.get("uti") is second
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+
+from rag_core.completion_cache import CompletionCache, completion_key
+
+LARGE_CAP = "https://example.com/large-cap"
+SMALL_CAP = "https://example.com/small-cap"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite"))
+    cache.refresh("g1", {LARGE_CAP: "d1", SMALL_CAP: "d1"})
+    cache.put("large", "The expense ratio is 1.62%.", [LARGE_CAP])
+    cache.put("small", "The exit load is 1%.", [SMALL_CAP])
+    cache.put("both", "Both funds are open ended.", [LARGE_CAP, SMALL_CAP])
+    yield cache
+    cache.close()
+
+
+def test_keys_depend_on_model_and_prompt():
+    assert completion_key("m", "p") == completion_key("m", "p")
+    assert completion_key("m", "p") != completion_key("other", "p")
+    assert completion_key("m", "p") != completion_key("m", "p2")
+
+
+def test_unchanged_sources_survive_a_new_generation(cache):
+    assert cache.refresh("g2", {LARGE_CAP: "d1", SMALL_CAP: "d1"}) == (3, 0)
+
+    assert cache.generation == "g2"
+    assert cache.get("large") == "The expense ratio is 1.62%."
+    assert len(cache) == 3
+
+
+def test_only_entries_built_from_a_changed_source_are_dropped(cache):
+    assert cache.refresh("g2", {LARGE_CAP: "d1", SMALL_CAP: "d2"}) == (1, 2)
+
+    assert cache.get("large") is not None
+    assert cache.get("small") is None
+    assert cache.get("both") is None
+
+
+def test_a_removed_source_invalidates_its_entries(cache):
+    assert cache.refresh("g2", {LARGE_CAP: "d1"}) == (1, 2)
+
+    assert cache.get("large") is not None and cache.get("small") is None
+
+
+def test_without_digests_every_older_entry_is_dropped(cache):
+    assert cache.refresh("g2") == (0, 3)
+
+    assert len(cache) == 0
+
+
+def test_refreshing_to_the_current_generation_keeps_everything(cache):
+    assert cache.refresh("g1", {LARGE_CAP: "d9"}) == (0, 0)
+
+    assert cache.get("large") is not None
+
+
+def test_lookups_only_match_the_loaded_generation(cache):
+    other = CompletionCache(cache.path)
+    other.refresh("g1", {LARGE_CAP: "d1", SMALL_CAP: "d1"})
+    cache.refresh("g2", {LARGE_CAP: "d1", SMALL_CAP: "d2"})
+
+    # the other worker still has g1 loaded; its entries moved to g2 or were deleted
+    assert other.get("large") is None
+    other.refresh("g2", {LARGE_CAP: "d1", SMALL_CAP: "d2"})
+    assert other.get("large") == "The expense ratio is 1.62%."
+    other.close()
+
+
+def test_least_recently_used_entries_are_evicted_over_the_byte_budget(tmp_path):
+    cache = CompletionCache(str(tmp_path / "small.sqlite"), max_bytes=1000)
+    cache.refresh("g1", {})
+    for number in range(10):
+        cache.put(f"key-{number}", "x" * 200)
+
+    assert cache.nbytes <= 1000
+    assert cache.get("key-9") is not None
+    assert cache.get("key-0") is None
+    cache.close()
+
+
+def test_size_comes_from_the_last_write_not_a_query_per_call(cache, monkeypatch):
+    answers = {"large": "The expense ratio is 1.62%.", "small": "The exit load is 1%.", "both": "Both funds are open ended."}
+    stored = sum(len(key) + len(answer.encode("utf-8")) for key, answer in answers.items())
+    assert cache.nbytes == stored
+
+    def unavailable():
+        raise AssertionError("nbytes queried the database")
+
+    monkeypatch.setattr(cache, "_db", unavailable)
+    assert cache.nbytes == stored
+
+
+def test_size_is_summed_once_when_nothing_was_written(cache):
+    other = CompletionCache(cache.path)
+
+    assert other.nbytes == cache.nbytes
+    other.close()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag_core.embedding_cache import EmbeddingCache, get_embedding_cache, normalize_question
+
+
+def vector(value: float, dimension: int = 4):
+    return np.full(dimension, value, dtype=np.float32)
+
+
+def test_a_referenced_entry_gets_a_second_chance():
+    cache = EmbeddingCache("test", 4, capacity=2)
+    cache.put("a", vector(1))
+    cache.put("b", vector(2))
+    assert cache.get("a") is not None
+
+    cache.put("c", vector(3))  # the hand clears a's bit and takes b's row
+
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == 1 and cache.get("c")[0] == 3
+    assert len(cache) == 2
+
+
+def test_without_references_the_oldest_row_is_reused():
+    cache = EmbeddingCache("test", 4, capacity=3)
+    for number, key in enumerate("abcd"):
+        cache.put(key, vector(number))
+
+    assert cache.get("a") is None
+    assert [cache.get(key)[0] for key in "bcd"] == [1, 2, 3]
+
+
+def test_every_entry_referenced_degrades_to_fifo():
+    cache = EmbeddingCache("test", 4, capacity=2)
+    cache.put("a", vector(1))
+    cache.put("b", vector(2))
+    cache.get("a")
+    cache.get("b")
+
+    cache.put("c", vector(3))  # one full sweep clears both bits, then a is evicted
+
+    assert cache.get("a") is None and cache.get("b") is not None
+
+
+def test_updating_a_key_keeps_its_row():
+    cache = EmbeddingCache("test", 4, capacity=2)
+    cache.put("a", vector(1))
+    cache.put("b", vector(2))
+    cache.put("a", vector(5))
+
+    assert len(cache) == 2
+    assert cache.get("a")[0] == 5 and cache.get("b")[0] == 2
+
+
+def test_get_returns_a_copy():
+    cache = EmbeddingCache("test", 4, capacity=2)
+    cache.put("a", vector(1))
+    cache.get("a")[:] = 9
+
+    assert cache.get("a")[0] == 1
+
+
+def test_clear_and_capacity_validation():
+    cache = EmbeddingCache("test", 4, capacity=2)
+    cache.put("a", vector(1))
+    cache.clear()
+
+    assert len(cache) == 0 and cache.get("a") is None
+    with pytest.raises(ValueError):
+        EmbeddingCache("test", 4, capacity=0)
+
+
+def test_caches_are_shared_per_model_and_replaced_when_the_dimension_changes():
+    first = get_embedding_cache("test-shared-model", 4, capacity=8)
+
+    assert get_embedding_cache("test-shared-model", 4) is first
+    assert get_embedding_cache("test-shared-model", 8) is not first
+
+
+def test_a_larger_capacity_grows_the_shared_cache_and_keeps_its_entries():
+    cache = get_embedding_cache("test-growing-model", 4, capacity=2)
+    cache.put("a", vector(1))
+    cache.put("b", vector(2))
+
+    assert get_embedding_cache("test-growing-model", 4, capacity=4) is cache
+    assert cache.capacity == 4 and cache.nbytes == 4 * 4 * 4 + 4
+    cache.put("c", vector(3))
+    cache.put("d", vector(4))
+    assert [cache.get(key)[0] for key in "abcd"] == [1, 2, 3, 4]
+
+    assert get_embedding_cache("test-growing-model", 4, capacity=1).capacity == 4
+    cache.put("e", vector(5))
+    assert len(cache) == 4 and cache.get("e")[0] == 5
+
+
+def test_concurrent_puts_and_gets_keep_the_index_consistent():
+    cache = EmbeddingCache("test", 4, capacity=16)
+    errors = []
+
+    def worker(offset: int) -> None:
+        try:
+            for number in range(500):
+                key = normalize_question(f"Question {(offset + number) % 40}")
+                cache.put(key, vector(float((offset + number) % 40)))
+                found = cache.get(key)
+                if found is not None and found[0] != float(key.split()[-1]):
+                    errors.append(key)
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(cache) <= cache.capacity
+    for key, slot in cache._index.items():
+        assert cache._keys[slot] == key
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+if not hasattr(socket, "AF_UNIX") or not hasattr(os, "fork"):
+    pytest.skip("the encoder pool needs Unix sockets and fork", allow_module_level=True)
+
+from benchmarks.fakes import FakeEmbeddings
+from rag_core.encoder_pool import EncoderPool, RemoteEncoder, core_layout
+from rag_core.encoders import register_encoder
+
+MODEL = "fake:hash"
+TEXTS = ["What is the exit load of Nippon India Small Cap Fund?", "What is the benchmark?"]
+
+
+@pytest.fixture
+def pool(tmp_path):
+    register_encoder("fake:", FakeEmbeddings)  # inherited by the forked workers
+    with EncoderPool(MODEL, workers=1, socket_path=str(tmp_path / "pool.sock")) as pool:
+        pool.wait_ready(timeout=30)
+        yield pool
+
+
+def test_encode_round_trips_through_the_pool(pool):
+    client = RemoteEncoder(pool.socket_path)
+
+    vectors = client.encode(TEXTS)
+
+    assert client.model_name == "hash" and client.dimension == vectors.shape[1]
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(vectors, FakeEmbeddings("hash").encode(TEXTS), rtol=1e-6)
+    assert client.encode([]).shape == (0, client.dimension)
+
+
+def test_a_dead_worker_is_replaced_on_the_same_cores(pool):
+    killed = RemoteEncoder(pool.socket_path).info["pid"]
+    assert pool.replace_dead() == 0
+
+    os.kill(killed, signal.SIGKILL)
+    deadline = time.monotonic() + 10
+    while pool.replace_dead() == 0:
+        assert time.monotonic() < deadline, "the killed worker was not noticed"
+        time.sleep(0.05)
+
+    client = RemoteEncoder(pool.socket_path, connect_timeout=30)
+    assert client.info["pid"] != killed
+    assert client.encode(TEXTS[:1]).shape == (1, client.dimension)
+
+
+def test_core_layout_splits_the_available_cpus():
+    assert core_layout(2, 2, available=[3, 1, 0, 2, 5]) == [[0, 1], [2, 3]]
+    with pytest.raises(ValueError):
+        core_layout(3, 2, available=[0, 1, 2, 3])
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from benchmarks.fakes import FakeEmbeddings, StubGenerator
+from rag_core.engine import RagEngine
+from rag_core.generators import DISCLAIMER
+from rag_core.indexes import Chunk, NumpyIndex
+from rag_core.telemetry import LLM_FALLBACKS
+
+FACTS = [
+    ("large-cap", "The expense ratio of Nippon India Large Cap Fund is 1.62% for the regular plan.", "https://example.com/large-cap"),
+    ("small-cap", "Nippon India Small Cap Fund charges an exit load of 1% if redeemed within one year.", "https://example.com/small-cap"),
+    ("elss", "The lock-in period of Nippon India Tax Saver ELSS Fund is 3 years.", "https://example.com/elss"),
+    ("sip", "The minimum SIP amount for Nippon India Growth Mid Cap Fund is 100 rupees.", "https://example.com/mid-cap"),
+]
+
+
+class CountingEncoder(FakeEmbeddings):
+    """The fake encoder, counting the texts it is asked to encode."""
+
+    def __init__(self) -> None:
+        super().__init__(f"test-encoder-{uuid.uuid4().hex}")
+        self.encoded = 0
+
+    def encode(self, sentences, *args, **kwargs):
+        self.encoded += 1 if isinstance(sentences, str) else len(sentences)
+        return super().encode(sentences, *args, **kwargs)
+
+
+class FailingGenerator:
+    name = "llm"
+    stage = "llm"
+
+    def generate(self, question: str, context: str) -> str:
+        raise TimeoutError("LLM timed out")
+
+
+def build_engine(**kwargs) -> RagEngine:
+    encoder = kwargs.pop("encoder", None) or CountingEncoder()
+    chunks = [Chunk(chunk_id, text, source) for chunk_id, text, source in FACTS]
+    index = NumpyIndex(encoder.encode([chunk.text for chunk in chunks]), chunks)
+    return RagEngine(encoder, index, **kwargs)
+
+
+def test_retrieve_ranks_the_matching_chunk_first():
+    engine = build_engine()
+
+    hits = engine.retrieve("What is the exit load of Nippon India Small Cap Fund?", k=2)
+
+    assert [hit.chunk.id for hit in hits][0] == "small-cap"
+    assert len(hits) == 2
+    assert hits[0].score >= hits[1].score
+
+
+def test_answer_uses_the_generator_with_the_top_chunks_as_context():
+    engine = build_engine(generator=StubGenerator(), context_size=1)
+
+    answer = engine.answer("What is the lock-in period of the ELSS tax saver fund?", k=3)
+
+    assert answer.generator == "llm"
+    assert answer.text.startswith("The lock-in period")
+    assert DISCLAIMER in answer.text
+    assert engine.context_sources(answer.hits) == ["https://example.com/elss"]
+
+
+def test_generator_errors_fall_back_to_the_rule_based_answer():
+    engine = build_engine(generator=FailingGenerator())
+    before = LLM_FALLBACKS.value(reason="llm_error")
+
+    answer = engine.answer("What is the expense ratio of Nippon India Large Cap Fund?", k=3)
+
+    assert answer.generator == "rules"
+    assert "1.62%" in answer.text
+    assert LLM_FALLBACKS.value(reason="llm_error") == before + 1
+
+
+def test_without_a_generator_the_fallback_answers():
+    engine = build_engine()
+    before = LLM_FALLBACKS.value(reason="llm_unavailable")
+
+    answer = engine.answer("What is the minimum SIP amount for the mid cap fund?", k=3)
+
+    assert answer.generator == "rules"
+    assert LLM_FALLBACKS.value(reason="llm_unavailable") == before + 1
+
+
+def test_question_embeddings_are_cached_by_normalized_text():
+    encoder = CountingEncoder()
+    engine = build_engine(encoder=encoder)
+    encoded = encoder.encoded
+
+    first = engine.embed("What is the exit load?")
+    second = engine.embed("  what IS the   exit load?")
+
+    assert encoder.encoded == encoded + 1
+    assert (first == second).all()
+
+
+def test_search_without_an_index_raises():
+    encoder = CountingEncoder()
+    engine = RagEngine(encoder)
+
+    assert not engine.is_ready
+    with pytest.raises(RuntimeError):
+        engine.answer("What is the exit load?", k=3)
+
+
+def test_an_empty_index_gives_an_empty_answer():
+    encoder = CountingEncoder()
+    engine = RagEngine(encoder, NumpyIndex(encoder.encode([]), []), generator=StubGenerator())
+
+    answer = engine.answer("What is the exit load?", k=3)
+
+    assert answer.text == "" and answer.hits == []
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.fakes import FakeEmbeddings
+from rag_core import encoders, index_builder
+from rag_core.index_builder import IndexBuilder, pool_context, write_chunks_jsonl
+from rag_core.indexes import Chunk
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    monkeypatch.setitem(encoders._ENCODER_FACTORIES, "fake:", FakeEmbeddings)
+    monkeypatch.setitem(encoders._ENCODER_FACTORIES, "closure:", lambda name: FakeEmbeddings(name))
+    monkeypatch.delenv("INGEST_START_METHOD", raising=False)
+
+
+def test_builder_does_not_pick_a_start_method_until_it_needs_workers():
+    builder = IndexBuilder("fake:hash", workers=1)
+
+    assert builder._context is None
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="fork is POSIX-only")
+def test_single_threaded_script_forks(monkeypatch):
+    monkeypatch.delenv("INGEST_START_METHOD", raising=False)
+    monkeypatch.setattr(threading, "active_count", lambda: 1)
+    monkeypatch.delitem(sys.modules, "torch", raising=False)
+
+    assert pool_context().get_start_method() == "fork"
+
+
+def test_threaded_parent_does_not_fork(monkeypatch):
+    monkeypatch.delenv("INGEST_START_METHOD", raising=False)
+    monkeypatch.setattr(threading, "active_count", lambda: 4)
+
+    assert pool_context().get_start_method() in ("forkserver", "spawn")
+
+
+def test_start_method_can_be_forced(monkeypatch):
+    monkeypatch.setenv("INGEST_START_METHOD", "spawn")
+
+    assert pool_context().get_start_method() == "spawn"
+    assert pool_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+def test_only_picklable_factories_are_sent_to_workers(fake_encoder):
+    portable = index_builder._portable_factories()
+
+    assert portable["fake:"] is FakeEmbeddings
+    assert "closure:" not in portable
+
+
+def test_spawned_workers_use_encoders_registered_in_the_parent(fake_encoder, tmp_path):
+    chunks_path = str(tmp_path / "chunks.jsonl")
+    texts = [f"Nippon India fund number {i} has an exit load of {i % 3}%." for i in range(10)]
+    write_chunks_jsonl((Chunk(id=str(i), text=text, source="s") for i, text in enumerate(texts)), chunks_path)
+    builder = IndexBuilder("fake:hash", workers=2, batch_size=4, shard_size=8, start_method="spawn")
+    batch_paths = [str(tmp_path / f"batch-{i}.npy") for i in range(3)]
+
+    builder._embed(chunks_path, batch_paths, len(texts))
+
+    vectors = np.concatenate([np.load(path) for path in batch_paths])
+    expected = np.asarray(FakeEmbeddings("hash").encode(texts), dtype=np.float32)
+    assert builder._context.get_start_method() == "spawn"
+    np.testing.assert_allclose(vectors, expected, rtol=1e-6)
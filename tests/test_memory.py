@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import gc
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from benchmarks.fakes import StubGenerator
+from benchmarks.questions import build_mix
+from rag_core import memory
+from rag_core.completion_cache import CompletionCache
+
+from .test_engine import build_engine
+
+MB = 1024 * 1024
+ROUNDS = 3
+QUERIES_PER_ROUND = 1500
+MAX_GROWTH_MB = 4
+
+
+def test_sizes_are_computed_once_per_generation(monkeypatch):
+    walked = []
+    deep_sizeof = memory.deep_sizeof
+    monkeypatch.setattr(memory, "deep_sizeof", lambda obj: walked.append(obj) or deep_sizeof(obj))
+    documents = [{"text": "The exit load is 1%."}] * 3
+
+    first = memory.generation_sizeof("test.documents", documents, "g1")
+    assert memory.generation_sizeof("test.documents", documents, "g1") == first
+    assert len(walked) == 1
+
+    memory.generation_sizeof("test.documents", documents, "g2")
+    memory.generation_sizeof("test.documents", list(documents), "g2")
+    assert len(walked) == 3
+
+
+def test_rss_stays_bounded_over_many_queries(tmp_path):
+    if memory.process_rss_bytes() is None:
+        pytest.skip("RSS is not available on this platform")
+    completions = CompletionCache(str(tmp_path / "completions.sqlite"), max_bytes=256 * 1024)
+    completions.refresh("g1", {})
+    engine = build_engine(generator=StubGenerator(), embedding_cache_size=512, completion_cache=completions)
+
+    def run(seed: int) -> None:
+        # Distinct questions, so the embedding and completion caches keep evicting
+        for number, (_, question) in enumerate(build_mix(QUERIES_PER_ROUND, seed=seed)):
+            engine.answer(f"{question} ({seed}-{number})", k=3)
+        memory.report(memory.engine_components(engine))  # what a /metrics scrape computes
+
+    run(seed=1)  # fill the caches
+    gc.collect()
+    baseline = memory.process_rss_bytes()
+    for round_number in range(ROUNDS):
+        run(seed=100 + round_number)
+    gc.collect()
+    growth = memory.process_rss_bytes() - baseline
+    completions.close()
+
+    assert growth < MAX_GROWTH_MB * MB, f"RSS grew {growth / MB:.1f} MB over {ROUNDS * QUERIES_PER_ROUND} queries"
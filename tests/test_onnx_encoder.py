@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag_core.onnx_encoder import MODEL_FILE, QUANTIZED_MODEL_FILE, OnnxEncoder, export_dir_for
+
+PARITY_MODEL = os.getenv("ONNX_PARITY_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+MIN_COSINE = 0.99
+TEXTS = [
+    "What is the expense ratio of Nippon India Large Cap Fund?",
+    "exit load",
+    "The lock-in period of Nippon India Tax Saver ELSS Fund is 3 years from the date of allotment.",
+    "Minimum SIP amount is Rs 100 and in multiples of Re 1 thereafter.",
+]
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with padding to the longest text, like ``tokenizers`` with padding on."""
+
+    def encode_batch(self, texts):
+        ids = [[1 + sum(map(ord, word)) % 50 for word in text.split()] for text in texts]
+        width = max(len(row) for row in ids)
+        return [
+            SimpleNamespace(ids=row + [0] * (width - len(row)), attention_mask=[1] * len(row) + [0] * (width - len(row)))
+            for row in ids
+        ]
+
+
+class FakeSession:
+    """Token embeddings looked up from a fixed table; padding rows are large, so leaking them shows."""
+
+    def __init__(self, dimension: int = 8) -> None:
+        rng = np.random.default_rng(7)
+        self.table = rng.standard_normal((51, dimension)).astype(np.float32)
+        self.table[0] = 100.0
+
+    def run(self, outputs, feeds):
+        return [self.table[feeds["input_ids"]]]
+
+
+def fake_encoder(batch_size: int = 32) -> OnnxEncoder:
+    encoder = OnnxEncoder.__new__(OnnxEncoder)
+    encoder._session = FakeSession()
+    encoder._input_names = {"input_ids", "attention_mask"}
+    encoder._tokenizer = FakeTokenizer()
+    encoder._dimension = 8
+    encoder.batch_size = batch_size
+    encoder.model_name = "onnx:fake"
+    return encoder
+
+
+def reference_mean_pooling(session: FakeSession, text: str):
+    ids = FakeTokenizer().encode_batch([text])[0].ids
+    pooled = session.table[ids].mean(axis=0)
+    return pooled / np.linalg.norm(pooled)
+
+
+def test_pooling_matches_sentence_transformers_mean_pooling_and_ignores_padding():
+    encoder = fake_encoder()
+
+    vectors = encoder.encode(TEXTS)
+
+    for text, vector in zip(TEXTS, vectors):
+        np.testing.assert_allclose(vector, reference_mean_pooling(encoder._session, text), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+
+def test_batching_does_not_change_embeddings():
+    together = fake_encoder(batch_size=32).encode(TEXTS)
+    one_by_one = fake_encoder(batch_size=1).encode(TEXTS)
+
+    np.testing.assert_allclose(together, one_by_one, rtol=1e-5, atol=1e-6)
+
+
+def test_no_texts_give_an_empty_matrix():
+    assert fake_encoder().encode([]).shape == (0, 8)
+
+
+def test_a_missing_export_names_the_export_command(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    (tmp_path / "tokenizer.json").write_text("{}")
+
+    with pytest.raises(FileNotFoundError, match="rag_core.onnx_encoder export"):
+        OnnxEncoder(str(tmp_path))
+
+
+@pytest.mark.parametrize("quantized", [False, True], ids=["fp32", "int8"])
+def test_onnx_embeddings_match_torch(quantized):
+    """Needs the real model and a prior ``python -m rag_core.onnx_encoder export``."""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("sentence_transformers")
+    directory = export_dir_for(PARITY_MODEL)
+    if not (directory / (QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)).exists():
+        pytest.skip(f"no ONNX export of {PARITY_MODEL} in {directory}")
+    from rag_core.encoders import SentenceTransformerEncoder
+
+    reference = SentenceTransformerEncoder(PARITY_MODEL).encode(TEXTS)
+    cosines = np.sum(reference * OnnxEncoder(str(directory), quantized=quantized).encode(TEXTS), axis=1)
+
+    assert cosines.min() >= MIN_COSINE
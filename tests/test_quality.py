@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from contextlib import ExitStack
+
+import pytest
+
+from rag_core import quality
+from rag_core.quality import QualityGovernor
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(quality.time, "monotonic", clock)
+    return clock
+
+
+def record(governor: QualityGovernor, clock: Clock, seconds: float, count: int) -> None:
+    """``count`` LLM calls taking ``seconds`` each, one after another."""
+    for _ in range(count):
+        with governor.track():
+            clock.now += seconds
+
+
+def advance(governor: QualityGovernor, clock: Clock, seconds: int) -> None:
+    """Let ``seconds`` pass under steady traffic, which reads the pressure every second."""
+    for _ in range(seconds):
+        clock.now += 1
+        governor.pressure()
+
+
+def tiers(governor: QualityGovernor, count: int = 10) -> list:
+    return [governor.choose() for _ in range(count)]
+
+
+def test_every_request_gets_the_llm_below_both_thresholds(clock):
+    governor = QualityGovernor(max_in_flight=4, p95_target_ms=100, min_samples=5)
+    record(governor, clock, 0.05, 10)
+
+    assert tiers(governor) == [0] * 10
+
+
+@pytest.mark.parametrize(
+    "in_flight, expected",
+    [
+        (4, [0] * 10),  # pressure 1: still the LLM
+        (6, [0, 1] * 5),  # pressure 1.5: every other request moves down
+        (8, [1] * 10),  # pressure 2
+        (12, [2] * 10),  # pressure 3
+    ],
+)
+def test_calls_in_flight_move_requests_down(clock, in_flight, expected):
+    governor = QualityGovernor(max_in_flight=4)
+
+    with ExitStack() as calls:
+        for _ in range(in_flight):
+            calls.enter_context(governor.track())
+        assert tiers(governor) == expected
+
+    assert governor.in_flight == 0
+
+
+@pytest.mark.parametrize("latency, expected", [(0.1, 0), (0.25, 1), (0.35, 2)])
+def test_p95_latency_moves_requests_down(clock, latency, expected):
+    governor = QualityGovernor(p95_target_ms=100, min_samples=10)
+    record(governor, clock, latency, 10)
+
+    assert tiers(governor) == [expected] * 10
+
+
+def test_too_few_samples_are_not_a_measurement(clock):
+    governor = QualityGovernor(p95_target_ms=100, min_samples=10)
+    record(governor, clock, 1.0, 9)
+
+    assert governor.pressure() == 0.0
+    record(governor, clock, 1.0, 1)
+    assert governor.pressure() == pytest.approx(10.0)
+
+
+def test_pressure_decays_when_the_window_empties_instead_of_dropping(clock):
+    governor = QualityGovernor(p95_target_ms=100, window_seconds=30, min_samples=10, half_life_seconds=15)
+    record(governor, clock, 0.35, 10)
+    advance(governor, clock, 27)
+    assert governor.choose() == 2  # the slow calls are all still in the window
+
+    advance(governor, clock, 4)
+    assert governor.choose() == 1  # some aged out; decayed to about 2.9 rather than 0
+    advance(governor, clock, 15)
+    assert 1.0 < governor.pressure() < 2.0
+    assert set(tiers(governor)) == {0, 1}  # part of the traffic probes the LLM again
+    advance(governor, clock, 30)
+    assert tiers(governor) == [0] * 10
+
+
+def test_a_still_slow_llm_is_caught_while_recovering(clock):
+    governor = QualityGovernor(p95_target_ms=100, window_seconds=30, min_samples=10, half_life_seconds=15)
+    record(governor, clock, 0.35, 10)
+    advance(governor, clock, 45)
+    assert 1.0 < governor.pressure() < 2.0
+
+    record(governor, clock, 0.35, 10)
+
+    assert governor.pressure() == pytest.approx(3.5)
+    assert governor.choose() == 2
+
+
+@pytest.fixture
+def engine_for(clock):
+    pytest.importorskip("numpy")
+    from rag_core.generators import ExtractiveGenerator, RuleBasedGenerator
+
+    from .test_engine import build_engine
+
+    class SlowGenerator:
+        """An LLM that takes ``latency`` seconds of the fake clock per call."""
+
+        name = "llm"
+        stage = "llm"
+
+        def __init__(self) -> None:
+            self.latency = 0.01
+            self.calls = 0
+
+        def generate(self, question: str, context: str) -> str:
+            self.calls += 1
+            clock.now += self.latency
+            return "The expense ratio is 1.62%. Facts-only. No investment advice."
+
+    def build(governor: QualityGovernor):
+        generator = SlowGenerator()
+        engine = build_engine(
+            generator=generator,
+            degraded=(ExtractiveGenerator(disclaimer=True), RuleBasedGenerator()),
+            governor=governor,
+            embedding_cache_size=0,
+        )
+        return engine, generator
+
+    return build
+
+
+QUESTION = "What is the expense ratio of Nippon India Large Cap Fund?"
+
+
+def answers(engine, count: int = 10) -> list:
+    hits = engine.retrieve(QUESTION, k=3)
+    return [engine.generate(QUESTION, hits).generator for _ in range(count)]
+
+
+def test_engine_switches_tiers_as_the_llm_slows_and_recovers(engine_for, clock):
+    governor = QualityGovernor(p95_target_ms=100, window_seconds=30, min_samples=10, half_life_seconds=15)
+    engine, generator = engine_for(governor)
+
+    assert answers(engine) == ["llm"] * 10
+
+    generator.latency = 0.25
+    advance(governor, clock, 31)
+    # Until min_samples slow calls are in, there is no p95 to act on
+    assert answers(engine) == ["llm"] * 10
+    assert answers(engine) == ["extractive"] * 10  # p95 2.5x the target
+
+    record(governor, clock, 0.35, 10)  # other workers' calls, slower still
+    assert answers(engine) == ["rules"] * 10  # p95 3.5x the target
+
+    generator.latency = 0.01
+    advance(governor, clock, 40)
+    assert set(answers(engine)) == {"llm", "extractive"}  # decaying, not dropped
+    calls = generator.calls
+    advance(governor, clock, 30)
+    assert answers(engine) == ["llm"] * 10
+    assert generator.calls == calls + 10
+
+
+def test_engine_without_degraded_tiers_never_consults_the_governor(engine_for, clock):
+    governor = QualityGovernor(max_in_flight=1)
+    engine, _ = engine_for(governor)
+    engine.degraded = []
+
+    with governor.track(), governor.track(), governor.track():
+        assert answers(engine, 3) == ["llm"] * 3
+
+
+def test_degraded_answers_are_timed_under_their_own_stage(engine_for, clock):
+    from rag_core.telemetry import STAGE_SECONDS
+
+    governor = QualityGovernor(max_in_flight=1)
+    engine, _ = engine_for(governor)
+    before = {name: STAGE_SECONDS.count(stage=name) for name in ("llm", "extractive")}
+
+    with governor.track(), governor.track():  # pressure 2: every request gets the extractive tier
+        assert answers(engine, 3) == ["extractive"] * 3
+
+    assert STAGE_SECONDS.count(stage="extractive") == before["extractive"] + 3
+    assert STAGE_SECONDS.count(stage="llm") == before["llm"]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from benchmarks.fakes import LexicalScorer
+from rag_core.indexes import Chunk, Hit
+from rag_core.rerank import Reranker
+from rag_core.telemetry import RERANKS
+
+TEXTS = [
+    "The benchmark of Nippon India Small Cap Fund is the Nifty Smallcap 250 TRI.",
+    "Nippon India Small Cap Fund charges an exit load of 1% if redeemed within one year.",
+    "The expense ratio of Nippon India Large Cap Fund is 1.62% for the regular plan.",
+]
+QUESTIONS = ["Exit load if redeemed within one year?", "Expense ratio for the regular plan?"]
+HITS = [Hit(position, 1.0 - position / 10, Chunk(str(position), text, "s")) for position, text in enumerate(TEXTS)]
+
+
+def rerank_concurrently(reranker: Reranker, questions) -> list:
+    results = [None] * len(questions)
+    start = threading.Barrier(len(questions))
+
+    def call(number: int) -> None:
+        start.wait()
+        results[number] = reranker.rerank(questions[number], HITS, k=1)
+
+    threads = [threading.Thread(target=call, args=(number,)) for number in range(len(questions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [[hit.chunk.id for hit in hits] for hits in results]
+
+
+def test_concurrent_requests_queue_for_the_scorer_instead_of_skipping():
+    # Each rerank scores 3 pairs in 30 ms; the second waits for the first within its budget
+    reranker = Reranker(LexicalScorer(latency_per_pair_seconds=0.01), budget_ms=500)
+    before = RERANKS.value(outcome="skipped_busy")
+
+    tops = rerank_concurrently(reranker, QUESTIONS)
+
+    assert tops == [["1"], ["2"]]
+    assert RERANKS.value(outcome="skipped_busy") == before
+
+
+def test_a_queued_request_keeps_the_retrieval_order_once_its_budget_runs_out():
+    reranker = Reranker(LexicalScorer(latency_per_pair_seconds=0.05), budget_ms=100)
+    before = RERANKS.value(outcome="skipped_busy")
+
+    started = time.perf_counter()
+    tops = rerank_concurrently(reranker, QUESTIONS)
+
+    assert time.perf_counter() - started < 0.3
+    assert tops == [["0"], ["0"]]  # one timed out scoring, the other waiting for the scorer
+    assert RERANKS.value(outcome="skipped_busy") == before + 1
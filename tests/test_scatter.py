@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag_core.scatter import ShardedIndex, ShardUnavailable
+from rag_core.telemetry import SHARD_REQUESTS
+
+
+class StubShard:
+    """
+    A shard server answering /health, /reload and /search, optionally after
+    ``delay`` seconds. /reload takes ``reload_delay`` more and then switches
+    to ``published``, while /health keeps reporting the old generation until
+    it has.
+    """
+
+    def __init__(self, count: int, generation: str, delay: float = 0.0) -> None:
+        self.count, self.generation, self.delay = count, generation, delay
+        self.published, self.reload_delay = generation, 0.0
+        shard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, payload: dict) -> None:
+                time.sleep(shard.delay)
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                self._reply({"metric": "ip", "count": shard.count, "generation": shard.generation})
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.startswith("/reload"):
+                    time.sleep(shard.reload_delay)
+                    reloaded, shard.generation = shard.published != shard.generation, shard.published
+                    self._reply({"reloaded": reloaded, "generation": shard.generation})
+                    return
+                chunk = {"id": shard.generation, "text": "t", "source": "s", "metadata": {}}
+                self._reply({"hits": [[0, 0.5, chunk]]})
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.endpoint = f"127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def dead_endpoint() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def shards():
+    started = []
+
+    def start(*args, **kwargs) -> StubShard:
+        started.append(StubShard(*args, **kwargs))
+        return started[-1]
+
+    yield start
+    for shard in started:
+        shard.close()
+
+
+def test_refresh_skips_shards_that_are_down_or_slow(shards):
+    live = shards(10, "g1")
+    slow = shards(20, "g2", delay=0.3)
+    dead = dead_endpoint()
+    before = SHARD_REQUESTS.value(shard=dead, outcome="error")
+
+    started = time.perf_counter()
+    index = ShardedIndex([live.endpoint, slow.endpoint, dead], deadline_ms=100)
+
+    assert time.perf_counter() - started < 0.3
+    assert len(index) == 10
+    assert index.unavailable == [slow.endpoint, dead]
+    assert SHARD_REQUESTS.value(shard=dead, outcome="error") == before + 1
+    assert SHARD_REQUESTS.value(shard=slow.endpoint, outcome="timeout") >= 1
+    index.close()
+
+
+def test_a_shard_dropping_out_and_back_keeps_the_generation(shards):
+    first, second = shards(10, "g1"), shards(20, "g2")
+    both = ShardedIndex([first.endpoint, second.endpoint], deadline_ms=200)
+    generation = both.generation
+
+    second.delay = 0.4
+    assert both.refresh(reload=True) is False
+    assert both.generation == generation and len(both) == 10 and both.unavailable == [second.endpoint]
+
+    second.delay = 0.0
+    time.sleep(0.4)  # let the slow replies drain
+    assert both.refresh() is False
+    assert both.generation == generation and len(both) == 30 and both.unavailable == []
+    both.close()
+
+
+def test_reload_waits_past_the_deadline_for_the_new_generation(shards):
+    first, second = shards(10, "g1"), shards(20, "g2")
+    index = ShardedIndex([first.endpoint, second.endpoint], deadline_ms=100)
+    generation = index.generation
+
+    second.published, second.reload_delay = "g3", 0.3
+    assert index.refresh(reload=True) is True
+    assert index.generations == {first.endpoint: "g1", second.endpoint: "g3"}
+    assert index.generation != generation and index.unavailable == []
+
+    assert index.refresh(reload=True) is False
+    index.close()
+
+
+def test_a_shard_first_seen_later_changes_the_generation(shards):
+    first, second = shards(10, "g1"), shards(20, "g2", delay=0.3)
+    index = ShardedIndex([first.endpoint, second.endpoint], deadline_ms=100)
+    generation = index.generation
+
+    second.delay = 0.0
+    time.sleep(0.3)
+    assert index.refresh() is True
+    assert index.generation != generation and len(index) == 30
+    index.close()
+
+
+def test_refresh_needs_at_least_one_live_shard():
+    with pytest.raises(ShardUnavailable):
+        ShardedIndex([dead_endpoint(), dead_endpoint()], deadline_ms=100)
+
+
+def test_search_merges_the_shards_that_answer_in_time(shards):
+    live = shards(10, "g1")
+    slow = shards(10, "g2")
+    index = ShardedIndex([live.endpoint, slow.endpoint], deadline_ms=100)
+    slow.delay = 0.3
+
+    hits = index.search(np.zeros(4, dtype=np.float32), k=3)
+
+    assert [hit.chunk.id for hit in hits] == ["g1"]
+    index.close()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from rag_core.singleflight import SingleFlight
+
+
+class Blocked:
+    """A computation that runs until ``release`` is set, counting its calls."""
+
+    def __init__(self, result="answer", error: Exception = None) -> None:
+        self.release = threading.Event()
+        self.calls = 0
+        self.result = result
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        assert self.release.wait(5), "computation was never released"
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_calls_for_one_key_share_one_computation():
+    async def scenario():
+        flight, fn = SingleFlight(), Blocked()
+        tasks = [asyncio.create_task(flight.run("exit load", fn)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert len(flight) == 1
+        fn.release.set()
+        results = await asyncio.gather(*tasks)
+        return flight, fn, results
+
+    flight, fn, results = asyncio.run(scenario())
+
+    assert results == ["answer"] * 5
+    assert fn.calls == 1
+    assert len(flight) == 0
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight, first, second = SingleFlight(), Blocked("first"), Blocked("second")
+        tasks = [asyncio.create_task(flight.run("a", first)), asyncio.create_task(flight.run("b", second))]
+        await asyncio.sleep(0)
+        assert len(flight) == 2
+        first.release.set()
+        second.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        flight, failing = SingleFlight(), Blocked(error=TimeoutError("LLM timed out"))
+        tasks = [asyncio.create_task(flight.run("q", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        failing.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        retry = Blocked("recovered")
+        retry.release.set()
+        return failing, results, await flight.run("q", retry), retry
+
+    failing, results, retried, retry = asyncio.run(scenario())
+
+    assert failing.calls == 1
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert retried == "recovered" and retry.calls == 1
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_shared_computation():
+    async def scenario():
+        flight, fn = SingleFlight(), Blocked()
+        leader = asyncio.create_task(flight.run("q", fn))
+        follower = asyncio.create_task(flight.run("q", fn))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        fn.release.set()
+        return await leader, fn
+
+    result, fn = asyncio.run(scenario())
+
+    assert result == "answer" and fn.calls == 1
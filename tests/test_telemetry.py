@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from rag_core.telemetry import REQUEST_SECONDS, UNMATCHED_PATH, TimingMiddleware
+
+
+def serve(middleware: TimingMiddleware, path: str) -> list:
+    sent = []
+
+    async def send(message) -> None:
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    asyncio.run(middleware(scope, None, send))
+    return sent
+
+
+def routed(template: str):
+    async def app(scope, receive, send) -> None:
+        scope["route"] = SimpleNamespace(path=template)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+async def not_found(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 404, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_requests_are_labelled_with_the_route_template():
+    middleware = TimingMiddleware(routed("/admin/profile/requests/{profile_id}"))
+    before = REQUEST_SECONDS.count(method="GET", path="/admin/profile/requests/{profile_id}", status="200")
+    for profile_id in ("a1", "b2", "c3"):
+        sent = serve(middleware, f"/admin/profile/requests/{profile_id}")
+        assert any(name == b"server-timing" for name, _ in sent[0]["headers"])
+
+    assert REQUEST_SECONDS.count(method="GET", path="/admin/profile/requests/{profile_id}", status="200") == before + 3
+    assert REQUEST_SECONDS.count(method="GET", path="/admin/profile/requests/a1", status="200") == 0
+
+
+def test_unmatched_requests_share_one_series():
+    middleware = TimingMiddleware(not_found)
+    before = REQUEST_SECONDS.count(method="GET", path=UNMATCHED_PATH, status="404")
+    for path in ("/wp-login.php", "/.env", "/admin/../etc/passwd"):
+        serve(middleware, path)
+
+    assert REQUEST_SECONDS.count(method="GET", path=UNMATCHED_PATH, status="404") == before + 3
+    assert REQUEST_SECONDS.count(method="GET", path="/.env", status="404") == 0
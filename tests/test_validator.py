@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import pytest
+
+from rag_core.validator import QueryValidator
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What is the expense ratio of Nippon India Large Cap Fund?",
+        "What is the exit load on the small cap fund?",
+        "How to download my capital gains statement?",
+        "What is the lock-in period for ELSS?",
+    ],
+)
+def test_factual_questions_are_answered(question):
+    assert QueryValidator().validate(question)["is_valid"]
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Should I buy Nippon India Small Cap Fund now?",
+        "Is it a good time to invest in mid caps?",
+        "Which fund is best for me?",
+        "Can you recommend a tax saver scheme?",
+        "Compare the returns of large cap and small cap",
+    ],
+)
+def test_advice_questions_are_refused_with_an_education_link(question):
+    result = QueryValidator().validate(question)
+
+    assert not result["is_valid"]
+    assert "not investment advice" in result["message"]
+    assert result["educational_link"] == QueryValidator.EDUCATIONAL_LINK